@@ -0,0 +1,318 @@
+"""بنچمارک تکرارپذیر تجزیه و ارزیابی ماشین حساب
+
+اجرا:
+    python bench_calc.py                      همه بنچمارک‌ها
+    python bench_calc.py --quick -k factorial فقط موارد منطبق با تکرار کمتر
+    python bench_calc.py --save bench_baseline.json
+    python bench_calc.py --compare bench_baseline.json
+
+مسیر رابط کاربری (دکمه‌ها ← update_display) با پلتفرم offscreen کیوت و
+بدون نمایشگر اجرا می‌شود. پیاده‌سازی قدیمی (بازنویسی متنی ! و eval) به
+عنوان مرجع مقایسه در کنار موتور فعلی اندازه‌گیری می‌شود.
+"""
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+from math import sqrt, sin, cos, tan, log, log10, pi, e, factorial
+
+from calc_engine import CalculatorEngine
+from calc_expr import _compile_canonical, _compile_normalized
+from calc_exact import _compile_canonical as _exact_canonical, _compile_normalized as _exact_normalized
+
+
+def legacy_evaluate(expression):
+    """ارزیابی به روش نسخه اولیه calc.py؛ فقط برای مقایسه"""
+    expr = expression.replace("^", "**").replace("÷", "/").replace("×", "*")
+    i = 0
+    while i < len(expr):
+        if expr[i] == "!":
+            j = i - 1
+            while j >= 0 and (expr[j].isdigit() or expr[j] == ')'):
+                if expr[j] == ')':
+                    balance = 1
+                    k = j - 1
+                    while k >= 0 and balance > 0:
+                        if expr[k] == ')':
+                            balance += 1
+                        elif expr[k] == '(':
+                            balance -= 1
+                        k -= 1
+                    j = k
+                    break
+                j -= 1
+            num_expr = expr[j + 1:i]
+            expr = expr[:j + 1] + f"factorial({num_expr})" + expr[i + 1:]
+            i = j + len(f"factorial({num_expr})")
+        i += 1
+    return eval(expr, {'sqrt': sqrt, 'sin': sin, 'cos': cos, 'tan': tan, 'log': log,
+                       'log10': log10, 'pi': pi, 'e': e, 'factorial': factorial})
+
+
+# --- عبارات نمونه (قطعی و بدون تصادف) ---
+
+def flat_sum(terms):
+    return "+".join(str(i % 97 + 1) for i in range(terms))
+
+
+def nested(depth):
+    # پارسر CPython بیش از 200 پرانتز تو در تو را نمی‌پذیرد
+    return "(" * depth + "1" + "+1)" * depth
+
+
+def factorial_chain(terms):
+    return "+".join(f"{i % 12 + 1}!" for i in range(terms))
+
+
+def trig_log(terms):
+    return "+".join(f"sin({i}.5)*cos({i})+log({i + 1})/log10({i + 2})" for i in range(terms))
+
+
+EXPRESSIONS = {
+    'flat_sum_1000': flat_sum(1000),
+    'nested_150': nested(150),
+    'factorial_chain_300': factorial_chain(300),
+    'trig_log_100': trig_log(100),
+    'short': "12*(3+4)-5/2",
+}
+
+
+def _clear_caches():
+    for cache in (_compile_normalized, _compile_canonical, _exact_normalized, _exact_canonical):
+        cache.cache_clear()
+
+
+def _engine_calculate(expression, exact=False):
+    engine = CalculatorEngine()
+    engine.exact = exact
+
+    def run():
+        engine.current_input = expression
+        engine.calculate()
+        if engine.error is not None:
+            raise RuntimeError(f"{expression[:40]}...: {engine.error}")
+    return run
+
+
+def _cold(run):
+    """هر اجرا با کش کامپایل خالی (تجزیه + بهینه‌سازی + کامپایل + ارزیابی)"""
+    def cold():
+        _clear_caches()
+        run()
+    return cold
+
+
+def expression_benchmarks():
+    """(نام، تابع، تعداد عبارت در هر اجرا)"""
+    benchmarks = []
+    for name, expression in EXPRESSIONS.items():
+        benchmarks.append((f"legacy/{name}", lambda expression=expression: legacy_evaluate(expression), 1))
+        benchmarks.append((f"engine_cold/{name}", _cold(_engine_calculate(expression)), 1))
+        benchmarks.append((f"engine_warm/{name}", _engine_calculate(expression), 1))
+    benchmarks.append(("exact_cold/trig_log_100", _cold(_engine_calculate(EXPRESSIONS['trig_log_100'], True)), 1))
+    benchmarks.append(("exact_warm/short", _engine_calculate(EXPRESSIONS['short'], True), 1))
+    return benchmarks
+
+
+# --- مسیر دکمه‌ها در رابط کاربری ---
+
+# دنباله کلیدها: (متد، آرگومان)
+KEYPAD_SCRIPT = (
+    [('append_number', digit) for digit in "12345"]
+    + [('append_operator', '*'), ('append_function', 'sin('), ('append_number', '2'),
+       ('toggle_parentheses', None), ('append_operator', '+'), ('append_number', '7'),
+       ('append_factorial', None), ('append_operator', '/'), ('append_function', 'log('),
+       ('append_number', '9'), ('toggle_parentheses', None), ('backspace', None),
+       ('toggle_parentheses', None)]
+)
+
+
+def gui_benchmarks():
+    """بنچمارک کلیدها با پنجره واقعی روی پلتفرم offscreen؛ بدون PyQt5 خالی است"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PyQt5.QtCore import QCoreApplication, QEvent
+        from PyQt5.QtWidgets import QApplication
+        import calc
+    except ImportError:
+        return [], None
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    # تاریخچه بنچمارک نباید در تاریخچه کاربر نوشته شود
+    history_dir = tempfile.mkdtemp(prefix="bench_calc_")
+    calc.HISTORY_PATH = os.path.join(history_dir, "history.jsonl")
+    window = calc.AdvancedCalculator()
+    window.show()
+    app.processEvents()
+
+    def keystroke():
+        method, argument = KEYPAD_SCRIPT[keystroke.position % len(KEYPAD_SCRIPT)]
+        keystroke.position += 1
+        if keystroke.position % len(KEYPAD_SCRIPT) == 0:
+            window.clear()
+        callback = getattr(window, method)
+        callback() if argument is None else callback(argument)
+        flush()
+    keystroke.position = 0
+
+    def flush():
+        # رسم معوق نمایشگر (یک بار در هر فریم) همین‌جا انجام می‌شود تا هزینه آن
+        # در اندازه‌گیری بماند؛ پیش‌نمایش و رسم در همان دور حلقه رویداد هستند
+        if window.display_timer.isActive():
+            window.display_timer.stop()
+            window.render_display()
+        app.processEvents()
+
+    def equals():
+        window.engine.current_input = EXPRESSIONS['short']
+        window.calculate()
+        app.processEvents()
+
+    # چسباندن یک عبارت ۱۰ هزار نویسه‌ای (اعتبارسنجی + درج + پیش‌نمایش)
+    paste_text = trig_log(300)
+    paste_text = paste_text[:paste_text.rindex("+", 0, 10000)]
+
+    def paste():
+        window.clear()
+        app.clipboard().setText(paste_text)
+        window.paste()
+        flush()
+
+    def startup():
+        # ساخت، نمایش و رسم اول پنجره کامل و سپس حذف آن
+        other = calc.AdvancedCalculator()
+        other.show()
+        app.processEvents()
+        other.close()
+        other.deleteLater()
+        QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+
+    def theme_toggle():
+        window.toggle_theme()
+        app.processEvents()
+
+    return [("gui/keystroke", keystroke, 1), ("gui/equals", equals, 1),
+            ("gui/paste_10k", paste, 1), ("gui/startup", startup, 1),
+            ("gui/theme_toggle", theme_toggle, 1)], window
+
+
+# --- اندازه‌گیری و گزارش ---
+
+def percentile(samples, fraction):
+    """صدک با روش نزدیک‌ترین رتبه روی نمونه‌های مرتب"""
+    index = max(0, min(len(samples) - 1, int(round(fraction * len(samples) + 0.5)) - 1))
+    return samples[index]
+
+
+def measure(func, repeat, warmup, min_time):
+    for _ in range(warmup):
+        func()
+    samples = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        while len(samples) < repeat or time.perf_counter() - started < min_time:
+            begin = time.perf_counter_ns()
+            func()
+            samples.append(time.perf_counter_ns() - begin)
+            if len(samples) >= 100 * repeat:
+                break
+    finally:
+        if gc_enabled:
+            gc.enable()
+    samples.sort()
+    total = sum(samples)
+    return {
+        'runs': len(samples),
+        'throughput': len(samples) / (total / 1e9) if total else float('inf'),
+        'mean_us': total / len(samples) / 1000,
+        'p50_us': percentile(samples, 0.50) / 1000,
+        'p90_us': percentile(samples, 0.90) / 1000,
+        'p99_us': percentile(samples, 0.99) / 1000,
+        'max_us': samples[-1] / 1000,
+    }
+
+
+def _environment():
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+    }
+
+
+def run(pattern=None, quick=False, gui=True, output=sys.stdout):
+    repeat, warmup, min_time = (20, 2, 0.05) if quick else (100, 5, 0.5)
+    benchmarks = expression_benchmarks()
+    window = None
+    if gui:
+        gui_cases, window = gui_benchmarks()
+        if window is None:
+            output.write("PyQt5 در دسترس نیست؛ بنچمارک رابط کاربری اجرا نشد\n")
+        benchmarks += gui_cases
+
+    results = {}
+    output.write(f"{'benchmark':40} {'runs':>6} {'ops/s':>10} {'p50 µs':>10} {'p90 µs':>10} {'p99 µs':>10}\n")
+    for name, func, _ in benchmarks:
+        if pattern and pattern not in name:
+            continue
+        stats = measure(func, repeat, warmup, min_time)
+        results[name] = stats
+        output.write(f"{name:40} {stats['runs']:>6} {stats['throughput']:>10.1f} {stats['p50_us']:>10.1f} "
+                     f"{stats['p90_us']:>10.1f} {stats['p99_us']:>10.1f}\n")
+        output.flush()
+    if window is not None:
+        window.close()
+    return {'environment': _environment(), 'results': results}
+
+
+def compare(report, baseline, tolerance, output=sys.stdout):
+    """مقایسه میانه با خط پایه؛ تعداد پسرفت‌ها را برمی‌گرداند"""
+    regressions = 0
+    output.write(f"\n{'benchmark':40} {'baseline':>10} {'current':>10} {'change':>8}\n")
+    for name, stats in report['results'].items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+        change = stats['p50_us'] / previous['p50_us'] - 1 if previous['p50_us'] else 0.0
+        flag = ""
+        if change > tolerance:
+            flag = "  پسرفت"
+            regressions += 1
+        output.write(f"{name:40} {previous['p50_us']:>10.1f} {stats['p50_us']:>10.1f} {change:>+8.1%}{flag}\n")
+    if baseline.get('environment') != report['environment']:
+        output.write("توجه: محیط اجرا با خط پایه متفاوت است\n")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="بنچمارک ماشین حساب")
+    parser.add_argument("-k", "--filter", help="فقط بنچمارک‌هایی که نامشان شامل این متن است")
+    parser.add_argument("--quick", action="store_true", help="تکرار کمتر برای بررسی سریع")
+    parser.add_argument("--no-gui", action="store_true", help="بدون بنچمارک رابط کاربری")
+    parser.add_argument("--save", metavar="FILE", help="ذخیره نتایج به عنوان خط پایه")
+    parser.add_argument("--compare", metavar="FILE", help="مقایسه با خط پایه ذخیره‌شده")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="افزایش مجاز میانه پیش از گزارش پسرفت (پیش‌فرض 0.15)")
+    args = parser.parse_args(argv)
+
+    report = run(args.filter, args.quick, not args.no_gui)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as baseline_file:
+            json.dump(report, baseline_file, indent=2, ensure_ascii=False)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        if compare(report, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
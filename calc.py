@@ -1,22 +1,260 @@
+import os
 import sys
+import time
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, 
-                             QWidget, QLineEdit, QPushButton, QLabel, QSizePolicy)
-from PyQt5.QtCore import Qt, QSize
-from PyQt5.QtGui import QFont, QPalette, QColor
-from math import sqrt, sin, cos, tan, log, log10, pi, e, factorial
+                             QWidget, QLineEdit, QPushButton, QLabel, QSizePolicy, QProgressBar,
+                             QPlainTextEdit, QListWidget, QListWidgetItem, QSpinBox,
+                             QShortcut, QFileDialog)
+from PyQt5.QtCore import Qt, QSize, QTimer, QElapsedTimer, QEvent
+from PyQt5.QtGui import QFont, QKeySequence
+from math import pi
+from calc_engine import CalculatorEngine, CHEAP_BITS, estimate_size, format_result, is_cheap, error_message
+from calc_expr import evaluate
+from calc_history import HistoryStore
+from calc_preview import IncrementalEvaluator
+from calc_stats import EvaluationStats
+import calc_theme
+from calc_worksheet import Worksheet
+from calc_worker import EvaluationWorker
+
+# لاگ دائمی تاریخچه محاسبات
+HISTORY_PATH = os.path.join(os.path.expanduser("~"), ".calc_history.jsonl")
+
+# حداقل فاصله دو رسم نمایشگر (میلی‌ثانیه)؛ ورودی سریع‌تر در یک رسم جمع می‌شود
+FRAME_INTERVAL = 16
+
+# نمایشگر فقط انتهای ورودی را نشان می‌دهد؛ چیدمان متن ده‌ها هزار نویسه‌ای در
+# هر رسم QLineEdit چند میلی‌ثانیه طول می‌کشد و بیشتر آن اصلاً دیده نمی‌شود
+DISPLAY_CHARS = 256
+
+# کلیدهای عملگر ← عملگر موتور
+KEY_OPERATORS = {"+": "+", "-": "-", "*": "*", "/": "/", "^": "^", "×": "*", "÷": "/"}
+
+# با CALC_STATS=1 پایش ارزیابی‌ها از ابتدا فعال است (در غیر این صورت با Ctrl+Shift+D)
+STATS_ENABLED = bool(os.environ.get("CALC_STATS"))
+
+class WorksheetPanel(QWidget):
+    """کاربرگ چندخطی: ویرایشگر در چپ و نتیجه هر خط در راست"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.worksheet = Worksheet()
+        self.pending = False
+        
+        layout = QHBoxLayout()
+        self.setLayout(layout)
+        
+        self.editor = QPlainTextEdit()
+        self.editor.setLayoutDirection(Qt.LeftToRight)
+        self.editor.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.editor.setPlaceholderText("a = 3\nb = a^2 + sin(a)")
+        self.editor.textChanged.connect(self.schedule_update)
+        layout.addWidget(self.editor, 3)
+        
+        self.results = QPlainTextEdit()
+        self.results.setReadOnly(True)
+        self.results.setLayoutDirection(Qt.LeftToRight)
+        self.results.setLineWrapMode(QPlainTextEdit.NoWrap)
+        layout.addWidget(self.results, 2)
+        
+        # هم‌ترازی اسکرول دو ستون
+        self.editor.verticalScrollBar().valueChanged.connect(self.results.verticalScrollBar().setValue)
+    
+    def schedule_update(self):
+        if not self.pending:
+            self.pending = True
+            QTimer.singleShot(0, self.update_results)
+    
+    def update_results(self):
+        self.pending = False
+        self.worksheet.set_text(self.editor.toPlainText())
+        self.results.setPlainText("\n".join(line.display() for line in self.worksheet.lines))
+        self.results.verticalScrollBar().setValue(self.editor.verticalScrollBar().value())
+    
+    def append_line(self, text):
+        self.editor.appendPlainText(text)
+
+
+class SolverPanel(QWidget):
+    """حل f(x) = 0 و انتگرال معین f روی [a, b] (نیاز به NumPy در اولین استفاده)"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+        
+        row = QHBoxLayout()
+        row.addWidget(QLabel("f(x) ="))
+        self.expression_input = QLineEdit()
+        self.expression_input.setLayoutDirection(Qt.LeftToRight)
+        row.addWidget(self.expression_input)
+        layout.addLayout(row)
+        
+        row = QHBoxLayout()
+        self.a_input = QLineEdit("0")
+        self.b_input = QLineEdit("1")
+        self.tolerance_input = QLineEdit("1e-10")
+        for label, field in (("a", self.a_input), ("b", self.b_input), ("tol", self.tolerance_input)):
+            row.addWidget(QLabel(label))
+            field.setLayoutDirection(Qt.LeftToRight)
+            row.addWidget(field)
+        layout.addLayout(row)
+        
+        row = QHBoxLayout()
+        root_btn = QPushButton("ریشه f(x) = 0")
+        root_btn.clicked.connect(self.find_root)
+        row.addWidget(root_btn)
+        integral_btn = QPushButton("∫ f(x) dx")
+        integral_btn.clicked.connect(self.integrate)
+        row.addWidget(integral_btn)
+        layout.addLayout(row)
+        
+        self.result_label = QLabel()
+        self.result_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        self.result_label.setWordWrap(True)
+        layout.addWidget(self.result_label)
+    
+    def set_expression(self, expression):
+        self.expression_input.setText(expression)
+    
+    def read_inputs(self):
+        """(f، a، b یا None، تلورانس)؛ a و b می‌توانند عبارت باشند (مثل 2*pi)"""
+        from calc_numeric import expression_function
+        expression = self.expression_input.text().strip()
+        if not expression:
+            raise ValueError("f(x) خالی است")
+        func = expression_function(expression)
+        a = self.read_number(self.a_input)
+        b = self.read_number(self.b_input) if self.b_input.text().strip() else None
+        tolerance = self.read_number(self.tolerance_input)
+        return func, a, b, tolerance
+    
+    def read_number(self, field):
+        # روی نخ رابط کاربری؛ عبارتی مثل 9^9^9 پیش از ارزیابی رد می‌شود
+        text = field.text()
+        if not is_cheap(text):
+            raise OverflowError("result too large")
+        return float(evaluate(text))
+    
+    def show_result(self, name, result):
+        text = (f"{name} ≈ {format_result(result.value)}\n"
+                f"خطای تخمینی ≈ {result.error:.2e} — {result.evaluations} ارزیابی ({result.method})")
+        if not result.converged:
+            text += "\nهشدار: به دقت خواسته‌شده همگرا نشد"
+        self.result_label.setText(text)
+    
+    def find_root(self):
+        from calc_numeric import solve
+        try:
+            func, a, b, tolerance = self.read_inputs()
+            # بدون b نیوتن از نقطه a شروع می‌کند
+            if b is None:
+                result = solve(func, x0=a, tol=tolerance)
+            else:
+                result = solve(func, a, b, tol=tolerance)
+        except Exception as exc:
+            self.result_label.setText(error_message(exc))
+            return
+        self.show_result("x", result)
+    
+    def integrate(self):
+        from calc_numeric import integrate
+        try:
+            func, a, b, tolerance = self.read_inputs()
+            if b is None:
+                raise ValueError("b خالی است")
+            result = integrate(func, a, b, abs_tol=tolerance, rel_tol=tolerance)
+        except Exception as exc:
+            self.result_label.setText(error_message(exc))
+            return
+        self.show_result("∫", result)
+
+
+class StatsPanel(QWidget):
+    """پنل اشکال‌زدایی: آمار زمان مراحل، کش و خطاهای ارزیابی"""
+    
+    def __init__(self, stats, parent=None):
+        super().__init__(parent)
+        self.stats = stats
+        self.pending = False
+        
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+        
+        self.report = QPlainTextEdit()
+        self.report.setReadOnly(True)
+        self.report.setLayoutDirection(Qt.LeftToRight)
+        self.report.setObjectName("statsReport")
+        self.report.setMinimumHeight(200)
+        layout.addWidget(self.report)
+        
+        buttons = QHBoxLayout()
+        save_btn = QPushButton("ذخیره JSON")
+        save_btn.clicked.connect(self.save)
+        reset_btn = QPushButton("صفر کردن")
+        reset_btn.clicked.connect(self.reset)
+        buttons.addWidget(save_btn)
+        buttons.addWidget(reset_btn)
+        layout.addLayout(buttons)
+        
+        self.unsubscribe = stats.subscribe(lambda record: self.schedule_update())
+        self.update_report()
+    
+    def schedule_update(self):
+        # چند ارزیابی پشت سر هم فقط یک بار گزارش را بازسازی می‌کنند
+        if not self.pending and self.isVisible():
+            self.pending = True
+            QTimer.singleShot(0, self.update_report)
+    
+    def update_report(self):
+        self.pending = False
+        self.report.setPlainText(self.stats.report())
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.update_report()
+    
+    def save(self):
+        path, _ = QFileDialog.getSaveFileName(self, "ذخیره آمار", "calc_stats.json", "JSON (*.json)")
+        if path:
+            self.stats.dump(path)
+    
+    def reset(self):
+        self.stats.reset()
+        self.update_report()
+
 
 class AdvancedCalculator(QMainWindow):
     def __init__(self):
         super().__init__()
+        # پیش از ساخت ویجت‌ها تا هر ویجت فقط یک بار قالب‌بندی شود
+        calc_theme.install(QApplication.instance())
         self.setWindowTitle("ماشین حساب پیشرفته")
         self.setMinimumSize(400, 600)
         
         # متغیرهای حالت
-        self.current_input = ""
-        self.result = ""
-        self.history = []
+        self.engine = CalculatorEngine(HistoryStore(HISTORY_PATH),
+                                       EvaluationStats() if STATS_ENABLED else None)
+        self.stats_panel = None
+        self.submitted_at = None
         self.dark_mode = False
-        self.parentheses_count = 0
+        self.search_pending = False
+        
+        # رسم نمایشگر حداکثر یک بار در هر فریم
+        self.display_timer = QTimer(self)
+        self.display_timer.setSingleShot(True)
+        self.display_timer.timeout.connect(self.render_display)
+        self.display_clock = QElapsedTimer()
+        
+        # پیش‌نمایش افزایشی؛ به‌روزرسانی‌ها در هر دور حلقه رویداد یکی می‌شوند
+        self.preview = IncrementalEvaluator()
+        self.preview_pending = False
+        
+        # ارزیابی سنگین خارج از نخ رابط کاربری
+        self.worker = EvaluationWorker(parent=self)
+        self.worker.finished.connect(self.on_calculation_finished)
+        self.worker.failed.connect(self.on_calculation_failed)
+        self.worker.progress.connect(lambda fraction: self.progress_bar.setValue(int(fraction * 1000)))
         
         # ایجاد رابط کاربری
         self.init_ui()
@@ -33,10 +271,26 @@ class AdvancedCalculator(QMainWindow):
         main_layout = QVBoxLayout()
         central_widget.setLayout(main_layout)
         
+        # جست‌وجو در تاریخچه
+        self.history_search = QLineEdit()
+        self.history_search.setPlaceholderText("جستجو در تاریخچه...")
+        self.history_search.setClearButtonEnabled(True)
+        self.history_search.textChanged.connect(self.schedule_search)
+        self.history_search.returnPressed.connect(self.recall_first)
+        main_layout.addWidget(self.history_search)
+        
+        self.history_results = QListWidget()
+        self.history_results.setMaximumHeight(120)
+        self.history_results.setLayoutDirection(Qt.LeftToRight)
+        self.history_results.itemActivated.connect(self.recall_history)
+        self.history_results.itemClicked.connect(self.recall_history)
+        self.history_results.hide()
+        main_layout.addWidget(self.history_results)
+        
         # نمایشگر تاریخچه
         self.history_label = QLabel()
         self.history_label.setAlignment(Qt.AlignRight)
-        self.history_label.setStyleSheet("color: #888; font-size: 14px;")
+        self.history_label.setObjectName("historyLabel")
         self.history_label.setMaximumHeight(30)
         main_layout.addWidget(self.history_label)
         
@@ -44,24 +298,65 @@ class AdvancedCalculator(QMainWindow):
         self.display = QLineEdit()
         self.display.setAlignment(Qt.AlignRight)
         self.display.setReadOnly(True)
-        self.display.setStyleSheet("""
-            font-size: 32px; 
-            border: none;
-            background: transparent;
-        """)
+        self.display.setObjectName("display")
+        # ورودی صفحه‌کلید و کلیپ‌بورد مستقیماً به موتور می‌رود
+        self.display.installEventFilter(self)
+        self.display.setFocus()
         self.display.setMinimumHeight(80)
         main_layout.addWidget(self.display)
         
+        # پیش‌نمایش زنده نتیجه
+        self.preview_label = QLabel()
+        self.preview_label.setAlignment(Qt.AlignRight)
+        self.preview_label.setObjectName("previewLabel")
+        main_layout.addWidget(self.preview_label)
+        
+        # حالت دقیق (کسری / Decimal) و تعداد ارقام معنادار
+        exact_layout = QHBoxLayout()
+        self.exact_btn = QPushButton("حالت دقیق")
+        self.exact_btn.setCheckable(True)
+        self.exact_btn.toggled.connect(self.toggle_exact)
+        exact_layout.addWidget(self.exact_btn)
+        self.precision_box = QSpinBox()
+        self.precision_box.setRange(5, 1000)
+        self.precision_box.setValue(self.engine.precision)
+        self.precision_box.setSuffix(" رقم")
+        self.precision_box.setEnabled(False)
+        self.precision_box.valueChanged.connect(self.set_precision)
+        exact_layout.addWidget(self.precision_box)
+        main_layout.addLayout(exact_layout)
+        
+        # نوار پیشرفت و لغو برای محاسبات سنگین
+        self.busy_widget = QWidget()
+        busy_layout = QHBoxLayout()
+        busy_layout.setContentsMargins(0, 0, 0, 0)
+        self.busy_widget.setLayout(busy_layout)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1000)
+        self.progress_bar.setTextVisible(False)
+        busy_layout.addWidget(self.progress_bar)
+        cancel_btn = QPushButton("لغو")
+        cancel_btn.clicked.connect(self.cancel_calculation)
+        busy_layout.addWidget(cancel_btn)
+        self.busy_widget.hide()
+        main_layout.addWidget(self.busy_widget)
+        
         # لایه دکمه‌ها
         buttons_layout = QVBoxLayout()
         
         # ردیف اول - منو و توابع پیشرفته
         row1 = QHBoxLayout()
-        self.theme_btn = self.create_button("☀️", self.toggle_theme, "#f0f0f0", "#333")
-        self.clear_btn = self.create_button("C", self.clear, "#ff6b6b", "white")
-        self.del_btn = self.create_button("⌫", self.backspace, "#f0f0f0", "#333")
-        self.div_btn = self.create_button("÷", lambda: self.append_operator("/"), "#f0f0f0", "#333")
+        self.theme_btn = self.create_button("☀️", self.toggle_theme, "operator")
+        self.clear_btn = self.create_button("C", self.clear, "clear")
+        self.del_btn = self.create_button("⌫", self.backspace, "operator")
+        self.div_btn = self.create_button("÷", lambda: self.append_operator("/"), "operator")
+        self.plot_btn = self.create_button("📈", self.toggle_plot, "operator")
+        self.sheet_btn = self.create_button("📝", self.toggle_worksheet, "operator")
+        self.solver_btn = self.create_button("∫", self.toggle_solver, "operator")
         row1.addWidget(self.theme_btn)
+        row1.addWidget(self.plot_btn)
+        row1.addWidget(self.sheet_btn)
+        row1.addWidget(self.solver_btn)
         row1.addWidget(self.clear_btn)
         row1.addWidget(self.del_btn)
         row1.addWidget(self.div_btn)
@@ -69,11 +364,11 @@ class AdvancedCalculator(QMainWindow):
         
         # ردیف دوم
         row2 = QHBoxLayout()
-        self.sin_btn = self.create_button("sin", lambda: self.append_function("sin("), "#e0e0e0", "#333")
-        self.seven_btn = self.create_button("7", lambda: self.append_number("7"), "#f8f9fa", "#333")
-        self.eight_btn = self.create_button("8", lambda: self.append_number("8"), "#f8f9fa", "#333")
-        self.nine_btn = self.create_button("9", lambda: self.append_number("9"), "#f8f9fa", "#333")
-        self.mul_btn = self.create_button("×", lambda: self.append_operator("*"), "#f0f0f0", "#333")
+        self.sin_btn = self.create_button("sin", lambda: self.append_function("sin("), "function")
+        self.seven_btn = self.create_button("7", lambda: self.append_number("7"), "digit")
+        self.eight_btn = self.create_button("8", lambda: self.append_number("8"), "digit")
+        self.nine_btn = self.create_button("9", lambda: self.append_number("9"), "digit")
+        self.mul_btn = self.create_button("×", lambda: self.append_operator("*"), "operator")
         row2.addWidget(self.sin_btn)
         row2.addWidget(self.seven_btn)
         row2.addWidget(self.eight_btn)
@@ -83,11 +378,11 @@ class AdvancedCalculator(QMainWindow):
         
         # ردیف سوم
         row3 = QHBoxLayout()
-        self.cos_btn = self.create_button("cos", lambda: self.append_function("cos("), "#e0e0e0", "#333")
-        self.four_btn = self.create_button("4", lambda: self.append_number("4"), "#f8f9fa", "#333")
-        self.five_btn = self.create_button("5", lambda: self.append_number("5"), "#f8f9fa", "#333")
-        self.six_btn = self.create_button("6", lambda: self.append_number("6"), "#f8f9fa", "#333")
-        self.sub_btn = self.create_button("-", lambda: self.append_operator("-"), "#f0f0f0", "#333")
+        self.cos_btn = self.create_button("cos", lambda: self.append_function("cos("), "function")
+        self.four_btn = self.create_button("4", lambda: self.append_number("4"), "digit")
+        self.five_btn = self.create_button("5", lambda: self.append_number("5"), "digit")
+        self.six_btn = self.create_button("6", lambda: self.append_number("6"), "digit")
+        self.sub_btn = self.create_button("-", lambda: self.append_operator("-"), "operator")
         row3.addWidget(self.cos_btn)
         row3.addWidget(self.four_btn)
         row3.addWidget(self.five_btn)
@@ -97,11 +392,11 @@ class AdvancedCalculator(QMainWindow):
         
         # ردیف چهارم
         row4 = QHBoxLayout()
-        self.tan_btn = self.create_button("tan", lambda: self.append_function("tan("), "#e0e0e0", "#333")
-        self.one_btn = self.create_button("1", lambda: self.append_number("1"), "#f8f9fa", "#333")
-        self.two_btn = self.create_button("2", lambda: self.append_number("2"), "#f8f9fa", "#333")
-        self.three_btn = self.create_button("3", lambda: self.append_number("3"), "#f8f9fa", "#333")
-        self.add_btn = self.create_button("+", lambda: self.append_operator("+"), "#f0f0f0", "#333")
+        self.tan_btn = self.create_button("tan", lambda: self.append_function("tan("), "function")
+        self.one_btn = self.create_button("1", lambda: self.append_number("1"), "digit")
+        self.two_btn = self.create_button("2", lambda: self.append_number("2"), "digit")
+        self.three_btn = self.create_button("3", lambda: self.append_number("3"), "digit")
+        self.add_btn = self.create_button("+", lambda: self.append_operator("+"), "operator")
         row4.addWidget(self.tan_btn)
         row4.addWidget(self.one_btn)
         row4.addWidget(self.two_btn)
@@ -111,11 +406,11 @@ class AdvancedCalculator(QMainWindow):
         
         # ردیف پنجم
         row5 = QHBoxLayout()
-        self.sqrt_btn = self.create_button("√", lambda: self.append_function("sqrt("), "#e0e0e0", "#333")
-        self.zero_btn = self.create_button("0", lambda: self.append_number("0"), "#f8f9fa", "#333")
-        self.dot_btn = self.create_button(".", lambda: self.append_number("."), "#f8f9fa", "#333")
-        self.pi_btn = self.create_button("π", lambda: self.append_number(str(pi)), "#e0e0e0", "#333")
-        self.equal_btn = self.create_button("=", self.calculate, "#4dabf7", "white")
+        self.sqrt_btn = self.create_button("√", lambda: self.append_function("sqrt("), "function")
+        self.zero_btn = self.create_button("0", lambda: self.append_number("0"), "digit")
+        self.dot_btn = self.create_button(".", lambda: self.append_number("."), "digit")
+        self.pi_btn = self.create_button("π", lambda: self.append_number(str(pi)), "function")
+        self.equal_btn = self.create_button("=", self.calculate, "equal")
         row5.addWidget(self.sqrt_btn)
         row5.addWidget(self.zero_btn)
         row5.addWidget(self.dot_btn)
@@ -125,11 +420,11 @@ class AdvancedCalculator(QMainWindow):
         
         # ردیف ششم - دکمه‌های پیشرفته
         row6 = QHBoxLayout()
-        self.log_btn = self.create_button("log", lambda: self.append_function("log10("), "#e0e0e0", "#333")
-        self.ln_btn = self.create_button("ln", lambda: self.append_function("log("), "#e0e0e0", "#333")
-        self.pow_btn = self.create_button("x^y", lambda: self.append_operator("^"), "#e0e0e0", "#333")
-        self.fact_btn = self.create_button("n!", self.append_factorial, "#e0e0e0", "#333")
-        self.par_btn = self.create_button("( )", self.toggle_parentheses, "#e0e0e0", "#333")
+        self.log_btn = self.create_button("log", lambda: self.append_function("log10("), "function")
+        self.ln_btn = self.create_button("ln", lambda: self.append_function("log("), "function")
+        self.pow_btn = self.create_button("x^y", lambda: self.append_operator("^"), "function")
+        self.fact_btn = self.create_button("n!", self.append_factorial, "function")
+        self.par_btn = self.create_button("( )", self.toggle_parentheses, "function")
         row6.addWidget(self.log_btn)
         row6.addWidget(self.ln_btn)
         row6.addWidget(self.pow_btn)
@@ -138,205 +433,341 @@ class AdvancedCalculator(QMainWindow):
         buttons_layout.addLayout(row6)
         
         main_layout.addLayout(buttons_layout)
+        
+        # پنل نمودار در اولین استفاده ساخته می‌شود (نیاز به NumPy)
+        self.main_layout = main_layout
+        self.plot_panel = None
+        
+        # پنل حل معادله و انتگرال
+        self.solver_panel = SolverPanel()
+        self.solver_panel.hide()
+        main_layout.addWidget(self.solver_panel)
+        
+        # کاربرگ
+        self.worksheet_panel = WorksheetPanel()
+        self.worksheet_panel.hide()
+        main_layout.addWidget(self.worksheet_panel)
+        
+        # پنل آمار ارزیابی‌ها (اشکال‌زدایی)
+        QShortcut(QKeySequence("Ctrl+Shift+D"), self, activated=self.toggle_stats)
     
-    def create_button(self, text, callback, bg_color, text_color):
+    def create_button(self, text, callback, role):
+        # ظاهر دکمه از شیوه‌نامه برنامه و بر اساس ویژگی role می‌آید (calc_theme)
         btn = QPushButton(text)
         btn.clicked.connect(callback)
-        btn.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {bg_color};
-                color: {text_color};
-                border: none;
-                border-radius: 10px;
-                font-size: 20px;
-                padding: 15px;
-                margin: 3px;
-            }}
-            QPushButton:pressed {{
-                background-color: {self.darken_color(bg_color)};
-            }}
-        """)
+        btn.setProperty("role", role)
+        # فوکوس روی نمایشگر می‌ماند تا صفحه‌کلید همیشه کار کند
+        btn.setFocusPolicy(Qt.NoFocus)
         btn.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         return btn
     
-    def darken_color(self, color):
-        if color.startswith("#"):
-            r = int(color[1:3], 16)
-            g = int(color[3:5], 16)
-            b = int(color[5:7], 16)
-            r = max(0, r - 30)
-            g = max(0, g - 30)
-            b = max(0, b - 30)
-            return f"#{r:02x}{g:02x}{b:02x}"
-        return color
-    
     def toggle_theme(self):
         self.dark_mode = not self.dark_mode
+        theme = 'dark' if self.dark_mode else 'light'
+        calc_theme.apply_theme(self, theme, (self.display, self.history_label))
+        self.theme_btn.setText(calc_theme.icon(theme))
+    
+    def toggle_plot(self):
+        if self.plot_panel is None:
+            from calc_plot import PlotPanel
+            self.plot_panel = PlotPanel()
+            self.plot_panel.hide()
+            self.main_layout.addWidget(self.plot_panel)
         
-        if self.dark_mode:
-            # تم تیره
-            palette = QPalette()
-            palette.setColor(QPalette.Window, QColor(40, 40, 40))
-            palette.setColor(QPalette.WindowText, Qt.white)
-            palette.setColor(QPalette.Base, QColor(25, 25, 25))
-            palette.setColor(QPalette.Text, Qt.white)
-            palette.setColor(QPalette.ButtonText, Qt.white)
-            self.setPalette(palette)
-            self.theme_btn.setText("🌙")
-            self.display.setStyleSheet("""
-                font-size: 32px; 
-                border: none;
-                color: white;
-                background: transparent;
-            """)
-            self.history_label.setStyleSheet("color: #aaa; font-size: 14px;")
-        else:
-            # تم روشن
-            palette = QPalette()
-            palette.setColor(QPalette.Window, QColor(240, 240, 240))
-            palette.setColor(QPalette.WindowText, Qt.black)
-            palette.setColor(QPalette.Base, QColor(255, 255, 255))
-            palette.setColor(QPalette.Text, Qt.black)
-            palette.setColor(QPalette.ButtonText, Qt.black)
-            self.setPalette(palette)
-            self.theme_btn.setText("☀️")
-            self.display.setStyleSheet("""
-                font-size: 32px; 
-                border: none;
-                color: black;
-                background: transparent;
-            """)
-            self.history_label.setStyleSheet("color: #888; font-size: 14px;")
+        if self.plot_panel.isVisible():
+            self.plot_panel.hide()
+            return
+        
+        self.plot_panel.show()
+        if "x" in self.engine.current_input:
+            self.plot_panel.set_expression(self.engine.current_input)
+    
+    def toggle_exact(self, checked):
+        self.engine.exact = checked
+        self.precision_box.setEnabled(checked)
+        self.schedule_preview()
+    
+    def set_precision(self, precision):
+        self.engine.precision = precision
+        self.schedule_preview()
+    
+    def toggle_solver(self):
+        if self.solver_panel.isVisible():
+            self.solver_panel.hide()
+            return
+        self.solver_panel.show()
+        if "x" in self.engine.current_input:
+            self.solver_panel.set_expression(self.engine.current_input)
+    
+    def toggle_stats(self):
+        if self.stats_panel is None:
+            # فعال کردن پایش در اولین باز شدن پنل
+            if self.engine.stats is None:
+                self.engine.stats = EvaluationStats()
+            self.stats_panel = StatsPanel(self.engine.stats)
+            self.stats_panel.hide()
+            self.main_layout.addWidget(self.stats_panel)
+        self.stats_panel.setVisible(not self.stats_panel.isVisible())
+    
+    def toggle_worksheet(self):
+        self.worksheet_panel.setVisible(not self.worksheet_panel.isVisible())
     
     def append_number(self, number):
-        self.current_input += number
+        self.engine.append_number(number)
         self.update_display()
     
     def append_operator(self, operator):
-        if self.current_input and self.current_input[-1] not in "+-*/^":
-            self.current_input += operator
-            self.update_display()
-        elif operator == "-" and (not self.current_input or self.current_input[-1] in "+-*/^"):
-            # اجازه دادن به اعداد منفی
-            self.current_input += operator
+        if self.engine.append_operator(operator):
             self.update_display()
     
     def append_function(self, func):
-        self.current_input += func
-        self.parentheses_count += 1
+        self.engine.append_function(func)
         self.update_display()
     
     def append_factorial(self):
-        if self.current_input and (self.current_input[-1].isdigit() or self.current_input[-1] == ')'):
-            self.current_input += "!"
+        if self.engine.append_factorial():
             self.update_display()
     
     def toggle_parentheses(self):
-        if "(" not in self.current_input or self.parentheses_count <= 0:
-            self.current_input += "("
-            self.parentheses_count += 1
-        else:
-            self.current_input += ")"
-            self.parentheses_count -= 1
+        self.engine.toggle_parentheses()
         self.update_display()
     
     def clear(self):
-        self.current_input = ""
-        self.result = ""
-        self.parentheses_count = 0
+        self.engine.clear()
         self.update_display()
         self.history_label.setText("")
     
     def backspace(self):
-        if not self.current_input:
-            return
-        
-        # مدیریت پرانتزها
-        if self.current_input[-1] == "(":
-            self.parentheses_count -= 1
-        elif self.current_input[-1] == ")":
-            self.parentheses_count += 1
-        
-        self.current_input = self.current_input[:-1]
-        self.update_display()
+        if self.engine.backspace():
+            self.update_display()
     
     def update_display(self):
-        self.display.setText(self.current_input)
+        """درخواست رسم نمایشگر؛ اولین تغییر فوراً و بقیه حداکثر یک بار در هر فریم"""
+        if self.display_timer.isActive():
+            return
+        if not self.display_clock.isValid() or self.display_clock.elapsed() >= FRAME_INTERVAL:
+            self.render_display()
+        else:
+            self.display_timer.start(FRAME_INTERVAL - self.display_clock.elapsed())
+    
+    def render_display(self):
+        self.display_clock.start()
+        self.set_display_text(self.engine.current_input)
+        self.schedule_preview()
+    
+    def show_text(self, text):
+        """نمایش مستقیم متنی غیر از ورودی (خطا یا عبارت در حال محاسبه)"""
+        self.display_timer.stop()
+        self.set_display_text(text)
+    
+    def set_display_text(self, text):
+        if len(text) > DISPLAY_CHARS:
+            text = "…" + text[-DISPLAY_CHARS:]
+        self.display.setText(text)
+    
+    def eventFilter(self, obj, event):
+        if obj is self.display and event.type() == QEvent.KeyPress:
+            return self.handle_key(event)
+        return super().eventFilter(obj, event)
+    
+    def keyPressEvent(self, event):
+        if not self.handle_key(event):
+            super().keyPressEvent(event)
+    
+    def handle_key(self, event):
+        """ورودی صفحه‌کلید؛ True اگر کلید مصرف شد"""
+        if event.matches(QKeySequence.Paste):
+            self.paste()
+            return True
+        if event.matches(QKeySequence.Copy):
+            QApplication.clipboard().setText(self.engine.current_input)
+            return True
+        key = event.key()
+        text = event.text()
+        if key in (Qt.Key_Return, Qt.Key_Enter) or text == "=":
+            self.calculate()
+        elif key == Qt.Key_Backspace:
+            self.backspace()
+        elif key in (Qt.Key_Escape, Qt.Key_Delete):
+            self.clear()
+        elif event.modifiers() & (Qt.ControlModifier | Qt.AltModifier) or len(text) != 1:
+            return False
+        elif text.isdigit() or text == ".":
+            self.append_number(text)
+        elif text in KEY_OPERATORS:
+            self.append_operator(KEY_OPERATORS[text])
+        elif text == "!":
+            self.append_factorial()
+        elif text.isalpha() or text in "()_":
+            self.insert_text(text)
+        else:
+            return False
+        return True
+    
+    def paste(self):
+        self.insert_text(QApplication.clipboard().text())
+    
+    def insert_text(self, text):
+        """درج متن تایپ‌شده یا چسبانده‌شده؛ متن نامعتبر فقط در پیش‌نمایش گزارش می‌شود"""
+        try:
+            changed = self.engine.insert(text)
+        except ValueError as exc:
+            self.preview_label.setText(error_message(exc))
+            return
+        if changed:
+            self.update_display()
+    
+    def schedule_preview(self):
+        if not self.preview_pending:
+            self.preview_pending = True
+            QTimer.singleShot(0, self.update_preview)
+    
+    def update_preview(self):
+        self.preview_pending = False
+        text = self.engine.current_input
+        if self.engine.exact:
+            value = self.exact_preview(text)
+        else:
+            value = self.preview.update(text)
+        if isinstance(value, int) and value.bit_length() > CHEAP_BITS:
+            # تبدیل عدد صحیح بسیار بزرگ به متن هم روی نخ رابط کاربری کند است
+            value = None
+        if not text:
+            self.preview_label.setText("")
+        elif value is not None:
+            try:
+                result = format_result(value)
+            except ValueError:
+                return
+            self.preview_label.setText("" if result == text else f"= {result}")
+    
+    def exact_preview(self, text):
+        """پیش‌نمایش حالت دقیق با ارزیابی کامل عبارت‌های سبک"""
+        missing = text.count("(") - text.count(")")
+        if missing > 0:
+            text += ")" * missing
+        if not text or not is_cheap(text):
+            return None
+        try:
+            return self.engine.evaluate(text)
+        except Exception:
+            return None
+    
+    def schedule_search(self):
+        if not self.search_pending:
+            self.search_pending = True
+            QTimer.singleShot(0, self.update_search)
+    
+    def update_search(self):
+        self.search_pending = False
+        self.history_results.clear()
+        query = self.history_search.text().strip()
+        if not query:
+            self.history_results.hide()
+            return
+        for entry in self.engine.history.search(query):
+            item = QListWidgetItem(entry.text)
+            item.setData(Qt.UserRole, entry.expression)
+            self.history_results.addItem(item)
+        self.history_results.setVisible(self.history_results.count() > 0)
+    
+    def recall_first(self):
+        if self.search_pending:
+            self.update_search()
+        if self.history_results.count():
+            self.recall_history(self.history_results.item(0))
+    
+    def recall_history(self, item):
+        """بازگرداندن عبارت یک محاسبه قبلی به ورودی"""
+        self.engine.clear()
+        self.engine.current_input = item.data(Qt.UserRole)
+        self.history_search.clear()
+        self.update_display()
         self.display.setFocus()
     
     def calculate(self):
-        if not self.current_input:
+        if self.worker.is_busy():
             return
         
-        try:
-            # بستن پرانتزهای باز
-            while self.parentheses_count > 0:
-                self.current_input += ")"
-                self.parentheses_count -= 1
-            
-            # جایگزینی نمادهای ریاضی برای ارزیابی
-            expr = self.current_input
-            expr = expr.replace("^", "**").replace("÷", "/").replace("×", "*")
-            
-            # جایگزینی فاکتوریل
-            i = 0
-            while i < len(expr):
-                if expr[i] == "!":
-                    j = i - 1
-                    while j >= 0 and (expr[j].isdigit() or expr[j] == ')'):
-                        if expr[j] == ')':
-                            # پیدا کردن پرانتز باز مربوطه
-                            balance = 1
-                            k = j - 1
-                            while k >= 0 and balance > 0:
-                                if expr[k] == ')':
-                                    balance += 1
-                                elif expr[k] == '(':
-                                    balance -= 1
-                                k -= 1
-                            j = k
-                            break
-                        j -= 1
-                    
-                    num_expr = expr[j+1:i]
-                    expr = expr[:j+1] + f"factorial({num_expr})" + expr[i+1:]
-                    i = j + len(f"factorial({num_expr})")
-                i += 1
-            
-            # ارزیابی عبارت
-            result = eval(expr, {
-                'sqrt': sqrt,
-                'sin': sin,
-                'cos': cos,
-                'tan': tan,
-                'log': log,
-                'log10': log10,
-                'pi': pi,
-                'e': e,
-                'factorial': factorial
-            })
-            
-            # نمایش نتیجه
-            self.result = str(result)
-            if '.' in self.result:
-                self.result = self.result.rstrip('0').rstrip('.') if '.' in self.result else self.result
-            
-            self.history.append(f"{self.current_input} = {self.result}")
-            self.history_label.setText(self.history[-1] if len(self.history) <= 1 else "... " + self.history[-1])
-            self.current_input = self.result
-            self.update_display()
+        expression = self.engine.take_expression()
+        if expression is None:
+            return
+        
+        # در حالت کاربرگ عبارت به عنوان یک خط جدید ثبت می‌شود
+        if self.worksheet_panel.isVisible():
+            self.worksheet_panel.append_line(expression)
+        
+        # مسیر سریع همزمان برای عبارات سبک
+        size = estimate_size(expression)
+        if size <= CHEAP_BITS:
+            self.show_result(self.engine.calculate())
+            return
+        
+        if size > self.worker.max_bits:
+            self.show_result(self.engine.fail(OverflowError("result too large")))
+            return
         
-        except ZeroDivisionError:
-            self.display.setText("خطا: تقسیم بر صفر")
-            self.current_input = ""
-        except ValueError as ve:
-            self.display.setText(f"خطا: {str(ve)}")
-            self.current_input = ""
-        except Exception as e:
-            self.display.setText("خطا در محاسبه")
-            self.current_input = ""
+        self.show_text(expression)
+        self.progress_bar.setValue(0)
+        self.busy_widget.show()
+        self.equal_btn.setEnabled(False)
+        self.submitted_at = time.perf_counter()
+        self.worker.submit(expression, self.engine.precision if self.engine.exact else None)
+    
+    def cancel_calculation(self):
+        self.worker.cancel()
+    
+    def on_calculation_finished(self, expression, result):
+        self.end_calculation()
+        self.record_remote(expression, result=result)
+        self.show_result(self.engine.finish(expression, result))
+    
+    def on_calculation_failed(self, expression, exc):
+        self.end_calculation()
+        self.record_remote(expression, exc=exc)
+        self.show_result(self.engine.fail(exc))
+    
+    def record_remote(self, expression, result=None, exc=None):
+        """ثبت زمان کل ارزیابی پردازه کارگر در آمار (در صورت فعال بودن)"""
+        stats = self.engine.stats
+        if stats is None or self.submitted_at is None:
+            return
+        stats.record_remote(expression, time.perf_counter() - self.submitted_at, result, exc,
+                            'exact' if self.engine.exact else 'float')
+        self.submitted_at = None
+    
+    def end_calculation(self):
+        self.busy_widget.hide()
+        self.equal_btn.setEnabled(True)
+    
+    def show_result(self, text):
+        if self.engine.error is not None:
+            self.show_text(text)
+            self.schedule_preview()
+            return
+        
+        # نمایش نتیجه
+        history = self.engine.history
+        last = history.last().text
+        self.history_label.setText(last if len(history) <= 1 else "... " + last)
+        self.update_display()
+    
+    def closeEvent(self, event):
+        self.worker.shutdown()
+        self.engine.history.close()
+        event.accept()
 
 if __name__ == "__main__":
+    # حالت دسته‌ای بدون ساختن QApplication
+    if "--batch" in sys.argv[1:]:
+        from calc_batch import main
+        sys.argv.remove("--batch")
+        sys.exit(main(sys.argv[1:]))
+    if "--serve" in sys.argv[1:]:
+        from calc_server import main
+        sys.argv.remove("--serve")
+        sys.exit(main(sys.argv[1:]))
+    
     app = QApplication(sys.argv)
     app.setStyle('Fusion')
     
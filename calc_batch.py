@@ -0,0 +1,120 @@
+"""ارزیابی دسته‌ای عبارات به صورت جریانی، بدون رابط گرافیکی"""
+import sys
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from calc_engine import MAX_RESULT_BITS, estimate_size, format_result, error_message
+from calc_expr import evaluate
+
+
+def evaluate_line(line):
+    """ارزیابی یک خط با همان قواعد دکمه «=»؛ پرانتزهای باز بسته می‌شوند
+
+    خطی که نتیجه‌اش از سقف کارگر ماشین حساب (MAX_RESULT_BITS) بزرگ‌تر
+    تخمین زده شود ارزیابی نمی‌شود تا یک خط کل جریان را متوقف نکند.
+    """
+    expression = line.strip()
+    if not expression:
+        return ""
+    missing = expression.count("(") - expression.count(")")
+    if missing > 0:
+        expression += ")" * missing
+    try:
+        if estimate_size(expression) > MAX_RESULT_BITS:
+            raise OverflowError("result too large")
+        return format_result(evaluate(expression))
+    except Exception as exc:
+        return error_message(exc)
+
+
+def evaluate_chunk(lines):
+    return [evaluate_line(line) for line in lines]
+
+
+def _chunks(lines, size):
+    lines = iter(lines)
+    while True:
+        chunk = list(islice(lines, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_results(lines, jobs=1, chunk_size=256):
+    """تولید نتایج به ترتیب ورودی
+
+    با jobs > 1 خطوط به صورت تکه‌ای بین پردازه‌ها پخش می‌شوند. فقط تعداد
+    محدودی تکه در جریان است تا ورودی هرگز کامل در حافظه بارگذاری نشود.
+    """
+    if jobs <= 1:
+        for line in lines:
+            yield evaluate_line(line)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = deque()
+        for chunk in _chunks(lines, chunk_size):
+            pending.append(executor.submit(evaluate_chunk, chunk))
+            if len(pending) >= jobs * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _tee_lines(lines):
+    """نگه داشتن عبارات در جریان تا هنگام چاپ کنار نتیجه"""
+    seen = deque()
+
+    def feed():
+        for line in lines:
+            seen.append(line)
+            yield line
+    return feed(), seen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ارزیابی دسته‌ای عبارات ماشین حساب")
+    parser.add_argument("input", nargs="?", default="-",
+                        help="فایل ورودی، هر خط یک عبارت (پیش‌فرض: stdin)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="فایل خروجی (پیش‌فرض: stdout)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="تعداد پردازه‌ها برای ارزیابی موازی")
+    parser.add_argument("--chunk-size", type=int, default=256,
+                        help="تعداد خطوط هر تکه در حالت موازی")
+    parser.add_argument("--echo", action="store_true",
+                        help="چاپ عبارت در کنار نتیجه")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    target = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    # در حالت تعاملی هر نتیجه بلافاصله نوشته شود
+    interactive = source.isatty()
+
+    try:
+        if args.echo:
+            lines = (line.rstrip("\n") for line in source)
+            lines, expressions = _tee_lines(lines)
+        else:
+            lines, expressions = source, None
+
+        for result in iter_results(lines, args.jobs, args.chunk_size):
+            if expressions is not None:
+                expression = expressions.popleft()
+                if expression.strip():
+                    result = f"{expression} = {result}"
+            target.write(result + "\n")
+            if interactive:
+                target.flush()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
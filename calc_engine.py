@@ -0,0 +1,291 @@
+"""هسته بدون رابط گرافیکی ماشین حساب: ماشین حالت ورودی و محاسبه"""
+import re
+import sys
+from fractions import Fraction
+
+from calc_expr import _TOKEN_RE, CONSTANTS, FUNCTIONS, evaluate, estimate_bits, normalize, parse
+from calc_exact import DEFAULT_PRECISION, evaluate_exact
+from calc_history import HistoryStore
+
+OPERATORS = "+-*/^"
+
+# عباراتی که نتیجه تخمینی آن‌ها کوچک‌تر از این است همزمان ارزیابی می‌شوند
+CHEAP_BITS = 100000
+
+# سقف اندازه نتیجه در هر مسیر ارزیابی (کارگر، سرویس و ارزیابی دسته‌ای)
+MAX_RESULT_BITS = 4000000
+
+
+def estimate_size(expression):
+    """تخمین تعداد بیت‌های نتیجه؛ برای عبارت نامعتبر صفر (خطا فوراً گزارش می‌شود)"""
+    try:
+        node = parse(normalize(expression))
+    except Exception:
+        return 0.0
+    try:
+        return estimate_bits(node)
+    except (OverflowError, RecursionError):
+        return float('inf')
+
+
+def is_cheap(expression):
+    """آیا ارزیابی عبارت آن‌قدر سبک است که روی نخ رابط کاربری انجام شود؟"""
+    return estimate_size(expression) <= CHEAP_BITS
+
+
+# کسرهایی که بسط اعشاری متناهی طولانی‌تر از این دارند به صورت a/b نمایش داده می‌شوند
+MAX_FRACTION_DIGITS = 50
+
+
+def _fraction_text(value):
+    """بسط اعشاری دقیق کسر اگر متناهی و کوتاه باشد، وگرنه «صورت/مخرج»"""
+    denominator = value.denominator
+    twos = (denominator & -denominator).bit_length() - 1
+    rest = denominator >> twos
+    fives = 0
+    while rest % 5 == 0:
+        rest //= 5
+        fives += 1
+    digits = max(twos, fives)
+    if rest != 1 or digits > MAX_FRACTION_DIGITS:
+        return f"{value.numerator}/{denominator}"
+    scaled = abs(value.numerator) * 10 ** digits // denominator
+    whole, fraction = divmod(scaled, 10 ** digits)
+    sign = "-" if value < 0 else ""
+    return f"{sign}{whole}.{fraction:0{digits}d}"
+
+
+def _int_text(value):
+    """متن اعداد صحیح خیلی بزرگ؛ پایتون 3.11+ تبدیل بیش از 4300 رقم را محدود می‌کند"""
+    get_limit = getattr(sys, "get_int_max_str_digits", None)
+    if get_limit is None:
+        return str(value)
+    limit = get_limit()
+    sys.set_int_max_str_digits(0)
+    try:
+        return str(value)
+    finally:
+        sys.set_int_max_str_digits(limit)
+
+
+def format_result(value):
+    """تبدیل نتیجه به متن نمایشی با حذف صفرهای اضافه اعشار"""
+    if isinstance(value, Fraction):
+        return _fraction_text(value)
+    if isinstance(value, int):
+        return _int_text(value) if value.bit_length() > 14000 else str(value)
+    text = str(value)
+    if '.' in text and 'e' not in text.lower():
+        text = text.rstrip('0').rstrip('.')
+    return text
+
+
+def error_message(exc):
+    """متن خطای قابل نمایش برای یک استثنا"""
+    if isinstance(exc, InterruptedError):
+        return "محاسبه لغو شد"
+    if isinstance(exc, TimeoutError):
+        return "خطا: زمان محاسبه تمام شد"
+    if isinstance(exc, OverflowError):
+        return "خطا: نتیجه بیش از حد بزرگ است"
+    if isinstance(exc, ZeroDivisionError):
+        return "خطا: تقسیم بر صفر"
+    if isinstance(exc, ValueError):
+        return f"خطا: {str(exc)}"
+    return "خطا در محاسبه"
+
+
+# نام‌هایی که در ورودی تایپ‌شده یا چسبانده‌شده پذیرفته می‌شوند (x برای نمودار و حل معادله)
+INPUT_NAMES = tuple(sorted(set(FUNCTIONS) | set(CONSTANTS) | {'x'}))
+
+# نویسه‌های هم‌معنی در متن چسبانده‌شده
+INPUT_TRANSLATION = str.maketrans({"×": "*", "÷": "/", "−": "-", "–": "-", "\u00a0": " "})
+
+_WORD_TAIL = re.compile(r"[\w.]+$")
+
+
+def clean_input(text):
+    """یکسان‌سازی نویسه‌ها و فاصله‌های متن ورودی"""
+    return " ".join(text.translate(INPUT_TRANSLATION).split())
+
+
+def _name_tail(text):
+    """نام نیمه‌کاره انتهای ورودی؛ برای توان عدد علمی (مثل 2e) رشته خالی"""
+    m = _WORD_TAIL.search(text)
+    if m is None:
+        return ""
+    word = m.group()
+    pos = 0
+    last = None
+    while pos < len(word):
+        token = _TOKEN_RE.match(word, pos)
+        if token is None:
+            return ""
+        last = token
+        pos = token.end()
+    if last.lastgroup != 'name':
+        return ""
+    name = last.group('name')
+    if name in ('e', 'E') and last.start() > 0 and word[last.start() - 1].isdigit():
+        return ""
+    return name
+
+
+def scan_input(text, depth=0):
+    """اعتبارسنجی متن ورودی در یک گذر؛ تعداد پرانتزهای باز پس از آن را برمی‌گرداند
+
+    depth تعداد پرانتزهای باز پیش از متن است. نویسه یا نام ناشناخته و
+    پرانتز بسته بی‌جفت ValueError با موقعیت خطا می‌دهند. نام آخر متن
+    می‌تواند نیمه‌کاره باشد (ادامه آن بعداً تایپ می‌شود).
+    """
+    pos = 0
+    end = len(text)
+    match = _TOKEN_RE.match
+    while pos < end:
+        m = match(text, pos)
+        if m is None:
+            if text[pos:].isspace():
+                break
+            raise ValueError(f"invalid character '{text[pos]}' at {pos + 1}")
+        kind = m.lastgroup
+        value = m.group(kind)
+        if kind == 'op':
+            if value == '(':
+                depth += 1
+            elif value == ')':
+                if depth == 0:
+                    raise ValueError(f"unmatched ')' at {m.start(kind) + 1}")
+                depth -= 1
+        elif kind == 'name' and value not in INPUT_NAMES:
+            if m.end() < end or not any(name.startswith(value) for name in INPUT_NAMES):
+                raise ValueError(f"unknown name '{value}' at {m.start(kind) + 1}")
+        pos = m.end()
+    return depth
+
+
+class CalculatorEngine:
+    """حالت ورودی ماشین حساب مستقل از PyQt5"""
+
+    def __init__(self, history=None, stats=None):
+        # حالت دقیق: حساب گویا و Decimal با precision رقم معنادار
+        self.exact = False
+        self.precision = DEFAULT_PRECISION
+        self.current_input = ""
+        self.result = ""
+        self.history = history if history is not None else HistoryStore()
+        self.parentheses_count = 0
+        self.error = None
+        # calc_stats.EvaluationStats اختیاری؛ None یعنی بدون هیچ سربار پایش
+        self.stats = stats
+
+    def append_number(self, number):
+        self.current_input += number
+        return True
+
+    def append_operator(self, operator):
+        if self.current_input and self.current_input[-1] not in OPERATORS:
+            self.current_input += operator
+            return True
+        if operator == "-" and (not self.current_input or self.current_input[-1] in OPERATORS):
+            # اجازه دادن به اعداد منفی
+            self.current_input += operator
+            return True
+        return False
+
+    def append_function(self, func):
+        self.current_input += func
+        self.parentheses_count += 1
+        return True
+
+    def append_factorial(self):
+        if self.current_input and (self.current_input[-1].isdigit() or self.current_input[-1] == ')'):
+            self.current_input += "!"
+            return True
+        return False
+
+    def toggle_parentheses(self):
+        if "(" not in self.current_input or self.parentheses_count <= 0:
+            self.current_input += "("
+            self.parentheses_count += 1
+        else:
+            self.current_input += ")"
+            self.parentheses_count -= 1
+        return True
+
+    def insert(self, text):
+        """درج متن تایپ‌شده یا چسبانده‌شده پس از اعتبارسنجی؛ ValueError اگر معتبر نباشد"""
+        text = clean_input(text)
+        if not text:
+            return False
+        # ادامه نام نیمه‌کاره انتهای ورودی همراه با خودش بررسی می‌شود
+        prefix = _name_tail(self.current_input) if text[0].isalnum() or text[0] == "_" else ""
+        self.parentheses_count = scan_input(prefix + text, self.parentheses_count)
+        self.current_input += text
+        return True
+
+    def clear(self):
+        self.current_input = ""
+        self.result = ""
+        self.parentheses_count = 0
+        self.error = None
+
+    def backspace(self):
+        if not self.current_input:
+            return False
+
+        # مدیریت پرانتزها
+        if self.current_input[-1] == "(":
+            self.parentheses_count -= 1
+        elif self.current_input[-1] == ")":
+            self.parentheses_count += 1
+
+        self.current_input = self.current_input[:-1]
+        return True
+
+    def take_expression(self):
+        """بستن پرانتزهای باز و برگرداندن عبارت آماده ارزیابی (یا None)"""
+        if not self.current_input:
+            return None
+        if self.parentheses_count > 0:
+            self.current_input += ")" * self.parentheses_count
+            self.parentheses_count = 0
+        return self.current_input
+
+    def finish(self, expression, result):
+        """ثبت نتیجه متنی یک ارزیابی موفق"""
+        self.error = None
+        self.result = result
+        self.history.append(expression, self.result)
+        # کسر در ادامه عبارت باید یک عملوند بماند: (1/3)^2
+        self.current_input = f"({result})" if "/" in result else result
+        return self.result
+
+    def fail(self, exc):
+        """ثبت خطای یک ارزیابی و پاک کردن ورودی"""
+        self.error = error_message(exc)
+        self.current_input = ""
+        return self.error
+
+    def calculate(self):
+        """محاسبه ورودی فعلی؛ متن نمایشی را برمی‌گرداند یا None اگر ورودی خالی باشد
+
+        در صورت خطا متن خطا در self.error قرار می‌گیرد و ورودی پاک می‌شود.
+        """
+        expression = self.take_expression()
+        if expression is None:
+            return None
+
+        try:
+            if self.stats is None:
+                result = format_result(self.evaluate(expression))
+            else:
+                result = self.stats.evaluate(expression, self.exact, self.precision)
+        except Exception as exc:
+            return self.fail(exc)
+        return self.finish(expression, result)
+
+    def evaluate(self, expression):
+        """ارزیابی در حالت فعلی؛ حالت معمولی مستقیماً مسیر float است"""
+        if not self.exact:
+            return evaluate(expression)
+        return evaluate_exact(expression, precision=self.precision)
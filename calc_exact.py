@@ -0,0 +1,437 @@
+"""حالت دقیق: حساب گویا با Fraction و توابع متعالی با Decimal در دقت دلخواه
+
+نمایش هر زیرعبارت ارزان‌ترین نوع ممکن است: int، سپس Fraction و فقط در
+صورت نیاز (توابع متعالی، ریشه‌های گنگ، ثابت‌ها) Decimal. زیردرخت‌هایی که
+فقط از اعداد صحیح، جمع، ضرب، توان نامنفی و فاکتوریل ساخته شده‌اند با
+همان کامپایلر معمولی و عملگرهای بومی پایتون اجرا می‌شوند.
+"""
+import operator
+from decimal import Decimal, InvalidOperation, Overflow, getcontext, localcontext
+from fractions import Fraction
+from functools import lru_cache
+
+from calc_expr import canonical_source, compile_node, compile_tree, is_factorial, normalize, parse_canonical, phase
+from calc_factorial import factorial, range_product
+
+# تعداد ارقام معنادار پیش‌فرض برای نتایج Decimal
+DEFAULT_PRECISION = 28
+
+# ارقام محافظ برای محاسبات میانی توابع متعالی
+_GUARD = 5
+
+
+def _demote(value):
+    """Fraction با مخرج ۱ به int تبدیل می‌شود"""
+    if type(value) is Fraction and value.denominator == 1:
+        return value.numerator
+    return value
+
+
+def to_decimal(value):
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, Fraction):
+        return Decimal(value.numerator) / Decimal(value.denominator)
+    if isinstance(value, float):
+        return Decimal(repr(value))
+    return Decimal(value)
+
+
+def _coerce(a, b):
+    """int و Fraction با هم سازگارند؛ بقیه ترکیب‌ها به Decimal ارتقا می‌یابند"""
+    if isinstance(a, (int, Fraction)) and isinstance(b, (int, Fraction)):
+        return a, b
+    return to_decimal(a), to_decimal(b)
+
+
+def _binary(op):
+    def apply(a, b):
+        if type(a) is not type(b):
+            a, b = _coerce(a, b)
+        return _demote(op(a, b))
+    return apply
+
+
+def _divide(a, b):
+    if isinstance(a, int) and isinstance(b, int):
+        return _demote(Fraction(a, b))
+    if type(a) is not type(b):
+        a, b = _coerce(a, b)
+    return _demote(a / b)
+
+
+EXACT_OPERATORS = {
+    '+': _binary(operator.add),
+    '-': _binary(operator.sub),
+    '*': _binary(operator.mul),
+    '/': _divide,
+}
+
+
+# --- توابع متعالی در Decimal ---
+
+@lru_cache(maxsize=8)
+def _pi(precision):
+    """π با سری همگرای دستور العمل مستندات decimal"""
+    with localcontext() as ctx:
+        ctx.prec = precision + _GUARD
+        three = Decimal(3)
+        last, t, s, n, na, d, da = 0, three, 3, 1, 0, 0, 24
+        while s != last:
+            last = s
+            n, na = n + na, na + 8
+            d, da = d + da, da + 32
+            t = (t * n) / d
+            s += t
+    with localcontext() as ctx:
+        ctx.prec = precision
+        return +s
+
+
+@lru_cache(maxsize=8)
+def _e(precision):
+    with localcontext() as ctx:
+        ctx.prec = precision
+        return Decimal(1).exp()
+
+
+def _taylor(x, first, start):
+    """جمع سری تیلور sin (first=x, start=1) یا cos (first=1, start=0)"""
+    x2 = x * x
+    term = first
+    total = first
+    k = start
+    last = None
+    while total != last:
+        last = total
+        term = -term * x2 / ((k + 1) * (k + 2))
+        total += term
+        k += 2
+    return total
+
+
+def _trig(x, kind):
+    precision = getcontext().prec
+    with localcontext() as ctx:
+        ctx.prec = precision + _GUARD + len(str(abs(int(x))))
+        # کاهش آرگومان به بازه [-π, π]
+        two_pi = 2 * _pi(ctx.prec)
+        x = x - two_pi * (x / two_pi).to_integral_value()
+        if kind == 'sin':
+            value = _taylor(x, x, 1)
+        elif kind == 'cos':
+            value = _taylor(x, Decimal(1), 0)
+        else:
+            cosine = _taylor(x, Decimal(1), 0)
+            if not cosine:
+                raise ValueError("math domain error")
+            value = _taylor(x, x, 1) / cosine
+    return +value
+
+
+def _iroot(n, k):
+    """ریشه k ام صحیح (کف) یک عدد صحیح نامنفی با روش نیوتن"""
+    if n < 2:
+        return n
+    x = 1 << -(-n.bit_length() // k)
+    while True:
+        y = ((k - 1) * x + n // x ** (k - 1)) // k
+        if y >= x:
+            return x
+        x = y
+
+
+def _exact_root(value, k):
+    """ریشه k ام گویا اگر وجود داشته باشد، در غیر این صورت None"""
+    if value < 0 or k > 64:
+        return None
+    value = Fraction(value)
+    numerator = _iroot(value.numerator, k)
+    denominator = _iroot(value.denominator, k)
+    if numerator ** k == value.numerator and denominator ** k == value.denominator:
+        return _demote(Fraction(numerator, denominator))
+    return None
+
+
+def _power(base, exponent):
+    if isinstance(exponent, int):
+        if isinstance(base, int) and exponent < 0:
+            return _demote(Fraction(1, base ** -exponent))
+        return base ** exponent
+    if isinstance(exponent, Fraction) and isinstance(base, (int, Fraction)):
+        root = _exact_root(base, exponent.denominator)
+        if root is not None:
+            return _power(root, exponent.numerator)
+    base, exponent = to_decimal(base), to_decimal(exponent)
+    if base < 0 and exponent != exponent.to_integral_value():
+        raise ValueError("math domain error")
+    return base ** exponent
+
+
+def _sqrt(x):
+    if isinstance(x, (int, Fraction)):
+        root = _exact_root(x, 2)
+        if root is not None:
+            return root
+    x = to_decimal(x)
+    if x < 0:
+        raise ValueError("math domain error")
+    return x.sqrt()
+
+
+def _log(x):
+    x = to_decimal(x)
+    if x <= 0:
+        raise ValueError("math domain error")
+    return x.ln()
+
+
+def _ten_exponent(n):
+    """k اگر n برابر 10^k باشد، در غیر این صورت None"""
+    text = str(n)
+    if text[0] == "1" and not text[1:].strip("0"):
+        return len(text) - 1
+    return None
+
+
+def _log10(x):
+    if isinstance(x, (int, Fraction)) and x > 0:
+        # توان‌های صحیح ۱۰ نتیجه دقیق دارند
+        x = Fraction(x)
+        if x.denominator == 1 and _ten_exponent(x.numerator) is not None:
+            return _ten_exponent(x.numerator)
+        if x.numerator == 1 and _ten_exponent(x.denominator) is not None:
+            return -_ten_exponent(x.denominator)
+    x = to_decimal(x)
+    if x <= 0:
+        raise ValueError("math domain error")
+    return x.log10()
+
+
+# بیشترین دقت برای فاکتوریل غیرصحیح؛ هزینه اعداد برنولی با مربع دقت رشد می‌کند
+GAMMA_MAX_PRECISION = 2000
+
+# B_2، B_4، ... به صورت Fraction
+_BERNOULLI = []
+
+
+def _bernoulli(count):
+    """count عدد برنولی زوج اول از اعداد تانژانت (الگوریتم برنت و هاروی)"""
+    if len(_BERNOULLI) < count:
+        n = max(count, 2 * len(_BERNOULLI))
+        tangent = [0, 1] + [0] * (n - 1)
+        for k in range(2, n + 1):
+            tangent[k] = (k - 1) * tangent[k - 1]
+        for k in range(2, n + 1):
+            for j in range(k, n + 1):
+                tangent[j] = (j - k) * tangent[j - 1] + (j - k + 2) * tangent[j]
+        _BERNOULLI[:] = [Fraction((-1) ** (k - 1) * 2 * k * tangent[k], 4 ** k * (4 ** k - 1))
+                         for k in range(1, n + 1)]
+    return _BERNOULLI
+
+
+def _gamma(z):
+    """Γ(z) برای Decimal غیرصحیح در دقت زمینه فعلی
+
+    z تا دست‌کم دقت + ۱۰ بالا برده می‌شود و ln Γ با سری استرلینگ جمع
+    می‌شود؛ سپس Γ(z) = Γ(z + n) / (z (z + 1) ... (z + n - 1)).
+    """
+    precision = getcontext().prec
+    if precision > GAMMA_MAX_PRECISION + _GUARD:
+        raise ValueError(f"non-integer factorial in exact mode is limited to "
+                         f"{GAMMA_MAX_PRECISION} digits")
+    if z < Decimal("0.5"):
+        # بازتاب: Γ(z) Γ(1 - z) = π / sin(πz)
+        with localcontext() as ctx:
+            ctx.prec = precision + _GUARD
+            pi = _pi(ctx.prec)
+            value = pi / (_trig(pi * z, 'sin') * _gamma(1 - z))
+        return +value
+
+    shift = max(0, precision + 10 - int(z))
+    with localcontext() as ctx:
+        # ln Γ بزرگ است و خطای مطلق آن خطای نسبی نتیجه می‌شود
+        ctx.prec = precision + _GUARD + len(str(shift)) + 2 * len(str(int(z) + shift))
+        w = z + shift
+        total = (w - Decimal("0.5")) * w.ln() - w + (2 * _pi(ctx.prec)).ln() / 2
+        epsilon = Decimal(10) ** -(precision + _GUARD)
+        square = w * w
+        power = w
+        k = 0
+        while True:
+            if k == len(_BERNOULLI):
+                _bernoulli(max(2 * k, precision // 3 + 8))
+            b = _BERNOULLI[k]
+            k += 1
+            term = Decimal(b.numerator) / (b.denominator * 2 * k * (2 * k - 1)) / power
+            total += term
+            if abs(term) < epsilon:
+                break
+            power *= square
+        value = total.exp()
+        divisor = Decimal(1)
+        for i in range(shift):
+            divisor *= z + i
+        value /= divisor
+    return +value
+
+
+def _factorial(x):
+    if isinstance(x, float):
+        x = to_decimal(x)
+    if isinstance(x, Decimal) and x == x.to_integral_value():
+        x = int(x)
+    if isinstance(x, int):
+        return factorial(x)
+    # غیرصحیح: گامای Decimal در دقت خواسته‌شده، نه math.gamma اعشاری
+    with localcontext() as ctx:
+        ctx.prec += 2
+        z = to_decimal(x) + 1
+    return _gamma(z)
+
+
+EXACT_FUNCTIONS = {
+    'sqrt': _sqrt,
+    'sin': lambda x: _trig(to_decimal(x), 'sin'),
+    'cos': lambda x: _trig(to_decimal(x), 'cos'),
+    'tan': lambda x: _trig(to_decimal(x), 'tan'),
+    'log': _log,
+    'log10': _log10,
+    'factorial': _factorial,
+}
+
+EXACT_CONSTANTS = {
+    'pi': lambda: _pi(getcontext().prec),
+    'π': lambda: _pi(getcontext().prec),
+    'e': lambda: _e(getcontext().prec),
+}
+
+
+def is_integral(node):
+    """آیا زیردرخت فقط با اعداد صحیح و عملگرهای بسته روی آن‌ها ساخته شده است؟"""
+    kind = node[0]
+    if kind == 'num':
+        return isinstance(node[1], int)
+    if kind == 'neg':
+        return is_integral(node[1])
+    if kind == 'fact' or (kind == 'call' and node[1] == 'factorial'):
+        return is_integral(node[-1])
+    if kind == 'pow':
+        return is_integral(node[1]) and node[2][0] == 'num' and isinstance(node[2][1], int)
+    if kind == 'add':
+        return is_integral(node[1]) and all(is_integral(term) for _, term in node[2])
+    if kind == 'mul':
+        return (is_integral(node[1])
+                and all(op == '*' and is_integral(term) for op, term in node[2]))
+    return False
+
+
+def _exact_ratio(a, b):
+    """a! / b! دقیق بدون ساختن دو فاکتوریل بزرگ"""
+    if isinstance(a, int) and isinstance(b, int) and a >= 0 and b >= 0:
+        if a >= b:
+            return range_product(b + 1, a)
+        return Fraction(1, range_product(a + 1, b))
+    return _divide(_factorial(a), _factorial(b))
+
+
+def compile_exact_node(node):
+    """مانند compile_node ولی با حساب دقیق"""
+    if is_integral(node):
+        # مسیر بومی: نتیجه int است و هزینه اضافه‌ای ندارد
+        return compile_node(node)
+
+    kind = node[0]
+
+    if kind == 'num':
+        value = node[1]
+        if len(node) > 2:
+            # لیترال اعشاری دقیقاً همان چیزی است که تایپ شده (0.1 = 1/10)
+            value = _demote(Fraction(node[2]))
+        elif isinstance(value, float):
+            value = _demote(Fraction(repr(value)))
+        return lambda env: value
+
+    if kind == 'var':
+        name = node[1]
+        if name in EXACT_CONSTANTS:
+            return lambda env: EXACT_CONSTANTS[name]()
+        return compile_node(node)
+
+    if kind == 'neg':
+        operand = compile_exact_node(node[1])
+        return lambda env: -operand(env)
+
+    if kind == 'pow':
+        base = compile_exact_node(node[1])
+        exponent = compile_exact_node(node[2])
+        return lambda env: _power(base(env), exponent(env))
+
+    if kind == 'fact':
+        operand = compile_exact_node(node[1])
+        return lambda env: _factorial(operand(env))
+
+    if kind == 'call':
+        func = EXACT_FUNCTIONS[node[1]]
+        argument = compile_exact_node(node[2])
+        return lambda env: func(argument(env))
+
+    if kind == 'mul' and is_factorial(node[1]) and node[2][0][0] == '/' and is_factorial(node[2][0][1]):
+        numerator = compile_exact_node(node[1][-1])
+        denominator = compile_exact_node(node[2][0][1][-1])
+        ratio = lambda env: _exact_ratio(numerator(env), denominator(env))
+        if len(node[2]) == 1:
+            return ratio
+        return compile_exact_node(('mul', ('compiled', ratio), node[2][1:]))
+
+    if kind == 'compiled':
+        return node[1]
+
+    if kind in ('add', 'mul'):
+        first = compile_exact_node(node[1])
+        rest = tuple((EXACT_OPERATORS[op], compile_exact_node(operand)) for op, operand in node[2])
+
+        def chain(env):
+            acc = first(env)
+            for op, operand in rest:
+                acc = op(acc, operand(env))
+            return acc
+        return chain
+
+    raise SyntaxError(f"unknown node '{kind}'")
+
+
+@lru_cache(maxsize=1024)
+def _compile_canonical(source):
+    return compile_tree(phase('parse', parse_canonical, source), compile_exact_node, exact=True)
+
+
+@lru_cache(maxsize=1024)
+def _compile_normalized(source):
+    return _compile_canonical(phase('canonicalize', canonical_source, source))
+
+
+def compile_exact(source):
+    return _compile_normalized(normalize(source))
+
+
+def evaluate_exact(source, env=None, precision=DEFAULT_PRECISION):
+    """ارزیابی دقیق؛ نتیجه int، Fraction یا Decimal گردشده به precision رقم است"""
+    return run_exact(compile_exact(source), env, precision)
+
+
+def run_exact(func, env=None, precision=DEFAULT_PRECISION):
+    """اجرای تابع کامپایل‌شده حالت دقیق در زمینه Decimal با دقت precision"""
+    with localcontext() as ctx:
+        # محاسبات میانی با ارقام محافظ تا خطای گرد کردن به نتیجه نرسد
+        ctx.prec = precision + _GUARD
+        try:
+            value = func({} if env is None else env)
+        except InvalidOperation:
+            raise ValueError("math domain error") from None
+        except Overflow:
+            raise OverflowError("result too large") from None
+        if isinstance(value, Decimal):
+            ctx.prec = precision
+            value = +value
+    return value
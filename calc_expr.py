@@ -0,0 +1,628 @@
+"""تجزیه و کامپایل عبارات ریاضی ماشین حساب (بدون وابستگی به PyQt5)"""
+import re
+import operator
+from decimal import Decimal
+from fractions import Fraction
+from functools import lru_cache
+from math import sqrt, sin, cos, tan, log, log10, log2, lgamma, isfinite, pi, e
+from time import perf_counter
+
+from calc_factorial import factorial, factorial_ratio
+
+# توابع و ثابت‌های مجاز؛ همان مجموعه‌ای که قبلاً به eval داده می‌شد
+FUNCTIONS = {
+    'sqrt': sqrt,
+    'sin': sin,
+    'cos': cos,
+    'tan': tan,
+    'log': log,
+    'log10': log10,
+    'factorial': factorial,
+}
+
+CONSTANTS = {
+    'pi': pi,
+    'π': pi,
+    'e': e,
+}
+
+BINARY_OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+}
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<num>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+      | (?P<name>[A-Za-z_]\w*|π)
+      | (?P<op>\*\*|[-+*/^!()])
+    )
+""", re.VERBOSE)
+
+
+# مقصد زمان‌بندی مراحل کامپایل (دیکشنری نام مرحله ← ثانیه)؛ فقط وقتی
+# ابزار پایش calc_stats فعال است مقدار دارد و در غیر این صورت هزینه‌ای ندارد
+phase_sink = None
+
+
+def phase(name, func, *args):
+    """اجرای func و افزودن زمان آن به phase_sink اگر فعال باشد"""
+    sink = phase_sink
+    if sink is None:
+        return func(*args)
+    start = perf_counter()
+    try:
+        return func(*args)
+    finally:
+        sink[name] = sink.get(name, 0.0) + perf_counter() - start
+
+
+def normalize(source):
+    """یکسان‌سازی متن عبارت؛ کلید کش کامپایل همین متن است"""
+    source = source.replace("×", "*").replace("÷", "/")
+    return " ".join(source.split())
+
+
+def tokenize(source, start=0):
+    """تبدیل متن به لیست توکن‌ها به صورت (نوع، مقدار، شروع، پایان) در یک گذر خطی"""
+    tokens = []
+    pos = start
+    end = len(source)
+    match = _TOKEN_RE.match
+    while pos < end:
+        m = match(source, pos)
+        if m is None:
+            if source[pos:].isspace():
+                break
+            raise SyntaxError(f"invalid character '{source[pos]}'")
+        kind = m.lastgroup
+        value = m.group(kind)
+        if kind == 'op' and value == '**':
+            value = '^'
+        tokens.append((kind, value, m.start(kind), m.end()))
+        pos = m.end()
+    return tokens
+
+
+def parse_number(text):
+    """تبدیل لیترال عددی به int یا float مانند پایتون"""
+    if '.' in text or 'e' in text or 'E' in text:
+        return float(text)
+    return int(text)
+
+
+class Parser:
+    """پارسر اولویت‌دار که درخت عبارت را به صورت تاپل‌های تو در تو می‌سازد
+
+    گره‌ها:
+        ('num', value)            عدد
+        ('num', value, text)      لیترال اعشاری همراه متن تایپ‌شده برای حالت دقیق
+        ('var', name)             ثابت یا متغیر
+        ('neg', node)             منفی یکانی
+        ('pow', base, exponent)   توان (شرکت‌پذیر از راست)
+        ('fact', node)            فاکتوریل پسوندی
+        ('call', name, node)      فراخوانی تابع
+        ('add', first, ((op, node), ...))  زنجیره جمع و تفریق
+        ('mul', first, ((op, node), ...))  زنجیره ضرب و تقسیم
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return None
+
+    def take(self):
+        token = self.peek()
+        if token is None:
+            raise SyntaxError("unexpected end of expression")
+        self.pos += 1
+        return token
+
+    def expect(self, value):
+        token = self.take()
+        if token[1] != value or token[0] != 'op':
+            raise SyntaxError(f"expected '{value}'")
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            raise SyntaxError("empty expression")
+        node = self.parse_chain()
+        if self.peek() is not None:
+            raise SyntaxError(f"unexpected '{self.peek()[1]}'")
+        return node
+
+    def parse_chain(self):
+        # جمع و تفریق به صورت زنجیره تخت تا عبارات طولانی به بازگشت عمیق نرسند
+        first = self.parse_term()
+        rest = []
+        while True:
+            token = self.peek()
+            if token is None or token[0] != 'op' or token[1] not in '+-':
+                break
+            self.pos += 1
+            rest.append((token[1], self.parse_term()))
+        return ('add', first, tuple(rest)) if rest else first
+
+    def parse_term(self):
+        first = self.parse_unary()
+        rest = []
+        while True:
+            token = self.peek()
+            if token is None or token[0] != 'op' or token[1] not in '*/':
+                break
+            self.pos += 1
+            rest.append((token[1], self.parse_unary()))
+        return ('mul', first, tuple(rest)) if rest else first
+
+    def parse_unary(self):
+        token = self.peek()
+        if token is not None and token[0] == 'op' and token[1] in '+-':
+            self.pos += 1
+            operand = self.parse_unary()
+            return ('neg', operand) if token[1] == '-' else operand
+        return self.parse_power()
+
+    def parse_power(self):
+        base = self.parse_postfix()
+        token = self.peek()
+        if token is not None and token[0] == 'op' and token[1] == '^':
+            self.pos += 1
+            # مانند ** در پایتون: -2^2 برابر -4 و 2^-1 مجاز است
+            return ('pow', base, self.parse_unary())
+        return base
+
+    def parse_postfix(self):
+        node = self.parse_primary()
+        while True:
+            token = self.peek()
+            if token is None or token[0] != 'op' or token[1] != '!':
+                return node
+            self.pos += 1
+            node = ('fact', node)
+
+    def parse_primary(self):
+        kind, value, _, _ = self.take()
+        if kind == 'num':
+            number = parse_number(value)
+            if isinstance(number, float):
+                # float ارقام بیش از ۱۷ و توان‌های بزرگ را از دست می‌دهد
+                return ('num', number, value)
+            return ('num', number)
+        if kind == 'name':
+            token = self.peek()
+            if token is not None and token[0] == 'op' and token[1] == '(':
+                if value not in FUNCTIONS:
+                    raise NameError(f"name '{value}' is not defined")
+                self.pos += 1
+                argument = self.parse_chain()
+                self.expect(')')
+                return ('call', value, argument)
+            return ('var', value)
+        if value == '(':
+            node = self.parse_chain()
+            self.expect(')')
+            return node
+        raise SyntaxError(f"unexpected '{value}'")
+
+
+def parse(source):
+    """تجزیه متن به درخت عبارت"""
+    return Parser(tokenize(source)).parse()
+
+
+def is_factorial(node):
+    return node[0] == 'fact' or (node[0] == 'call' and node[1] == 'factorial')
+
+
+def compile_node(node):
+    """تبدیل درخت عبارت به یک تابع بسته (closure) که با env صدا زده می‌شود"""
+    kind = node[0]
+
+    if kind == 'num':
+        value = node[1]
+        return lambda env: value
+
+    if kind == 'var':
+        name = node[1]
+        if name in CONSTANTS:
+            value = CONSTANTS[name]
+            return lambda env: value
+
+        def load(env):
+            try:
+                return env[name]
+            except KeyError:
+                raise NameError(f"name '{name}' is not defined") from None
+        return load
+
+    if kind == 'neg':
+        operand = compile_node(node[1])
+        return lambda env: -operand(env)
+
+    if kind == 'pow':
+        base = compile_node(node[1])
+        exponent = compile_node(node[2])
+        return lambda env: base(env) ** exponent(env)
+
+    if kind == 'fact':
+        operand = compile_node(node[1])
+        return lambda env: factorial(operand(env))
+
+    if kind == 'call':
+        func = FUNCTIONS[node[1]]
+        argument = compile_node(node[2])
+        return lambda env: func(argument(env))
+
+    if kind == 'mul' and is_factorial(node[1]) and node[2][0][0] == '/' and is_factorial(node[2][0][1]):
+        # a! / b! بدون محاسبه دو فاکتوریل بزرگ
+        numerator = compile_node(node[1][-1])
+        denominator = compile_node(node[2][0][1][-1])
+        ratio = lambda env: factorial_ratio(numerator(env), denominator(env))
+        if len(node[2]) == 1:
+            return ratio
+        return compile_node(('mul', ('compiled', ratio), node[2][1:]))
+
+    if kind == 'compiled':
+        return node[1]
+
+    if kind in ('add', 'mul'):
+        first = compile_node(node[1])
+        rest = tuple((BINARY_OPERATORS[op], compile_node(operand)) for op, operand in node[2])
+        if len(rest) == 1:
+            (op, second), = rest
+            return lambda env: op(first(env), second(env))
+
+        def chain(env):
+            acc = first(env)
+            for op, operand in rest:
+                acc = op(acc, operand(env))
+            return acc
+        return chain
+
+    raise SyntaxError(f"unknown node '{kind}'")
+
+
+def canonical(source):
+    """متن استاندارد عبارت از روی توکن‌ها: فاصله‌ها، ** و شکل لیترال‌ها یکسان می‌شوند
+
+    ورودی‌های معادل مانند «2 * x**2» و «2*x^2.0» (با همان نوع عدد) یک کلید
+    کش مشترک پیدا می‌کنند.
+    """
+    return _canonical_text(tokenize(source))
+
+
+def _canonical_text(tokens):
+    parts = []
+    previous = None
+    for kind, value, _, _ in tokens:
+        if kind == 'num':
+            number = parse_number(value)
+            # شکل float فقط وقتی جایگزین می‌شود که همان مقدار دهدهی تایپ‌شده باشد؛
+            # در غیر این صورت حالت دقیق دو لیترال متفاوت را یکی می‌گرفت
+            if isinstance(number, int) or (isfinite(number) and Decimal(repr(number)) == Decimal(value)):
+                value = repr(number)
+        elif value == 'π':
+            value = 'pi'
+        if kind in ('num', 'name') and previous in ('num', 'name'):
+            parts.append(' ')
+        parts.append(value)
+        previous = kind
+    return ''.join(parts)
+
+
+class CanonicalSource(str):
+    """متن استاندارد که توکن‌های ورودی اصلی را تا اولین تجزیه همراه دارد
+
+    کش‌های کامپایل فقط متن را کلید می‌گیرند؛ با این توکن‌ها متن استاندارد
+    برای تجزیه دوباره توکن‌بندی نمی‌شود.
+    """
+
+
+def canonical_source(source):
+    """canonical(source) به صورت CanonicalSource"""
+    tokens = tokenize(source)
+    text = CanonicalSource(_canonical_text(tokens))
+    text.tokens = tokens
+    return text
+
+
+def parse_canonical(source):
+    """تجزیه متن استاندارد با توکن‌های همراه آن اگر هنوز مصرف نشده باشند"""
+    # توکن‌ها فقط یک بار لازم‌اند و کلید کش نباید آن‌ها را زنده نگه دارد
+    tokens = vars(source).pop('tokens', None) if isinstance(source, CanonicalSource) else None
+    if tokens is None:
+        return parse(source)
+    return Parser(tokens).parse()
+
+
+def _is_leaf(node):
+    return node[0] in ('num', 'var', 'compiled')
+
+
+def _is_folded(node):
+    """عدد، یا فاکتوریل یک عدد که عمداً تا نشده است"""
+    return node[0] == 'num' or (is_factorial(node) and node[-1][0] == 'num')
+
+
+def fold_constants(node, compile_fn=None, exact=False):
+    """محاسبه یک‌باره زیردرخت‌هایی که به هیچ متغیری وابسته نیستند
+
+    زیردرختی که در زمان کامپایل خطا بدهد دست‌نخورده می‌ماند تا خطا در
+    زمان ارزیابی گزارش شود. فاکتوریل به تنهایی تا نمی‌شود تا ادغام a!/b!
+    در زنجیره ضرب حفظ شود. در حالت دقیق (exact) فقط نتایج int و Fraction
+    جایگزین می‌شوند چون Decimal به دقت زمان اجرا وابسته است.
+    """
+    compile_fn = compile_fn or compile_node
+
+    def constant(candidate):
+        try:
+            value = compile_fn(candidate)({})
+        except Exception:
+            return None
+        if exact and not isinstance(value, (int, Fraction)):
+            return None
+        return ('num', value)
+
+    def fold(node):
+        kind = node[0]
+        if _is_leaf(node):
+            # در حالت دقیق ثابت‌های گنگ به دقت زمان اجرا بستگی دارند
+            if kind == 'var' and node[1] in CONSTANTS and not exact:
+                return constant(node) or node
+            return node
+        if kind in ('neg', 'fact'):
+            operand = fold(node[1])
+            node = (kind, operand)
+            if kind == 'neg' and operand[0] == 'num':
+                return constant(node) or node
+            return node
+        if kind == 'call':
+            argument = fold(node[2])
+            node = ('call', node[1], argument)
+            if argument[0] == 'num' and node[1] != 'factorial' and not exact:
+                return constant(node) or node
+            return node
+        if kind == 'pow':
+            node = ('pow', fold(node[1]), fold(node[2]))
+            if node[1][0] == 'num' and node[2][0] == 'num':
+                return constant(node) or node
+            return node
+
+        # زنجیره‌ها از چپ ارزیابی می‌شوند؛ فقط پیشوند ثابت بدون تغییر ترتیب تا می‌شود
+        first = fold(node[1])
+        rest = tuple((op, fold(operand)) for op, operand in node[2])
+        count = 0
+        if _is_folded(first):
+            while count < len(rest) and _is_folded(rest[count][1]):
+                count += 1
+        if count:
+            folded = constant((kind, first, rest[:count]))
+            if folded is not None:
+                if count == len(rest):
+                    return folded
+                return (kind, folded, rest[count:])
+        return (kind, first, rest)
+
+    return fold(node)
+
+
+def _children(node):
+    kind = node[0]
+    if kind in ('neg', 'fact'):
+        return (node[1],)
+    if kind == 'call':
+        return (node[2],)
+    if kind == 'pow':
+        return (node[1], node[2])
+    if kind in ('add', 'mul'):
+        return (node[1],) + tuple(operand for _, operand in node[2])
+    return ()
+
+
+def _node_key(node, keys, counts):
+    """کلید مقایسه زیردرخت‌ها که نوع لیترال‌ها را هم در بر دارد
+
+    ('num', 60) و ('num', 60.0) به عنوان تاپل برابرند ولی نتیجه یکسانی
+    ندارند. کلید هر گره غیربرگ در keys (بر اساس id) ذخیره و در counts
+    شمرده می‌شود.
+    """
+    kind = node[0]
+    if kind == 'num':
+        value = node[1]
+        # hex علامت صفر منفی را هم نگه می‌دارد؛ متن لیترال برای حالت دقیق
+        return ('num', type(value), value.hex() if type(value) is float else value, node[2:])
+    if _is_leaf(node):
+        return node
+    if kind in ('neg', 'fact'):
+        key = (kind, _node_key(node[1], keys, counts))
+    elif kind == 'call':
+        key = ('call', node[1], _node_key(node[2], keys, counts))
+    elif kind == 'pow':
+        key = ('pow', _node_key(node[1], keys, counts), _node_key(node[2], keys, counts))
+    else:
+        key = (kind, _node_key(node[1], keys, counts),
+               tuple((op, _node_key(operand, keys, counts)) for op, operand in node[2]))
+    keys[id(node)] = key
+    counts[key] = counts.get(key, 0) + 1
+    return key
+
+
+def eliminate_common(node):
+    """حذف زیرعبارت‌های مشترک
+
+    هر زیردرخت تکراری یک بار در متغیر موقت «#n» محاسبه می‌شود. خروجی
+    (bindings, body) است که bindings به ترتیب وابستگی مرتب شده است.
+    """
+    if _is_leaf(node):
+        return (), node
+    keys = {}
+    counts = {}
+    _node_key(node, keys, counts)
+    if len(counts) == len(keys):
+        # هیچ زیردرختی تکرار نشده است
+        return (), node
+
+    # زیردرخت‌های درون یک زیردرخت تکراری فقط یک بار شمرده می‌شوند تا
+    # همان زیردرخت بیرونی به متغیر تبدیل شود و ترتیب ارزیابی درون آن بماند
+    counts = {}
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if _is_leaf(current):
+            continue
+        key = keys[id(current)]
+        seen = counts.get(key, 0)
+        counts[key] = seen + 1
+        if not seen:
+            stack.extend(_children(current))
+
+    bindings = []
+    names = {}
+
+    def rewrite(current):
+        if _is_leaf(current):
+            return current
+        key = keys[id(current)]
+        name = names.get(key)
+        if name is not None:
+            return ('var', name)
+        kind = current[0]
+        if kind in ('neg', 'fact'):
+            rebuilt = (kind, rewrite(current[1]))
+        elif kind == 'call':
+            rebuilt = ('call', current[1], rewrite(current[2]))
+        elif kind == 'pow':
+            rebuilt = ('pow', rewrite(current[1]), rewrite(current[2]))
+        else:
+            rebuilt = (kind, rewrite(current[1]), tuple((op, rewrite(operand)) for op, operand in current[2]))
+        if counts[key] > 1:
+            name = names[key] = f"#{len(bindings)}"
+            bindings.append((name, rebuilt))
+            return ('var', name)
+        return rebuilt
+
+    body = rewrite(node)
+    return tuple(bindings), body
+
+
+def compile_tree(node, compile_fn=None, exact=False):
+    """بهینه‌سازی (تا کردن ثابت‌ها و حذف زیرعبارت مشترک) و کامپایل درخت"""
+    compile_fn = compile_fn or compile_node
+    bindings, body = phase('optimize', lambda: eliminate_common(fold_constants(node, compile_fn, exact)))
+    return phase('compile', _compile_program, bindings, body, compile_fn)
+
+
+def _compile_program(bindings, body, compile_fn):
+    body_fn = compile_fn(body)
+    if not bindings:
+        return body_fn
+    steps = tuple((name, compile_fn(value)) for name, value in bindings)
+
+    def run(env):
+        scope = dict(env)
+        for name, step in steps:
+            scope[name] = step(scope)
+        return body_fn(scope)
+    return run
+
+
+@lru_cache(maxsize=1024)
+def _compile_canonical(source):
+    return compile_tree(phase('parse', parse_canonical, source))
+
+
+@lru_cache(maxsize=1024)
+def _compile_normalized(source):
+    return _compile_canonical(phase('canonicalize', canonical_source, source))
+
+
+def compile_expression(source):
+    """کامپایل عبارت با کش LRU دو سطحی: متن یکسان‌شده و سپس شکل استاندارد"""
+    return _compile_normalized(normalize(source))
+
+
+def evaluate(source, env=None):
+    """ارزیابی عبارت؛ env نام‌های اضافی (متغیرها) را مقداردهی می‌کند"""
+    return compile_expression(source)({} if env is None else env)
+
+
+def estimate_bits(node, env=None):
+    """تخمین درشت تعداد بیت‌های نتیجه (log2 اندازه) برای تشخیص عبارات سنگین
+
+    مقدار برگشتی یک کران بالای تقریبی است و ممکن است inf باشد. نتایج
+    اعشاری حداکثر 1024 بیت دارند چون float زودتر سرریز می‌کند. env مقدار
+    متغیرهای صحیح را می‌دهد؛ بقیه متغیرها کوچک فرض می‌شوند.
+    """
+    return _estimate(node, env or {})[0]
+
+
+def _estimate(node, env):
+    """(تعداد بیت تخمینی، آیا نتیجه اعشاری است)"""
+    kind = node[0]
+    if kind == 'num':
+        value = abs(node[1])
+        if not isfinite(value) and len(node) > 2:
+            # لیترالی مانند 1e400: اندازه از توان دهدهی متن
+            return max(Decimal(node[2]).adjusted() * log2(10), 1.0) + 1, True
+        return (max(log2(value), 1.0) if value >= 1 else 1.0), isinstance(node[1], float)
+    if kind == 'var':
+        value = env.get(node[1])
+        if type(value) is int:
+            return _estimate(('num', value), env)
+        return 2.0, True
+    if kind == 'neg':
+        return _estimate(node[1], env)
+    if kind == 'add':
+        estimates = [_estimate(node[1], env)] + [_estimate(term, env) for _, term in node[2]]
+        return max(bits for bits, _ in estimates) + 1, any(is_float for _, is_float in estimates)
+    if kind == 'mul':
+        terms = node[2]
+        numerator, denominator = node[1][-1], terms[0][1][-1] if terms[0][0] == '/' else None
+        if (is_factorial(node[1]) and denominator is not None and is_factorial(terms[0][1])
+                and numerator[0] == 'num' and denominator[0] == 'num'):
+            # a! / b! فقط حاصل‌ضرب b+1 تا a را می‌سازد
+            bits = max((lgamma(numerator[1] + 1) - lgamma(denominator[1] + 1)) / log(2), 1.0)
+            is_float = True
+            terms = terms[1:]
+        else:
+            bits, is_float = _estimate(node[1], env)
+        for op, term in terms:
+            term_bits, term_float = _estimate(term, env)
+            if op == '*':
+                bits += term_bits
+                is_float = is_float or term_float
+            else:
+                # اندازه خارج‌قسمت از صورت بیشتر نیست ولی هزینه محاسبه صورت باقی است
+                bits = max(bits, term_bits)
+                is_float = True
+        return bits, is_float
+    if kind == 'pow':
+        base, base_float = _estimate(node[1], env)
+        exponent, exponent_float = _estimate(node[2], env)
+        if base_float or exponent_float or node[2][0] == 'neg':
+            # توان اعشاری یا منفی: نتیجه float است و سریع سرریز می‌کند
+            return max(min(base * 2.0 ** min(exponent, 1000.0), 1024.0), base, exponent), True
+        if exponent > 1000:
+            return float('inf'), False
+        return base * 2.0 ** exponent, False
+    if kind == 'fact' or (kind == 'call' and node[1] == 'factorial'):
+        argument, is_float = _estimate(node[-1], env)
+        if argument > 1000:
+            return float('inf'), is_float
+        if is_float:
+            # مسیر گاما ارزان است و بالاتر از 170 سرریز می‌کند
+            return max(argument, 64.0), True
+        # log2(n!) با lgamma
+        return lgamma(2.0 ** argument + 1) / log(2) + 1, False
+    if kind == 'call':
+        # خروجی توابع اعشاری است ولی هزینه آرگومان باقی می‌ماند
+        argument, _ = _estimate(node[2], env)
+        return max(argument, 64.0), True
+    return 64.0, True
@@ -0,0 +1,87 @@
+"""زیرسیستم فاکتوریل: جدول پیش‌محاسبه، کش نتایج بزرگ و توسعه گاما"""
+from collections import OrderedDict
+from math import factorial as _math_factorial, gamma, lgamma, exp, floor
+
+# n! دقیق برای n کوچک در زمان import محاسبه می‌شود
+TABLE_SIZE = 256
+_TABLE = [1]
+for _n in range(1, TABLE_SIZE + 1):
+    _TABLE.append(_TABLE[-1] * _n)
+del _n
+
+# بزرگ‌ترین n که n! در float جا می‌شود
+FLOAT_LIMIT = 170
+
+CACHE_SIZE = 16
+_recent = OrderedDict()
+
+
+def range_product(low, high):
+    """حاصل‌ضرب اعداد صحیح low تا high (شامل هر دو) با تقسیم دودویی"""
+    if low > high:
+        return 1
+    if high - low < 16:
+        result = low
+        for k in range(low + 1, high + 1):
+            result *= k
+        return result
+    mid = (low + high) // 2
+    return range_product(low, mid) * range_product(mid + 1, high)
+
+
+def _exact(n):
+    if n <= TABLE_SIZE:
+        return _TABLE[n]
+
+    if n in _recent:
+        _recent.move_to_end(n)
+        return _recent[n]
+
+    # استفاده از نزدیک‌ترین نتیجه کش‌شده کوچک‌تر اگر فاصله کم باشد
+    base = max((m for m in _recent if m < n), default=None)
+    if base is not None and n - base <= n // 16:
+        value = _recent[base] * range_product(base + 1, n)
+    else:
+        value = _math_factorial(n)
+
+    _recent[n] = value
+    if len(_recent) > CACHE_SIZE:
+        _recent.popitem(last=False)
+    return value
+
+
+def factorial(x):
+    """فاکتوریل با توسعه گاما برای آرگومان‌های غیرصحیح
+
+    اعداد صحیح همیشه دقیق محاسبه می‌شوند (هزینه آن‌ها را estimate_bits
+    می‌سنجد). آرگومان اعشاری حاصل gamma(x + 1) است و مانند بقیه حساب
+    اعشاری با OverflowError سرریز می‌کند.
+    """
+    if isinstance(x, int):
+        if x < 0:
+            raise ValueError("factorial() not defined for negative values")
+        return _exact(x)
+
+    x = float(x)
+    if x == floor(x):
+        if x < 0:
+            raise ValueError("factorial() not defined for negative values")
+        if x > FLOAT_LIMIT:
+            raise OverflowError("factorial result too large for a float")
+        return float(_TABLE[int(x)])
+    # gamma خودش با OverflowError سرریز را گزارش می‌کند
+    return gamma(x + 1)
+
+
+def factorial_ratio(a, b):
+    """a! / b! بدون ساختن دو عدد صحیح بزرگ؛ نتیجه مانند تقسیم معمولی اعشاری است"""
+    if isinstance(a, int) and isinstance(b, int) and a >= 0 and b >= 0:
+        if a >= b:
+            return range_product(b + 1, a) / 1
+        return 1 / range_product(a + 1, b)
+    if a > FLOAT_LIMIT or b > FLOAT_LIMIT:
+        # هر دو فاکتوریل سرریز می‌کنند ولی نسبت آن‌ها ممکن است در float جا شود
+        if a < 0 or b < 0:
+            raise OverflowError("factorial result too large for a float")
+        return exp(lgamma(a + 1) - lgamma(b + 1))
+    return factorial(a) / factorial(b)
@@ -0,0 +1,184 @@
+"""تاریخچه محاسبات: حافظه محدود، لاگ افزایشی روی دیسک و جست‌وجوی سریع"""
+import os
+import json
+from bisect import bisect_right
+from collections import deque
+
+
+class HistoryEntry:
+    """یک محاسبه ثبت‌شده"""
+
+    __slots__ = ('seq', 'expression', 'result', 'text')
+
+    def __init__(self, seq, expression, result):
+        self.seq = seq
+        self.expression = expression
+        self.result = result
+        self.text = f"{expression} = {result}"
+
+    def __str__(self):
+        return self.text
+
+
+class _Block:
+    """بلوکی از ورودی‌های پشت‌سرهم با متن یکپارچه برای جست‌وجو"""
+
+    __slots__ = ('entries', 'blob', 'starts')
+
+    def __init__(self):
+        self.entries = []
+        self.blob = None
+        self.starts = None
+
+    def index(self):
+        """ساخت تنبل متن کوچک‌شده بلوک (هر ورودی پس از یک خط جدید) و محل شروع ورودی‌ها"""
+        if self.blob is None:
+            texts = ["\n" + entry.text.lower() for entry in self.entries]
+            starts = []
+            position = 0
+            for text in texts:
+                starts.append(position)
+                position += len(text)
+            self.starts = starts
+            self.blob = "".join(texts)
+        return self.blob, self.starts
+
+
+class HistoryStore:
+    """تاریخچه با حافظه محدود
+
+    آخرین capacity محاسبه در بلوک‌های BLOCK_SIZE تایی نگه داشته می‌شوند و
+    با پر شدن ظرفیت قدیمی‌ترین‌ها کنار می‌روند. اگر path داده شود هر
+    محاسبه به انتهای فایل اضافه می‌شود و فایل فقط در اولین دسترسی خوانده
+    می‌شود. جست‌وجو روی متن یکپارچه هر بلوک با str.rfind انجام می‌شود.
+    """
+
+    BLOCK_SIZE = 1024
+
+    def __init__(self, path=None, capacity=100000):
+        self.path = path
+        self.capacity = capacity
+        self._loaded = path is None
+        self._blocks = deque()
+        # تعداد ورودی‌های کنارگذاشته‌شده از ابتدای اولین بلوک
+        self._head = 0
+        self._size = 0
+        self._next_seq = 0
+        self._log = None
+
+    # --- بارگذاری و ذخیره ---
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+
+        total = 0
+        recent = deque(maxlen=self.capacity)
+        with open(self.path, encoding="utf-8") as log:
+            for line in log:
+                total += 1
+                recent.append(line)
+        for line in recent:
+            try:
+                expression, result = json.loads(line)
+            except (ValueError, TypeError):
+                continue
+            self._add(expression, result)
+
+        # فشرده‌سازی لاگ وقتی خیلی بزرگ‌تر از ظرفیت شده است
+        if total > 2 * self.capacity:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as log:
+                log.writelines(recent)
+            os.replace(temp_path, self.path)
+
+    def _write(self, expression, result):
+        if self.path is None:
+            return
+        if self._log is None:
+            self._log = open(self.path, "a", encoding="utf-8")
+        self._log.write(json.dumps([expression, result], ensure_ascii=False) + "\n")
+        self._log.flush()
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    # --- بلوک‌ها ---
+
+    def _add(self, expression, result):
+        # متن یک خط است تا مرز ورودی‌ها در متن یکپارچه بلوک حفظ شود
+        entry = HistoryEntry(self._next_seq, expression.replace("\n", " "), result.replace("\n", " "))
+        self._next_seq += 1
+        if not self._blocks or len(self._blocks[-1].entries) >= self.BLOCK_SIZE:
+            self._blocks.append(_Block())
+        block = self._blocks[-1]
+        block.entries.append(entry)
+        block.blob = None
+        self._size += 1
+
+        if self._size > self.capacity:
+            self._size -= 1
+            self._head += 1
+            if self._head == len(self._blocks[0].entries):
+                self._blocks.popleft()
+                self._head = 0
+        return entry
+
+    # --- رابط عمومی ---
+
+    def append(self, expression, result):
+        self._ensure_loaded()
+        self._write(expression, result)
+        return self._add(expression, result)
+
+    def __len__(self):
+        self._ensure_loaded()
+        return self._size
+
+    def last(self):
+        self._ensure_loaded()
+        if not self._size:
+            return None
+        return self._blocks[-1].entries[-1]
+
+    def __iter__(self):
+        """ورودی‌ها از جدید به قدیم"""
+        self._ensure_loaded()
+        last = len(self._blocks) - 1
+        for number in range(last, -1, -1):
+            entries = self._blocks[number].entries
+            stop = self._head - 1 if number == 0 else -1
+            for position in range(len(entries) - 1, stop, -1):
+                yield entries[position]
+
+    def search(self, query, limit=20, prefix=False):
+        """جست‌وجوی زیررشته (یا پیشوند) در عبارت و نتیجه؛ جدیدترین‌ها اول"""
+        self._ensure_loaded()
+        needle = query.replace("\n", " ").lower()
+        if not needle:
+            return []
+        if prefix:
+            needle = "\n" + needle
+
+        results = []
+        for number in range(len(self._blocks) - 1, -1, -1):
+            block = self._blocks[number]
+            blob, starts = block.index()
+            first = self._head if number == 0 else 0
+            end = len(blob)
+            while True:
+                found = blob.rfind(needle, starts[first], end)
+                if found < 0:
+                    break
+                position = bisect_right(starts, found) - 1
+                results.append(block.entries[position])
+                if len(results) >= limit:
+                    return results
+                # ادامه از ورودی قبلی تا هر ورودی فقط یک بار گزارش شود
+                end = starts[position]
+        return results
@@ -0,0 +1,239 @@
+"""حل عددی معادله f(x) = 0 (برنت / نیوتن) و انتگرال معین تطبیقی گاوس-کرونرود"""
+import sys
+from math import copysign
+
+import numpy as np
+
+from calc_vector import evaluate_array
+
+EPSILON = sys.float_info.epsilon
+
+# گره‌ها و وزن‌های قاعده ۱۵ نقطه‌ای کرونرود و ۷ نقطه‌ای گاوس (مانند QUADPACK)
+_XGK = (0.991455371120812639206854697526329, 0.949107912342758524526189684047851,
+        0.864864423359769072789712788640926, 0.741531185599394439863864773280788,
+        0.586087235467691130294144845693013, 0.405845151377397166906606412076961,
+        0.207784955007898467600689403773245, 0.0)
+_WGK = (0.022935322010529224963732008058970, 0.063092092629978553290700663189204,
+        0.104790010322250183839876322541518, 0.140653259715525918745189590510238,
+        0.169004726639267902826583426598550, 0.190350578064785409913256402421014,
+        0.204432940075298892414161999234649, 0.209482141084727828012999174891714)
+_WG = (0.129484966168869693270611432679082, 0.279705391489276667901467771423780,
+       0.381830050505118944950369775488975, 0.417959183673469387755102040816327)
+
+_NODES = np.array([-x for x in _XGK[:7]] + [0.0] + list(_XGK[6::-1]))
+_KRONROD_WEIGHTS = np.array(_WGK[:7] + (_WGK[7],) + _WGK[6::-1])
+_GAUSS_WEIGHTS = np.zeros(15)
+_GAUSS_WEIGHTS[[1, 3, 5, 7, 9, 11, 13]] = _WG[:3] + (_WG[3],) + _WG[2::-1]
+
+
+class NumericResult:
+    """نتیجه یک محاسبه عددی همراه با تخمین خطا و تعداد ارزیابی تابع"""
+
+    __slots__ = ('value', 'error', 'evaluations', 'converged', 'method')
+
+    def __init__(self, value, error, evaluations, converged, method):
+        self.value = value
+        self.error = error
+        self.evaluations = evaluations
+        self.converged = converged
+        self.method = method
+
+
+class _Counted:
+    """تابع برداری همراه با شمارش نقاط ارزیابی‌شده"""
+
+    def __init__(self, func):
+        self.func = func
+        self.evaluations = 0
+
+    def __call__(self, xs):
+        xs = np.asarray(xs, dtype=float)
+        self.evaluations += xs.size
+        with np.errstate(all='ignore'):
+            ys = np.asarray(self.func(xs), dtype=float)
+        return np.broadcast_to(ys, xs.shape)
+
+    def scalar(self, x):
+        return float(self(x))
+
+
+def expression_function(source, variable='x'):
+    """تابع برداری f(xs) برای یک عبارت ماشین حساب"""
+    return lambda xs: evaluate_array(source, xs, variable)
+
+
+# --- انتگرال ---
+
+def _gauss_kronrod(func, lo, hi):
+    """انتگرال و تخمین خطای هر زیربازه؛ همه گره‌ها در یک فراخوانی برداری"""
+    center = (lo + hi) / 2
+    half = (hi - lo) / 2
+    ys = func(center[:, None] + half[:, None] * _NODES).reshape(len(lo), 15)
+    kronrod = half * (ys @ _KRONROD_WEIGHTS)
+    gauss = half * (ys @ _GAUSS_WEIGHTS)
+    error = np.abs(kronrod - gauss)
+    # مقیاس خطای QUADPACK: خطای |K - G| معمولاً بسیار بدبینانه است
+    mean = kronrod / np.where(half == 0, 1, 2 * half)
+    resasc = np.abs(half) * (np.abs(ys - mean[:, None]) @ _KRONROD_WEIGHTS)
+    with np.errstate(all='ignore'):
+        scaled = resasc * np.minimum(1.0, (200 * error / resasc) ** 1.5)
+    error = np.where((resasc > 0) & (error > 0), scaled, error)
+    return kronrod, error
+
+
+def integrate(func, a, b, abs_tol=1e-10, rel_tol=1e-10, max_evaluations=200000):
+    """انتگرال معین تطبیقی سراسری با قاعده گاوس-کرونرود ۷-۱۵
+
+    در هر دور همه زیربازه‌هایی که خطایشان از سهم خود از تلورانس (متناسب
+    با طول) بیشتر است یک‌جا نصف می‌شوند و گره‌های همه آن‌ها در یک فراخوانی
+    برداری ارزیابی می‌شوند.
+    """
+    func = _Counted(func)
+    if a == b:
+        return NumericResult(0.0, 0.0, 0, True, "gauss-kronrod")
+    sign = 1.0
+    if a > b:
+        a, b, sign = b, a, -1.0
+
+    lo = np.array([float(a)])
+    hi = np.array([float(b)])
+    values, errors = _gauss_kronrod(func, lo, hi)
+    converged = False
+    while True:
+        total = values.sum()
+        error = errors.sum()
+        tolerance = max(abs_tol, rel_tol * abs(total))
+        if error <= tolerance:
+            converged = True
+            break
+        if not np.isfinite(total) or not np.isfinite(error):
+            break
+
+        # زیربازه‌هایی که دیگر در دقت float قابل نصف شدن نیستند کنار گذاشته می‌شوند
+        splittable = (hi - lo) > 4 * EPSILON * np.maximum(np.abs(lo), np.abs(hi))
+        split = (errors > tolerance * (hi - lo) / (b - a)) & splittable
+        budget = (max_evaluations - func.evaluations) // 30
+        if budget <= 0 or not split.any():
+            break
+        if split.sum() > budget:
+            worst = np.argsort(errors * splittable)[::-1][:budget]
+            split = np.zeros_like(split)
+            split[worst] = True
+
+        mid = (lo[split] + hi[split]) / 2
+        new_lo = np.concatenate((lo[split], mid))
+        new_hi = np.concatenate((mid, hi[split]))
+        new_values, new_errors = _gauss_kronrod(func, new_lo, new_hi)
+        keep = ~split
+        lo = np.concatenate((lo[keep], new_lo))
+        hi = np.concatenate((hi[keep], new_hi))
+        values = np.concatenate((values[keep], new_values))
+        errors = np.concatenate((errors[keep], new_errors))
+
+    return NumericResult(sign * float(total), float(error), func.evaluations, converged, "gauss-kronrod")
+
+
+# --- ریشه ---
+
+def brent(func, a, b, fa, fb, tol=1e-12, max_iterations=200):
+    """روش برنت روی بازه‌ای که f در دو سر آن تغییر علامت می‌دهد
+
+    func تابع اسکالر است؛ (ریشه، نصف طول بازه نهایی) برمی‌گردد.
+    """
+    c, fc = a, fa
+    d = e = b - a
+    for _ in range(max_iterations):
+        if (fb > 0) == (fc > 0):
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+        tol1 = 2 * EPSILON * abs(b) + tol / 2
+        xm = (c - b) / 2
+        if abs(xm) <= tol1 or fb == 0:
+            return b, abs(xm), True
+        if abs(e) >= tol1 and abs(fa) > abs(fb):
+            # درون‌یابی معکوس (وتری یا درجه دو)
+            s = fb / fa
+            if a == c:
+                p = 2 * xm * s
+                q = 1 - s
+            else:
+                q = fa / fc
+                r = fb / fc
+                p = s * (2 * xm * q * (q - r) - (b - a) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0:
+                q = -q
+            p = abs(p)
+            if 2 * p < min(3 * xm * q - abs(tol1 * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = xm
+        else:
+            # دوبخشی
+            d = e = xm
+        a, fa = b, fb
+        b += d if abs(d) > tol1 else copysign(tol1, xm)
+        fb = func(b)
+    return b, abs(xm), False
+
+
+def newton(func, x0, tol=1e-12, max_iterations=50):
+    """روش نیوتن با مشتق عددی؛ f(x-h)، f(x) و f(x+h) در یک فراخوانی برداری"""
+    x = float(x0)
+    step = float('inf')
+    for _ in range(max_iterations):
+        h = 1e-6 * max(1.0, abs(x))
+        f_minus, f_x, f_plus = func(np.array([x - h, x, x + h]))
+        if f_x == 0:
+            return x, 0.0, True
+        slope = (f_plus - f_minus) / (2 * h)
+        if not np.isfinite(slope) or slope == 0 or not np.isfinite(f_x):
+            return x, step, False
+        step = abs(f_x / slope)
+        x -= f_x / slope
+        if step <= tol * max(1.0, abs(x)):
+            return x, step, True
+    return x, step, False
+
+
+def solve(func, a=None, b=None, x0=None, tol=1e-12, samples=64):
+    """یافتن ریشه f(x) = 0
+
+    با بازه [a, b]: تابع ابتدا در samples نقطه به صورت برداری نمونه‌برداری
+    می‌شود و روی اولین تغییر علامتی که قطب نباشد روش برنت اجرا می‌شود. اگر
+    تغییر علامتی نباشد (مثل ریشه مضاعف) نیوتن از نقطه با کمترین |f| شروع
+    می‌کند. فقط با x0 مستقیماً نیوتن اجرا می‌شود.
+    """
+    func = _Counted(func)
+    if a is None or b is None:
+        if x0 is None:
+            raise ValueError("an interval or a starting point is required")
+        x, error, converged = newton(func, x0, tol)
+        return NumericResult(x, error, func.evaluations, converged, "newton")
+
+    if a > b:
+        a, b = b, a
+    xs = np.linspace(a, b, samples + 1)
+    ys = func(xs)
+    finite = np.isfinite(ys)
+    zeros = np.flatnonzero(ys == 0)
+    if len(zeros):
+        return NumericResult(float(xs[zeros[0]]), 0.0, func.evaluations, True, "sampling")
+
+    changes = np.flatnonzero(finite[:-1] & finite[1:] & (np.sign(ys[:-1]) != np.sign(ys[1:])))
+    for index in changes:
+        fa, fb = float(ys[index]), float(ys[index + 1])
+        x, error, converged = brent(func.scalar, float(xs[index]), float(xs[index + 1]), fa, fb, tol)
+        # تغییر علامت در یک قطب (مثل tan) ریشه نیست
+        if abs(func.scalar(x)) <= max(abs(fa), abs(fb)):
+            return NumericResult(x, error, func.evaluations, converged, "brent")
+
+    if not finite.any():
+        return NumericResult(float('nan'), float('inf'), func.evaluations, False, "sampling")
+    start = xs[np.nanargmin(np.where(finite, np.abs(ys), np.nan))]
+    x, error, converged = newton(func, start, tol)
+    converged = converged and a <= x <= b
+    return NumericResult(x, error, func.evaluations, converged, "newton")
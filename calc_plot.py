@@ -0,0 +1,265 @@
+"""پنل رسم نمودار f(x) با نمونه‌برداری برداری و تطبیقی"""
+import numpy as np
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QLabel
+from PyQt5.QtCore import QPointF
+from PyQt5.QtGui import QPainter, QPainterPath, QPen, QColor
+
+from calc_vector import compile_vectorized
+
+
+class FunctionSampler:
+    """نمونه‌های کش‌شده یک تابع برداری روی یک بازه پیوسته از x
+
+    نمونه‌ها بین جابه‌جایی و بزرگ‌نمایی حفظ می‌شوند؛ فقط بازه‌های تازه
+    نمایان‌شده و بخش‌هایی که تراکم کافی ندارند دوباره محاسبه می‌شوند.
+    """
+
+    MAX_SAMPLES = 200000
+
+    def __init__(self, func, max_depth=10):
+        self.func = func
+        self.max_depth = max_depth
+        self.evaluations = 0
+        self.reset()
+
+    def reset(self):
+        self.xs = np.empty(0)
+        self.ys = np.empty(0)
+
+    def _evaluate(self, xs):
+        self.evaluations += len(xs)
+        with np.errstate(all='ignore'):
+            ys = np.asarray(self.func(xs), dtype=float)
+        return np.broadcast_to(ys, xs.shape)
+
+    def _merge(self, xs):
+        ys = self._evaluate(xs)
+        all_xs = np.concatenate((self.xs, xs))
+        order = np.argsort(all_xs, kind='mergesort')
+        self.xs = all_xs[order]
+        self.ys = np.concatenate((self.ys, ys))[order]
+
+    def _cover(self, x0, x1, step):
+        """اطمینان از پوشش بازه [x0, x1] با محاسبه فقط بخش‌های جدید"""
+        if len(self.xs):
+            lo, hi = self.xs[0], self.xs[-1]
+            # بازه دور از کش: نگه داشتن نمونه‌های قدیمی ارزشی ندارد
+            if x1 < lo - 4 * (x1 - x0) or x0 > hi + 4 * (x1 - x0) or len(self.xs) > self.MAX_SAMPLES:
+                self.reset()
+        if not len(self.xs):
+            count = max(2, int((x1 - x0) / step) + 1)
+            self._merge(np.linspace(x0, x1, count))
+            return
+
+        lo, hi = self.xs[0], self.xs[-1]
+        parts = []
+        if x0 < lo:
+            count = max(1, int((lo - x0) / step))
+            parts.append(np.linspace(x0, lo, count + 1)[:-1])
+        if x1 > hi:
+            count = max(1, int((x1 - hi) / step))
+            parts.append(np.linspace(hi, x1, count + 1)[1:])
+        if parts:
+            self._merge(np.concatenate(parts))
+
+    def _refine(self, x0, x1, step, y_tolerance):
+        """افزودن نقاط میانی فقط در جاهایی که انحنا یا ناپیوستگی دارند"""
+        min_step = step / 8
+        for _ in range(self.max_depth):
+            start = max(np.searchsorted(self.xs, x0) - 1, 0)
+            stop = min(np.searchsorted(self.xs, x1, side='right') + 1, len(self.xs))
+            xs = self.xs[start:stop]
+            ys = self.ys[start:stop]
+            if len(xs) < 3:
+                return
+
+            widths = np.diff(xs)
+            finite = np.isfinite(ys)
+            # بخش‌هایی که برای تراکم پیکسلی فعلی بیش از حد بلندند
+            refine = widths > 2 * step
+            # تغییر متناهی بودن (مثلاً log یا sqrt در مرز دامنه)
+            refine |= finite[:-1] != finite[1:]
+
+            # انحراف نقطه میانی از خط واصل همسایه‌ها
+            with np.errstate(all='ignore'):
+                t = (xs[1:-1] - xs[:-2]) / (xs[2:] - xs[:-2])
+                linear = ys[:-2] + t * (ys[2:] - ys[:-2])
+                bent = np.abs(ys[1:-1] - linear) > y_tolerance
+            bent &= finite[:-2] & finite[1:-1] & finite[2:]
+            refine[:-1] |= bent
+            refine[1:] |= bent
+
+            refine &= widths > min_step
+            if not refine.any():
+                return
+            self._merge(xs[:-1][refine] + widths[refine] / 2)
+
+    def samples(self, x0, x1, pixels, y_span):
+        """نمونه‌های بازه [x0, x1] برای عرض pixels و ارتفاع داده y_span"""
+        step = (x1 - x0) / max(pixels, 1)
+        self._cover(x0, x1, step)
+        tolerance = y_span / 500 if y_span > 0 and np.isfinite(y_span) else np.inf
+        self._refine(x0, x1, step, tolerance)
+
+        start = max(np.searchsorted(self.xs, x0) - 1, 0)
+        stop = min(np.searchsorted(self.xs, x1, side='right') + 1, len(self.xs))
+        return self.xs[start:stop], self.ys[start:stop]
+
+
+class PlotWidget(QWidget):
+    """رسم نمودار با یک QPainterPath و جابه‌جایی/بزرگ‌نمایی با ماوس"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumHeight(250)
+        self.sampler = None
+        self.x_range = (-10.0, 10.0)
+        self.y_range = (-10.0, 10.0)
+        self.curve_color = QColor("#4dabf7")
+        self.axis_color = QColor("#888")
+        self._drag_origin = None
+
+    def set_function(self, func):
+        self.sampler = FunctionSampler(func) if func is not None else None
+        if self.sampler is not None:
+            self.fit_y()
+        self.update()
+
+    def fit_y(self):
+        """تنظیم خودکار بازه y بر اساس صدک‌های نمونه‌های متناهی"""
+        x0, x1 = self.x_range
+        xs, ys = self.sampler.samples(x0, x1, self.width() or 400, np.inf)
+        finite = ys[np.isfinite(ys)]
+        if not len(finite):
+            return
+        low, high = np.percentile(finite, [2, 98])
+        if high - low < 1e-12:
+            low, high = low - 1, high + 1
+        margin = (high - low) * 0.1
+        self.y_range = (low - margin, high + margin)
+
+    def to_pixels(self, xs, ys):
+        x0, x1 = self.x_range
+        y0, y1 = self.y_range
+        px = (xs - x0) / (x1 - x0) * self.width()
+        py = (y1 - ys) / (y1 - y0) * self.height()
+        return px, py
+
+    def build_path(self):
+        """ساخت یک مسیر واحد؛ در نقاط نامتناهی یا پرش‌های بزرگ مسیر قطع می‌شود"""
+        path = QPainterPath()
+        x0, x1 = self.x_range
+        y0, y1 = self.y_range
+        xs, ys = self.sampler.samples(x0, x1, self.width(), y1 - y0)
+        px, py = self.to_pixels(xs, ys)
+
+        height = self.height()
+        finite = np.isfinite(py)
+        # محدود کردن مختصات تا Qt با اعداد خیلی بزرگ مشکل نداشته باشد
+        py = np.clip(np.where(finite, py, 0), -10 * height, 11 * height)
+        jumps = np.zeros(len(py), dtype=bool)
+        jumps[1:] = np.abs(np.diff(py)) > height
+
+        pen_down = False
+        for x, y, ok, jump in zip(px.tolist(), py.tolist(), finite.tolist(), jumps.tolist()):
+            if not ok:
+                pen_down = False
+                continue
+            if pen_down and not jump:
+                path.lineTo(x, y)
+            else:
+                path.moveTo(x, y)
+                pen_down = True
+        return path
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        # محورها
+        painter.setPen(QPen(self.axis_color, 1))
+        ox, oy = self.to_pixels(np.array([0.0]), np.array([0.0]))
+        painter.drawLine(QPointF(0, oy[0]), QPointF(self.width(), oy[0]))
+        painter.drawLine(QPointF(ox[0], 0), QPointF(ox[0], self.height()))
+
+        if self.sampler is not None:
+            painter.setPen(QPen(self.curve_color, 2))
+            painter.drawPath(self.build_path())
+        painter.end()
+
+    def mousePressEvent(self, event):
+        self._drag_origin = event.pos()
+
+    def mouseMoveEvent(self, event):
+        if self._drag_origin is None:
+            return
+        delta = event.pos() - self._drag_origin
+        self._drag_origin = event.pos()
+        x0, x1 = self.x_range
+        y0, y1 = self.y_range
+        dx = delta.x() / self.width() * (x1 - x0)
+        dy = delta.y() / self.height() * (y1 - y0)
+        self.x_range = (x0 - dx, x1 - dx)
+        self.y_range = (y0 + dy, y1 + dy)
+        self.update()
+
+    def mouseReleaseEvent(self, event):
+        self._drag_origin = None
+
+    def wheelEvent(self, event):
+        # بزرگ‌نمایی حول مکان ماوس
+        factor = 0.8 if event.angleDelta().y() > 0 else 1.25
+        x0, x1 = self.x_range
+        y0, y1 = self.y_range
+        cx = x0 + event.pos().x() / self.width() * (x1 - x0)
+        cy = y1 - event.pos().y() / self.height() * (y1 - y0)
+        self.x_range = (cx + (x0 - cx) * factor, cx + (x1 - cx) * factor)
+        self.y_range = (cy + (y0 - cy) * factor, cy + (y1 - cy) * factor)
+        self.update()
+
+
+class PlotPanel(QWidget):
+    """پنل نمودار: ورودی f(x) و ناحیه رسم"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        row = QHBoxLayout()
+        row.addWidget(QLabel("f(x) ="))
+        self.expression_input = QLineEdit()
+        self.expression_input.returnPressed.connect(self.plot)
+        row.addWidget(self.expression_input)
+        plot_btn = QPushButton("رسم")
+        plot_btn.clicked.connect(self.plot)
+        row.addWidget(plot_btn)
+        layout.addLayout(row)
+
+        self.error_label = QLabel()
+        self.error_label.setObjectName("errorLabel")
+        layout.addWidget(self.error_label)
+
+        self.plot_widget = PlotWidget()
+        layout.addWidget(self.plot_widget)
+
+    def set_expression(self, expression):
+        self.expression_input.setText(expression)
+        self.plot()
+
+    def plot(self):
+        expression = self.expression_input.text().strip()
+        self.error_label.setText("")
+        if not expression:
+            self.plot_widget.set_function(None)
+            return
+        try:
+            compiled = compile_vectorized(expression)
+            func = lambda xs: compiled({'x': xs})
+            with np.errstate(all='ignore'):
+                func(np.zeros(1))
+        except Exception as exc:
+            self.error_label.setText(f"خطا: {str(exc)}")
+            self.plot_widget.set_function(None)
+            return
+        self.plot_widget.set_function(func)
@@ -0,0 +1,200 @@
+"""ارزیابی افزایشی عبارت برای پیش‌نمایش زنده هنگام تایپ"""
+from bisect import bisect_left
+from math import lgamma, log
+
+from calc_expr import BINARY_OPERATORS, CONSTANTS, FUNCTIONS, parse_number, tokenize
+from calc_engine import CHEAP_BITS
+from calc_factorial import factorial
+
+# اولویت عملگرها؛ مطابق پارسر calc_expr
+_PRECEDENCE = {'+': 1, '-': 1, '*': 2, '/': 2, 'neg': 3, '^': 4}
+
+
+class PreviewUnavailable(Exception):
+    """عبارت برای پیش‌نمایش بیش از حد سنگین است"""
+
+
+class _State:
+    """وضعیت ارزیابی پس از مصرف یک توکن
+
+    پشته‌ها لیست‌های پیوندی تغییرناپذیر (head, tail) هستند تا ذخیره وضعیت
+    پس از هر توکن هزینه ثابت داشته باشد.
+    """
+
+    __slots__ = ('operands', 'operators', 'expect_operand', 'pending_call', 'error')
+
+    def __init__(self, operands=None, operators=None, expect_operand=True, pending_call=None, error=None):
+        self.operands = operands
+        self.operators = operators
+        self.expect_operand = expect_operand
+        self.pending_call = pending_call
+        self.error = error
+
+
+def _power(base, exponent):
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0:
+        if base.bit_length() * exponent > CHEAP_BITS:
+            raise PreviewUnavailable()
+    return base ** exponent
+
+
+def _factorial(value):
+    if isinstance(value, int) and value > 0:
+        # log2(n!) با lgamma؛ n بزرگ روی نخ رابط کاربری ساخته و قالب‌بندی نمی‌شود
+        if lgamma(value + 1) / log(2) > CHEAP_BITS:
+            raise PreviewUnavailable()
+    return factorial(value)
+
+
+def _apply(operator, operands):
+    """اعمال یک عملگر روی بالای پشته عملوندها"""
+    if operator == 'neg':
+        value, rest = operands
+        return (-value, rest)
+    right, (left, rest) = operands
+    if operator == '^':
+        return (_power(left, right), rest)
+    return (BINARY_OPERATORS[operator](left, right), rest)
+
+
+def _reduce_while(operands, operators, precedence, right_assoc=False):
+    while operators is not None:
+        top = operators[0]
+        if not isinstance(top, str) or top == '(':
+            break
+        top_precedence = _PRECEDENCE[top]
+        if top_precedence < precedence or (right_assoc and top_precedence == precedence):
+            break
+        operands = _apply(top, operands)
+        operators = operators[1]
+    return operands, operators
+
+
+def _close_group(operands, operators):
+    """کاهش تا پرانتز باز و اعمال تابع در صورت وجود"""
+    operands, operators = _reduce_while(operands, operators, 0)
+    if operators is None:
+        raise SyntaxError("unmatched ')'")
+    marker, operators = operators
+    if isinstance(marker, tuple):
+        value, rest = operands
+        operands = (FUNCTIONS[marker[1]](value), rest)
+    return operands, operators
+
+
+def _step(state, token):
+    """وضعیت جدید پس از یک توکن؛ خطاها در وضعیت ذخیره می‌شوند"""
+    if state.error is not None:
+        return state
+    kind, value, _, _ = token
+    operands, operators = state.operands, state.operators
+    try:
+        if state.pending_call is not None:
+            if kind != 'op' or value != '(':
+                raise SyntaxError("expected '('")
+            return _State(operands, (('call', state.pending_call), operators), True)
+
+        if state.expect_operand:
+            if kind == 'num':
+                return _State((parse_number(value), operands), operators, False)
+            if kind == 'name':
+                if value in FUNCTIONS:
+                    return _State(operands, operators, True, value)
+                if value in CONSTANTS:
+                    return _State((CONSTANTS[value], operands), operators, False)
+                raise NameError(f"name '{value}' is not defined")
+            if value == '(':
+                return _State(operands, ('(', operators), True)
+            if value == '-':
+                return _State(operands, ('neg', operators), True)
+            if value == '+':
+                return state
+            raise SyntaxError(f"unexpected '{value}'")
+
+        if kind != 'op' or value == '(':
+            raise SyntaxError(f"unexpected '{value}'")
+        if value == '!':
+            top, rest = operands
+            return _State((_factorial(top), rest), operators, False)
+        if value == ')':
+            operands, operators = _close_group(operands, operators)
+            return _State(operands, operators, False)
+
+        operands, operators = _reduce_while(operands, operators, _PRECEDENCE[value], value == '^')
+        return _State(operands, (value, operators), True)
+    except Exception as exc:
+        return _State(operands, operators, state.expect_operand, None, exc)
+
+
+def _finish(state):
+    """مقدار نهایی با بستن خودکار پرانتزهای باز؛ None اگر عبارت ناقص باشد"""
+    if state.error is not None or state.expect_operand:
+        return None
+    operands, operators = state.operands, state.operators
+    while True:
+        operands, operators = _reduce_while(operands, operators, 0)
+        if operators is None:
+            break
+        operands, operators = _close_group(operands, operators)
+    return operands[0]
+
+
+def _common_prefix(a, b):
+    """طول پیشوند مشترک؛ حالت رایج (افزودن یا حذف از انتها) در زمان ثابت نسبت به طول"""
+    if a.startswith(b):
+        return len(b)
+    if b.startswith(a):
+        return len(a)
+    low, high = 0, min(len(a), len(b))
+    # جست‌وجوی دودویی با مقایسه برش‌ها که در C انجام می‌شود
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[:mid] == b[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+class IncrementalEvaluator:
+    """ارزیابی افزایشی: توکن‌ها و وضعیت پشته‌ها پس از هر توکن نگه داشته می‌شوند
+
+    با تغییر متن فقط توکن‌های بعد از اولین اختلاف دوباره تجزیه و مصرف
+    می‌شوند؛ مقدار زیرعبارت‌های کامل پیشوند بدون تغییر در پشته عملوندها
+    باقی مانده و دوباره محاسبه نمی‌شوند.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._tokens = []
+        self._ends = []
+        self._states = [_State()]
+
+    def update(self, text):
+        """مقدار text را برمی‌گرداند یا None اگر عبارت ناقص، نامعتبر یا سنگین باشد"""
+        common = _common_prefix(text, self.text)
+
+        # توکنی که دقیقاً در مرز تمام می‌شود ممکن است ادامه پیدا کند (مثل 12 → 123)
+        keep = bisect_left(self._ends, common)
+        del self._tokens[keep:]
+        del self._ends[keep:]
+        del self._states[keep + 1:]
+        self.text = text
+
+        start = self._ends[-1] if self._ends else 0
+        try:
+            new_tokens = tokenize(text, start)
+        except SyntaxError:
+            return None
+
+        state = self._states[-1]
+        for token in new_tokens:
+            state = _step(state, token)
+            self._tokens.append(token)
+            self._ends.append(token[3])
+            self._states.append(state)
+
+        try:
+            return _finish(state)
+        except Exception:
+            return None
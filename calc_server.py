@@ -0,0 +1,408 @@
+"""سرویس محلی JSON-RPC 2.0 برای ارزیابی عبارات ماشین حساب
+
+پروتکل: هر پیام یک شیء (یا آرایه‌ای از اشیاء برای دسته) JSON در یک خط روی
+اتصال TCP است. نمونه:
+
+    {"jsonrpc": "2.0", "id": 1, "method": "evaluate", "params": {"expression": "2^10"}}
+    {"jsonrpc": "2.0", "id": 1, "result": "1024"}
+
+متدها:
+    evaluate(expression, exact=false, precision=28, timeout=...)
+    evaluate_many(expressions, exact=false, precision=28, timeout=...)
+    stats()
+"""
+import sys
+import json
+import asyncio
+import argparse
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from calc_engine import CHEAP_BITS, estimate_size, error_message
+from calc_exact import DEFAULT_PRECISION
+from calc_expr import canonical, normalize
+from calc_worker import MAX_RESULT_BITS, TIME_BUDGET, _evaluate_request, _serve
+
+# کدهای خطای JSON-RPC
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+EVALUATION_ERROR = -32000
+TIMEOUT_ERROR = -32001
+
+# حداکثر طول یک پیام (یک خط)
+MAX_MESSAGE = 16 * 1024 * 1024
+
+# نخ‌های آماده‌سازی و ارزیابی عبارات سبک بیرون از حلقه رویداد
+INLINE_THREADS = 4
+
+# حالت دقیق با دقت بیشتر از این به مخزن پردازه می‌رود؛ نخ inline را نمی‌شود
+# کشت و توابع متعالی Decimal با دقت بالا ثانیه‌ها طول می‌کشند
+INLINE_PRECISION = 100
+
+# بیشترین دقت پذیرفته‌شده برای حالت دقیق
+MAX_PRECISION = 10000
+
+
+class RPCError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def prepare(expression):
+    """همان قواعد دکمه «=»: پرانتزهای باز بسته می‌شوند"""
+    expression = normalize(expression)
+    missing = expression.count("(") - expression.count(")")
+    if missing > 0:
+        expression += ")" * missing
+    return expression
+
+
+class _Slot:
+    """یک پردازه کارگر گرم که با اتمام مهلت کشته و دوباره ساخته می‌شود"""
+
+    def __init__(self, context):
+        self.context = context
+        self.process = None
+        self.conn = None
+
+    def ensure(self):
+        if self.process is not None and self.process.is_alive():
+            return
+        parent_conn, child_conn = self.context.Pipe()
+        self.process = self.context.Process(target=_serve, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+
+    def kill(self):
+        if self.process is not None:
+            self.process.kill()
+            self.process.join()
+            self.process = None
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+class ProcessPool:
+    """مخزن پردازه‌های کارگر برای عبارات سنگین با مهلت هر درخواست
+
+    برخلاف ProcessPoolExecutor، درخواستی که مهلتش تمام شود واقعاً متوقف
+    می‌شود: پردازه آن کشته و در درخواست بعدی دوباره ساخته می‌شود.
+    """
+
+    def __init__(self, size, max_bits=MAX_RESULT_BITS):
+        self.size = size
+        self.max_bits = max_bits
+        self._context = multiprocessing.get_context("spawn")
+        self._slots = [_Slot(self._context) for _ in range(size)]
+        self._idle = None
+        # دریافت مسدودکننده از Pipe در نخ‌های جداگانه
+        self._receivers = ThreadPoolExecutor(max_workers=size)
+
+    async def evaluate(self, expression, precision, timeout):
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for slot in self._slots:
+                self._idle.put_nowait(slot)
+        loop = asyncio.get_running_loop()
+        # مهلت شامل انتظار برای یک پردازه آزاد هم هست
+        deadline = loop.time() + timeout
+        try:
+            slot = await asyncio.wait_for(self._idle.get(), timeout)
+        except asyncio.TimeoutError:
+            return ('error', TimeoutError("evaluation timed out"))
+        timeout = max(deadline - loop.time(), 0.001)
+        try:
+            slot.ensure()
+            slot.conn.send((expression, self.max_bits, precision))
+            receive = loop.run_in_executor(self._receivers, slot.conn.recv)
+            try:
+                return await asyncio.wait_for(receive, timeout)
+            except asyncio.TimeoutError:
+                slot.kill()
+                return ('error', TimeoutError("evaluation timed out"))
+            except (EOFError, OSError):
+                slot.kill()
+                return ('error', RuntimeError("worker process died"))
+        finally:
+            self._idle.put_nowait(slot)
+
+    def shutdown(self):
+        for slot in self._slots:
+            slot.kill()
+        self._receivers.shutdown(wait=False)
+
+
+class EvaluationService:
+    """ارزیابی با کش مشترک نتایج؛ عبارات سبک در نخ‌ها و سنگین در مخزن پردازه
+
+    حلقه رویداد فقط کش و صف‌ها را نگه می‌دارد؛ تجزیه، تخمین اندازه و
+    ارزیابی عبارات سبک در نخ‌های inline اجرا می‌شوند تا یک عبارت طولانی
+    بقیه اتصال‌ها را متوقف نکند. نخ را نمی‌شود کشت: با پایان مهلت پاسخ
+    خطای مهلت فرستاده می‌شود و محاسبه سبک در پس‌زمینه تمام می‌شود؛ پس
+    حالت دقیق با دقت بیش از INLINE_PRECISION هم به مخزن پردازه می‌رود.
+    """
+
+    def __init__(self, workers=2, timeout=TIME_BUDGET, cache_size=4096):
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.pool = ProcessPool(workers)
+        self._inline = ThreadPoolExecutor(max_workers=INLINE_THREADS)
+        self._cache = OrderedDict()
+        # درخواست‌های همزمان یکسان منتظر همان محاسبه می‌مانند
+        self._inflight = {}
+        self.counters = {'requests': 0, 'cache_hits': 0, 'inline': 0, 'pool': 0, 'timeouts': 0}
+
+    def _key(self, expression, precision):
+        try:
+            return (canonical(expression), precision)
+        except SyntaxError:
+            return (expression, precision)
+
+    def _prepare(self, expression, precision):
+        expression = prepare(expression)
+        return expression, self._key(expression, precision)
+
+    def _remember(self, key, outcome):
+        self._cache[key] = outcome
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def evaluate(self, expression, precision=None, timeout=None):
+        """('ok', متن نتیجه) یا ('error', استثنا)؛ precision=None یعنی حالت معمولی"""
+        self.counters['requests'] += 1
+        loop = asyncio.get_running_loop()
+        timeout = timeout or self.timeout
+        deadline = loop.time() + timeout
+        prepared = loop.run_in_executor(self._inline, self._prepare, expression, precision)
+        try:
+            expression, key = await asyncio.wait_for(prepared, timeout)
+        except asyncio.TimeoutError:
+            self.counters['timeouts'] += 1
+            return ('error', TimeoutError("evaluation timed out"))
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.counters['cache_hits'] += 1
+            return self._cache[key]
+        if key in self._inflight:
+            self.counters['cache_hits'] += 1
+            return await asyncio.shield(self._inflight[key])
+
+        future = loop.create_future()
+        self._inflight[key] = future
+        try:
+            outcome = await self._compute(expression, precision, max(deadline - loop.time(), 0.001))
+            if not isinstance(outcome[1], (TimeoutError, RuntimeError)):
+                self._remember(key, outcome)
+            future.set_result(outcome)
+            return outcome
+        except BaseException as exc:
+            future.set_exception(exc)
+            # جلوگیری از هشدار «استثنای بازیابی‌نشده» وقتی منتظر دیگری نیست
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _compute(self, expression, precision, timeout):
+        timeout = timeout or self.timeout
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        inline = loop.run_in_executor(self._inline, self._evaluate_inline, expression, precision)
+        try:
+            outcome = await asyncio.wait_for(inline, timeout)
+        except asyncio.TimeoutError:
+            outcome = ('error', TimeoutError("evaluation timed out"))
+        if outcome is not None:
+            self.counters['inline'] += 1
+        else:
+            self.counters['pool'] += 1
+            remaining = max(timeout - (loop.time() - started), 0.001)
+            outcome = await self.pool.evaluate(expression, precision, remaining)
+        if isinstance(outcome[1], TimeoutError):
+            self.counters['timeouts'] += 1
+        return outcome
+
+    def _evaluate_inline(self, expression, precision):
+        """نتیجه عبارت سبک یا None اگر باید به مخزن پردازه برود؛ در نخ inline"""
+        size = estimate_size(expression)
+        if size > self.pool.max_bits:
+            return ('error', OverflowError("result too large"))
+        if size > CHEAP_BITS or (precision is not None and precision > INLINE_PRECISION):
+            return None
+        return _evaluate_request(expression, self.pool.max_bits, precision)
+
+    def shutdown(self):
+        self.pool.shutdown()
+        self._inline.shutdown(wait=False)
+
+
+def _options(params):
+    if not isinstance(params, dict):
+        raise RPCError(INVALID_PARAMS, "params must be an object or array")
+    exact = params.get('exact', False)
+    precision = params.get('precision', DEFAULT_PRECISION)
+    timeout = params.get('timeout')
+    if not isinstance(precision, int) or not 1 <= precision <= MAX_PRECISION:
+        raise RPCError(INVALID_PARAMS, f"precision must be an integer between 1 and {MAX_PRECISION}")
+    if timeout is not None and (not isinstance(timeout, (int, float)) or timeout <= 0):
+        raise RPCError(INVALID_PARAMS, "timeout must be a positive number")
+    return (precision if exact else None), timeout
+
+
+def _raise_for(outcome):
+    status, payload = outcome
+    if status == 'ok':
+        return payload
+    if isinstance(payload, TimeoutError):
+        raise RPCError(TIMEOUT_ERROR, error_message(payload))
+    raise RPCError(EVALUATION_ERROR, error_message(payload))
+
+
+class RPCServer:
+    """پیاده‌سازی JSON-RPC 2.0 روی اتصال‌های خطی asyncio"""
+
+    def __init__(self, service):
+        self.service = service
+        self.methods = {
+            'evaluate': self.rpc_evaluate,
+            'evaluate_many': self.rpc_evaluate_many,
+            'stats': self.rpc_stats,
+        }
+
+    async def rpc_evaluate(self, params):
+        if isinstance(params, list):
+            params = {'expression': params[0]} if len(params) == 1 else None
+        expression = params.get('expression') if isinstance(params, dict) else None
+        if not isinstance(expression, str):
+            raise RPCError(INVALID_PARAMS, "expression must be a string")
+        precision, timeout = _options(params)
+        return _raise_for(await self.service.evaluate(expression, precision, timeout))
+
+    async def rpc_evaluate_many(self, params):
+        """نتیجه هر عبارت به صورت {"result": ...} یا {"error": ...} به ترتیب ورودی"""
+        if isinstance(params, list):
+            params = {'expressions': params}
+        expressions = params.get('expressions') if isinstance(params, dict) else None
+        if not isinstance(expressions, list) or not all(isinstance(item, str) for item in expressions):
+            raise RPCError(INVALID_PARAMS, "expressions must be a list of strings")
+        precision, timeout = _options(params)
+        outcomes = await asyncio.gather(*(self.service.evaluate(expression, precision, timeout)
+                                          for expression in expressions))
+        results = []
+        for status, payload in outcomes:
+            if status == 'ok':
+                results.append({'result': payload})
+            else:
+                results.append({'error': error_message(payload)})
+        return results
+
+    async def rpc_stats(self, params):
+        stats = dict(self.service.counters)
+        stats['cache_size'] = len(self.service._cache)
+        stats['workers'] = self.service.pool.size
+        return stats
+
+    async def handle_request(self, request):
+        """پاسخ یک درخواست؛ None برای اعلان (بدون id)"""
+        if (not isinstance(request, dict) or request.get('jsonrpc') != '2.0'
+                or not isinstance(request.get('method'), str)):
+            return _error_response(None, INVALID_REQUEST, "invalid request")
+        request_id = request.get('id')
+        method = self.methods.get(request['method'])
+        try:
+            if method is None:
+                raise RPCError(METHOD_NOT_FOUND, f"method '{request['method']}' not found")
+            result = await method(request.get('params', {}))
+        except RPCError as exc:
+            response = _error_response(request_id, exc.code, exc.message)
+        except Exception:
+            # خطای پیش‌بینی‌نشده نباید اتصال را بی‌پاسخ ببندد
+            response = _error_response(request_id, INTERNAL_ERROR, "internal error")
+        else:
+            response = {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+        return response if 'id' in request else None
+
+    async def handle_message(self, line):
+        try:
+            message = json.loads(line)
+        except ValueError:
+            return _error_response(None, PARSE_ERROR, "parse error")
+        if isinstance(message, list):
+            # دسته: درخواست‌ها همزمان اجرا و پاسخ‌ها با هم برگردانده می‌شوند
+            if not message:
+                return _error_response(None, INVALID_REQUEST, "empty batch")
+            responses = await asyncio.gather(*(self.handle_request(item) for item in message))
+            responses = [response for response in responses if response is not None]
+            return responses or None
+        return await self.handle_request(message)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    writer.write(_encode(_error_response(None, INVALID_REQUEST, "message too large")))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                response = await self.handle_message(line)
+                if response is not None:
+                    writer.write(_encode(response))
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+def _error_response(request_id, code, message):
+    return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': code, 'message': message}}
+
+
+def _encode(response):
+    return (json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+async def serve(host="127.0.0.1", port=8765, workers=2, timeout=TIME_BUDGET, cache_size=4096):
+    service = EvaluationService(workers, timeout, cache_size)
+    rpc = RPCServer(service)
+    server = await asyncio.start_server(rpc.handle_connection, host, port, limit=MAX_MESSAGE)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="سرویس JSON-RPC ارزیابی عبارات ماشین حساب")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="نشانی شنود (پیش‌فرض فقط محلی)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("-j", "--workers", type=int, default=2,
+                        help="تعداد پردازه‌ها برای عبارات سنگین")
+    parser.add_argument("--timeout", type=float, default=TIME_BUDGET,
+                        help="مهلت پیش‌فرض هر درخواست (ثانیه)")
+    parser.add_argument("--cache-size", type=int, default=4096,
+                        help="تعداد نتایج نگه‌داشته‌شده در کش مشترک")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.timeout, args.cache_size))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
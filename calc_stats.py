@@ -0,0 +1,201 @@
+"""پایش اختیاری ارزیابی‌ها: زمان هر مرحله، برخورد کش، شمارش خطاها و قلاب‌ها
+
+تا وقتی موتور شیء EvaluationStats نداشته باشد هیچ هزینه‌ای به مسیر ارزیابی
+اضافه نمی‌شود. زمان مراحل کامپایل فقط وقتی اندازه‌گیری می‌شود که کش کامپایل
+برخورد نکند؛ در برخورد کش این مراحل اصلاً اجرا نمی‌شوند.
+
+مراحل:
+    normalize     یکسان‌سازی فاصله‌ها
+    canonicalize  ساخت شکل استاندارد از توکن‌ها (جای بازنویسی متنی قدیمی !)
+    parse         تجزیه به درخت
+    optimize      تا کردن ثابت‌ها و حذف زیرعبارات تکراری
+    compile       ساخت تابع‌های بسته
+    evaluate      اجرا
+    format        تبدیل نتیجه به متن
+"""
+import json
+import time
+from collections import Counter, deque
+
+import calc_exact
+import calc_expr
+
+PHASES = ('normalize', 'canonicalize', 'parse', 'optimize', 'compile', 'evaluate', 'format')
+
+# وضعیت کش کامپایل برای هر ارزیابی
+CACHE_HIT = 'hit'              # متن یکسان‌شده در کش بود
+CACHE_CANONICAL = 'canonical'  # متن تازه بود ولی شکل استاندارد آن در کش بود
+CACHE_MISS = 'miss'
+CACHE_REMOTE = 'remote'        # در پردازه کارگر ارزیابی شد
+
+
+class EvaluationRecord:
+    """گزارش یک ارزیابی؛ به همه مشترکان قلاب داده می‌شود"""
+
+    __slots__ = ('expression', 'mode', 'phases', 'cache', 'error', 'message', 'result', 'total')
+
+    def __init__(self, expression, mode):
+        self.expression = expression
+        self.mode = mode
+        self.phases = {}
+        self.cache = None
+        self.error = None
+        self.message = None
+        self.result = None
+        self.total = 0.0
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class EvaluationStats:
+    """جمع آمار ارزیابی‌ها و پخش هر گزارش به قلاب‌های مشترک"""
+
+    def __init__(self, recent=100):
+        self._hooks = []
+        self.recent = deque(maxlen=recent)
+        self.reset()
+
+    def reset(self):
+        self.evaluations = 0
+        self.phase_totals = dict.fromkeys(PHASES, 0.0)
+        self.cache = Counter()
+        self.errors = Counter()
+        self.hook_errors = 0
+        self.total_time = 0.0
+        self.slowest = None
+        self.recent.clear()
+
+    def subscribe(self, callback):
+        """callback(record) پس از هر ارزیابی؛ تابع لغو اشتراک را برمی‌گرداند"""
+        self._hooks.append(callback)
+
+        def unsubscribe():
+            if callback in self._hooks:
+                self._hooks.remove(callback)
+        return unsubscribe
+
+    def record(self, record):
+        self.evaluations += 1
+        self.total_time += record.total
+        for name, seconds in record.phases.items():
+            self.phase_totals[name] = self.phase_totals.get(name, 0.0) + seconds
+        if record.cache is not None:
+            self.cache[record.cache] += 1
+        if record.error is not None:
+            self.errors[record.error] += 1
+        if self.slowest is None or record.total > self.slowest.total:
+            self.slowest = record
+        self.recent.append(record)
+        for callback in tuple(self._hooks):
+            try:
+                callback(record)
+            except Exception:
+                # خطای یک مشترک نباید ارزیابی را خراب کند
+                self.hook_errors += 1
+
+    def evaluate(self, expression, exact=False, precision=calc_exact.DEFAULT_PRECISION):
+        """مانند CalculatorEngine.evaluate + format_result همراه با ثبت گزارش
+
+        متن نتیجه را برمی‌گرداند؛ استثنا پس از ثبت دوباره پرتاب می‌شود.
+        """
+        from calc_engine import format_result
+
+        record = EvaluationRecord(expression, 'exact' if exact else 'float')
+        phases = record.phases
+        module = calc_exact if exact else calc_expr
+        previous = calc_expr.phase_sink
+        calc_expr.phase_sink = phases
+        started = time.perf_counter()
+        try:
+            text = calc_expr.phase('normalize', calc_expr.normalize, expression)
+            hits = module._compile_normalized.cache_info().hits
+            canonical_hits = module._compile_canonical.cache_info().hits
+            func = module._compile_normalized(text)
+            if module._compile_normalized.cache_info().hits > hits:
+                record.cache = CACHE_HIT
+            elif module._compile_canonical.cache_info().hits > canonical_hits:
+                record.cache = CACHE_CANONICAL
+            else:
+                record.cache = CACHE_MISS
+            if exact:
+                value = calc_expr.phase('evaluate', calc_exact.run_exact, func, None, precision)
+            else:
+                value = calc_expr.phase('evaluate', func, {})
+            record.result = calc_expr.phase('format', format_result, value)
+        except Exception as exc:
+            record.error = type(exc).__name__
+            record.message = str(exc)
+            raise
+        finally:
+            calc_expr.phase_sink = previous
+            record.total = time.perf_counter() - started
+            self.record(record)
+        return record.result
+
+    def record_remote(self, expression, seconds, result=None, exc=None, mode='float'):
+        """ثبت ارزیابی انجام‌شده در پردازه کارگر (فقط زمان کل از دید رابط کاربری)"""
+        record = EvaluationRecord(expression, mode)
+        record.cache = CACHE_REMOTE
+        record.total = seconds
+        record.result = result
+        if exc is not None:
+            record.error = type(exc).__name__
+            record.message = str(exc)
+        self.record(record)
+
+    def snapshot(self):
+        """آمار فعلی به صورت دیکشنری قابل تبدیل به JSON"""
+        count = self.evaluations
+        return {
+            'evaluations': count,
+            'total_seconds': self.total_time,
+            'mean_seconds': self.total_time / count if count else 0.0,
+            'phase_seconds': dict(self.phase_totals),
+            'cache': dict(self.cache),
+            'errors': dict(self.errors),
+            'hook_errors': self.hook_errors,
+            'slowest': _short(self.slowest.to_dict()) if self.slowest is not None else None,
+            'recent': [_short(record.to_dict()) for record in self.recent],
+        }
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as stats_file:
+            json.dump(self.snapshot(), stats_file, indent=2, ensure_ascii=False)
+
+    def report(self):
+        """خلاصه متنی برای پنل اشکال‌زدایی"""
+        snapshot = self.snapshot()
+        lines = [f"ارزیابی‌ها: {snapshot['evaluations']}    "
+                 f"میانگین: {snapshot['mean_seconds'] * 1e3:.3f} ms"]
+        lines.append("")
+        lines.append("زمان مراحل (ms):")
+        for name, seconds in snapshot['phase_seconds'].items():
+            lines.append(f"  {name:14} {seconds * 1e3:12.3f}")
+        lines.append("")
+        lines.append("کش: " + ", ".join(f"{key}={value}" for key, value in sorted(snapshot['cache'].items())))
+        lines.append("خطاها: " + (", ".join(f"{key}={value}" for key, value in self.errors.most_common())
+                                   or "-"))
+        if self.hook_errors:
+            lines.append(f"خطای قلاب‌ها: {self.hook_errors}")
+        if self.slowest is not None:
+            lines.append("")
+            lines.append(f"کندترین: {self.slowest.total * 1e3:.3f} ms  {_clip(self.slowest.expression)}")
+        lines.append("")
+        lines.append("اخیر:")
+        for record in reversed(self.recent):
+            status = record.error or record.cache
+            lines.append(f"  {record.total * 1e3:9.3f} ms  {status:9}  {_clip(record.expression)}")
+        return "\n".join(lines)
+
+
+def _clip(text, width=60):
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+
+def _short(record):
+    """عبارات و نتایج بسیار بلند در خروجی JSON کوتاه می‌شوند"""
+    for key in ('expression', 'result', 'message'):
+        if isinstance(record[key], str):
+            record[key] = _clip(record[key], 200)
+    return record
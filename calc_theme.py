@@ -0,0 +1,103 @@
+"""تم‌های ماشین حساب: یک شیوه‌نامه واحد برای کل برنامه
+
+ظاهر ویجت‌ها با objectName (مثل display) یا ویژگی پویای role دکمه‌ها
+انتخاب می‌شود و هیچ ویجتی شیوه‌نامه جداگانه ندارد. قواعد همه تم‌ها در
+همان یک شیوه‌نامه هستند و با ویژگی پویای theme از هم جدا می‌شوند؛ متن آن
+یک بار ساخته و برای هر برنامه یک بار نصب می‌شود. تعویض تم فقط پالت پنجره
+را عوض می‌کند و ویجت‌هایی را که ظاهرشان به تم وابسته است دوباره قالب‌بندی
+می‌کند، نه همه دکمه‌ها را.
+"""
+from functools import lru_cache
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QColor, QPalette
+
+# نقش دکمه‌ها ← (رنگ زمینه، رنگ متن)
+BUTTON_ROLES = {
+    'digit': ("#f8f9fa", "#333"),
+    'operator': ("#f0f0f0", "#333"),
+    'function': ("#e0e0e0", "#333"),
+    'clear': ("#ff6b6b", "white"),
+    'equal': ("#4dabf7", "white"),
+}
+
+THEMES = {
+    'light': {
+        'icon': "☀️",
+        'window': (240, 240, 240),
+        'base': (255, 255, 255),
+        'text': Qt.black,
+        'display': "black",
+        'history': "#888",
+    },
+    'dark': {
+        'icon': "🌙",
+        'window': (40, 40, 40),
+        'base': (25, 25, 25),
+        'text': Qt.white,
+        'display': "white",
+        'history': "#aaa",
+    },
+}
+
+
+def darken(color, amount=30):
+    """رنگ #rrggbb تیره‌تر برای حالت فشرده دکمه"""
+    if not color.startswith("#"):
+        return color
+    r, g, b = (max(0, int(color[i:i + 2], 16) - amount) for i in (1, 3, 5))
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+@lru_cache(maxsize=None)
+def stylesheet():
+    rules = [
+        "QLineEdit#display { font-size: 32px; border: none; background: transparent; }",
+        "QLabel#historyLabel { font-size: 14px; }",
+        "QLabel#previewLabel { color: #888; font-size: 18px; }",
+        "QLabel#errorLabel { color: #ff6b6b; }",
+        "QPlainTextEdit#statsReport { font-family: monospace; font-size: 12px; }",
+    ]
+    for name, colors in THEMES.items():
+        rules.append(f'QLineEdit#display[theme="{name}"] {{ color: {colors["display"]}; }}')
+        rules.append(f'QLabel#historyLabel[theme="{name}"] {{ color: {colors["history"]}; }}')
+    for role, (background, text) in BUTTON_ROLES.items():
+        rules.append(
+            f'QPushButton[role="{role}"] {{ background-color: {background}; color: {text}; '
+            "border: none; border-radius: 10px; font-size: 20px; padding: 15px; margin: 3px; }")
+        rules.append(f'QPushButton[role="{role}"]:pressed {{ background-color: {darken(background)}; }}')
+    return "\n".join(rules)
+
+
+def install(app):
+    """نصب شیوه‌نامه روی برنامه؛ اگر قبلاً نصب شده باشد کاری نمی‌کند"""
+    sheet = stylesheet()
+    if app.styleSheet() != sheet:
+        app.setStyleSheet(sheet)
+
+
+@lru_cache(maxsize=None)
+def palette(name):
+    colors = THEMES[name]
+    result = QPalette()
+    result.setColor(QPalette.Window, QColor(*colors['window']))
+    result.setColor(QPalette.WindowText, colors['text'])
+    result.setColor(QPalette.Base, QColor(*colors['base']))
+    result.setColor(QPalette.Text, colors['text'])
+    result.setColor(QPalette.ButtonText, colors['text'])
+    return result
+
+
+def icon(name):
+    return THEMES[name]['icon']
+
+
+def apply_theme(window, name, widgets=()):
+    """پالت پنجره را به تم name تغییر می‌دهد و ویجت‌های وابسته به تم را به‌روز می‌کند"""
+    window.setPalette(palette(name))
+    for widget in widgets:
+        widget.setProperty("theme", name)
+        # قواعد ویژگی‌های پویا فقط با قالب‌بندی دوباره اعمال می‌شوند
+        style = widget.style()
+        style.unpolish(widget)
+        style.polish(widget)
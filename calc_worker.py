@@ -0,0 +1,134 @@
+"""ارزیابی عبارات سنگین در پردازه جداگانه با امکان لغو و محدودیت زمان و اندازه"""
+import time
+import multiprocessing
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from calc_engine import MAX_RESULT_BITS, format_result
+from calc_exact import evaluate_exact
+from calc_expr import evaluate
+
+# بودجه‌های پیش‌فرض
+TIME_BUDGET = 10.0
+
+
+def _evaluate_request(expression, max_bits, precision=None):
+    """precision برای حالت دقیق است؛ None یعنی مسیر معمولی float"""
+    try:
+        if precision is None:
+            value = evaluate(expression)
+        else:
+            value = evaluate_exact(expression, precision=precision)
+        if isinstance(value, int) and value.bit_length() > max_bits:
+            raise OverflowError("result too large")
+        return ('ok', format_result(value))
+    except Exception as exc:
+        return ('error', exc)
+
+
+def _serve(conn):
+    """حلقه پردازه کارگر: دریافت عبارت و ارسال نتیجه متنی"""
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        status, payload = _evaluate_request(*request)
+        try:
+            conn.send((status, payload))
+        except Exception:
+            # استثناهایی که pickle نمی‌شوند
+            conn.send(('error', RuntimeError(str(payload))))
+
+
+class EvaluationWorker(QObject):
+    """اجرای ارزیابی خارج از حلقه رویداد Qt
+
+    یک پردازه گرم نگه داشته می‌شود؛ با لغو یا پایان بودجه زمانی پردازه
+    کشته می‌شود و در درخواست بعدی دوباره ساخته می‌شود.
+    """
+
+    finished = pyqtSignal(str, str)
+    failed = pyqtSignal(str, object)
+    progress = pyqtSignal(float)
+
+    def __init__(self, time_budget=TIME_BUDGET, max_bits=MAX_RESULT_BITS, parent=None):
+        super().__init__(parent)
+        self.time_budget = time_budget
+        self.max_bits = max_bits
+        self._context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._conn = None
+        self._expression = None
+        self._started = 0.0
+        self._timer = QTimer(self)
+        self._timer.setInterval(20)
+        self._timer.timeout.connect(self._poll)
+
+    def is_busy(self):
+        return self._expression is not None
+
+    def _ensure_process(self):
+        if self._process is not None and self._process.is_alive():
+            return
+        parent_conn, child_conn = self._context.Pipe()
+        self._process = self._context.Process(target=_serve, args=(child_conn,), daemon=True)
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+
+    def submit(self, expression, precision=None):
+        if self.is_busy():
+            raise RuntimeError("evaluation already running")
+        self._ensure_process()
+        self._expression = expression
+        self._started = time.monotonic()
+        self._conn.send((expression, self.max_bits, precision))
+        self._timer.start()
+
+    def cancel(self):
+        """لغو ارزیابی جاری با کشتن پردازه کارگر"""
+        if not self.is_busy():
+            return
+        self._abort(InterruptedError("evaluation cancelled"))
+
+    def shutdown(self):
+        self._timer.stop()
+        self._expression = None
+        if self._process is not None:
+            self._process.kill()
+            self._process.join()
+            self._process = None
+
+    def _abort(self, exc):
+        expression = self._expression
+        self.shutdown()
+        self.failed.emit(expression, exc)
+
+    def _poll(self):
+        elapsed = time.monotonic() - self._started
+        try:
+            ready = self._conn.poll()
+        except (EOFError, OSError):
+            self._abort(RuntimeError("worker process died"))
+            return
+
+        if ready:
+            try:
+                status, payload = self._conn.recv()
+            except (EOFError, OSError):
+                self._abort(RuntimeError("worker process died"))
+                return
+            expression = self._expression
+            self._expression = None
+            self._timer.stop()
+            if status == 'ok':
+                self.finished.emit(expression, payload)
+            else:
+                self.failed.emit(expression, payload)
+        elif elapsed > self.time_budget:
+            self._abort(TimeoutError("evaluation timed out"))
+        else:
+            self.progress.emit(elapsed / self.time_budget)
@@ -0,0 +1,276 @@
+"""کاربرگ چندخطی با متغیرها و محاسبه مجدد بر اساس گراف وابستگی
+
+کاربرگ روی رشته رابط کاربری ارزیابی می‌شود؛ خطی که تخمین اندازه نتیجه
+آن (با مقدار متغیرهای صحیح) از CHEAP_BITS بیشتر باشد اجرا نمی‌شود و مانند
+مسیر اصلی خطای «نتیجه بیش از حد بزرگ» می‌گیرد.
+"""
+import re
+
+from calc_expr import CONSTANTS, FUNCTIONS, compile_expression, estimate_bits, normalize, parse
+from calc_engine import CHEAP_BITS, format_result, error_message
+
+_ASSIGNMENT_RE = re.compile(r"^\s*([A-Za-z_]\w*)\s*=(?!=)(.*)$")
+
+
+def referenced_names(node):
+    """نام متغیرهای به‌کاررفته در درخت عبارت (بدون ثابت‌ها)"""
+    names = set()
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        kind = node[0]
+        if kind == 'var':
+            if node[1] not in CONSTANTS:
+                names.add(node[1])
+        elif kind in ('neg', 'fact'):
+            stack.append(node[1])
+        elif kind == 'call':
+            stack.append(node[2])
+        elif kind == 'pow':
+            stack.append(node[1])
+            stack.append(node[2])
+        elif kind in ('add', 'mul'):
+            stack.append(node[1])
+            stack.extend(operand for _, operand in node[2])
+    return names
+
+
+def is_heavy(node, env=None):
+    """آیا ارزیابی این درخت با مقادیر env برای رشته رابط کاربری سنگین است؟"""
+    try:
+        return estimate_bits(node, env) > CHEAP_BITS
+    except (OverflowError, RecursionError):
+        return True
+
+
+class WorksheetLine:
+    """یک خط کاربرگ: «نام = عبارت» یا فقط «عبارت»"""
+
+    __slots__ = ('source', 'name', 'expression', 'node', 'compiled', 'names',
+                 'bindings', 'value', 'error', 'parse_error')
+
+    def __init__(self, source):
+        self.source = source
+        self.name = None
+        self.expression = ""
+        self.node = None
+        self.compiled = None
+        self.names = set()
+        self.bindings = {}
+        self.value = None
+        self.error = None
+        self.parse_error = None
+        self.parse()
+
+    def parse(self):
+        self.name = None
+        self.node = None
+        self.compiled = None
+        self.names = set()
+        self.parse_error = None
+        text = self.source
+        match = _ASSIGNMENT_RE.match(text)
+        if match:
+            name = match.group(1)
+            if name in FUNCTIONS or name in CONSTANTS:
+                self.parse_error = SyntaxError(f"cannot assign to '{name}'")
+                return
+            self.name = name
+            text = match.group(2)
+        self.expression = text.strip()
+        if not self.expression:
+            return
+        try:
+            self.node = parse(normalize(self.expression))
+            self.names = referenced_names(self.node)
+            # کامپایل زیردرخت‌های ثابت را همین‌جا محاسبه می‌کند
+            if is_heavy(self.node):
+                raise OverflowError("result too large")
+            self.compiled = compile_expression(self.expression)
+        except Exception as exc:
+            self.parse_error = exc
+
+    def display(self):
+        """متن نتیجه برای نمایش کنار خط"""
+        if isinstance(self.error, NameError):
+            return f"خطا: {str(self.error)}"
+        if self.error is not None:
+            return error_message(self.error)
+        if self.value is None:
+            return ""
+        try:
+            return format_result(self.value)
+        except Exception as exc:
+            return error_message(exc)
+
+
+class Worksheet:
+    """مجموعه خطوط با وابستگی‌های بین نام‌ها
+
+    هر خط به نزدیک‌ترین تعریف قبلی هر نام وابسته است. با تغییر یک خط فقط
+    همان خط و خطوط پایین‌دستی آن دوباره ارزیابی می‌شوند.
+    """
+
+    def __init__(self):
+        self.lines = []
+        # نام ← خطوطی که آن نام را تعریف می‌کنند / به کار می‌برند
+        self._definitions = {}
+        self._users = {}
+        # خط ← خطوطی که مستقیماً به آن وابسته‌اند
+        self._dependents = {}
+        self.evaluations = 0
+
+    # --- ویرایش ---
+
+    def set_text(self, text):
+        """اعمال کل متن کاربرگ؛ فقط بازه خطوط تغییرکرده جایگزین می‌شود"""
+        new = text.split("\n")
+        old = [line.source for line in self.lines]
+        start = 0
+        while start < min(len(old), len(new)) and old[start] == new[start]:
+            start += 1
+        end_old, end_new = len(old), len(new)
+        while end_old > start and end_new > start and old[end_old - 1] == new[end_new - 1]:
+            end_old -= 1
+            end_new -= 1
+
+        changed = []
+        # خطوطی که هم در متن قدیم و هم جدید هستند درجا ویرایش می‌شوند
+        common = min(end_old - start, end_new - start)
+        for offset in range(common):
+            changed.append(self._replace(start + offset, new[start + offset]))
+        for index in range(start + common, end_old)[::-1]:
+            changed.extend(self._remove(index))
+        for index in range(start + common, end_new):
+            changed.append(self._insert(index, new[index]))
+        self._recompute(changed)
+
+    def set_line(self, index, source):
+        self._recompute([self._replace(index, source)])
+
+    def insert_line(self, index, source):
+        self._recompute([self._insert(index, source)])
+
+    def remove_line(self, index):
+        self._recompute(self._remove(index))
+
+    def values(self):
+        """مقادیر نهایی هر نام (آخرین تعریف)"""
+        result = {}
+        for line in self.lines:
+            if line.name is not None and line.error is None:
+                result[line.name] = line.value
+        return result
+
+    # --- نگهداری گراف ---
+
+    def _register(self, line):
+        if line.name is not None:
+            self._definitions.setdefault(line.name, []).append(line)
+        for name in line.names:
+            self._users.setdefault(name, set()).add(line)
+
+    def _unregister(self, line):
+        if line.name is not None:
+            self._definitions[line.name].remove(line)
+        for name in line.names:
+            self._users[name].discard(line)
+        for target in line.bindings.values():
+            if target is not None:
+                self._dependents.get(target, set()).discard(line)
+
+    def _affected_by_names(self, names):
+        """خطوطی که نام‌های داده‌شده را به کار می‌برند و باید دوباره متصل شوند"""
+        affected = []
+        for name in names:
+            affected.extend(self._users.get(name, ()))
+        return affected
+
+    def _replace(self, index, source):
+        line = self.lines[index]
+        old_name = line.name
+        self._unregister(line)
+        line.source = source
+        line.parse()
+        self._register(line)
+        return (line, {old_name, line.name} - {None})
+
+    def _insert(self, index, source):
+        line = WorksheetLine(source)
+        self.lines.insert(index, line)
+        self._register(line)
+        return (line, {line.name} - {None})
+
+    def _remove(self, index):
+        line = self.lines.pop(index)
+        self._unregister(line)
+        dependents = self._dependents.pop(line, set())
+        # خطوط وابسته باید به تعریف قبلی همان نام متصل شوند
+        return [(dependent, set()) for dependent in dependents] + [(None, {line.name} - {None})]
+
+    def _bind(self, line, positions):
+        """اتصال هر نام به نزدیک‌ترین تعریف قبلی؛ آیا اتصال‌های خط تغییر کرد؟"""
+        for target in line.bindings.values():
+            if target is not None:
+                self._dependents.get(target, set()).discard(line)
+        position = positions[line]
+        bindings = {}
+        for name in line.names:
+            best = None
+            for candidate in self._definitions.get(name, ()):
+                candidate_position = positions[candidate]
+                if candidate_position < position and (best is None or candidate_position > positions[best]):
+                    best = candidate
+            bindings[name] = best
+            if best is not None:
+                self._dependents.setdefault(best, set()).add(line)
+        changed = bindings != line.bindings
+        line.bindings = bindings
+        return changed
+
+    def _recompute(self, changes):
+        positions = {line: index for index, line in enumerate(self.lines)}
+
+        dirty = set()
+        rebind = set()
+        for line, names in changes:
+            if line is not None and line in positions:
+                dirty.add(line)
+                rebind.add(line)
+            rebind.update(user for user in self._affected_by_names(names) if user in positions)
+        # خطی که همان تعریف‌ها را دوباره گرفته دست نمی‌خورد مگر وابسته خط تغییرکرده‌ای باشد
+        for line in rebind:
+            if self._bind(line, positions):
+                dirty.add(line)
+
+        # بستن تعدی روی وابسته‌ها
+        stack = list(dirty)
+        while stack:
+            for dependent in self._dependents.get(stack.pop(), ()):
+                if dependent not in dirty:
+                    dirty.add(dependent)
+                    stack.append(dependent)
+
+        # وابستگی‌ها همیشه به خطوط بالاتر اشاره می‌کنند؛ ترتیب خطوط ترتیب توپولوژیک است
+        for line in sorted(dirty, key=positions.__getitem__):
+            self._evaluate(line)
+
+    def _evaluate(self, line):
+        line.value = None
+        line.error = line.parse_error
+        if line.compiled is None:
+            return
+        env = {}
+        for name, target in line.bindings.items():
+            if target is None or target.error is not None or target.value is None:
+                line.error = NameError(f"name '{name}' is not defined")
+                return
+            env[name] = target.value
+        if line.names and is_heavy(line.node, env):
+            line.error = OverflowError("result too large")
+            return
+        self.evaluations += 1
+        try:
+            line.value = line.compiled(env)
+        except Exception as exc:
+            line.error = exc
@@ -1,11 +1,15 @@
 import sys
-import sqlite3
 from datetime import datetime, timedelta
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                             QLabel, QLineEdit, QPushButton, QTableWidget, QTableWidgetItem,
+                             QLabel, QLineEdit, QPushButton, QTableView, QAbstractItemView,
                              QComboBox, QDateEdit, QTextEdit, QMessageBox, QTabWidget, QInputDialog)
 from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QFont, QIcon, QIntValidator
+import pm_db
+from pm_executor import DbExecutor
+from pm_sim import DEFAULT_KINEMATICS
+from pm_state import SELECT_STATES, ElevatorCache
+from pm_models import ChangeNotifier, ElevatorsModel, MaintenanceModel, DueElevatorsModel, today
 
 class HotelElevatorSystem(QMainWindow):
     def __init__(self):
@@ -15,8 +19,21 @@ class HotelElevatorSystem(QMainWindow):
         self.setMinimumSize(1000, 700)
         
         # اتصال به پایگاه داده
-        self.db_connection = sqlite3.connect('hotel_elevators.db')
-        self.create_tables()
+        # نوشتن‌ها و پرس‌وجوهای سنگین در رشته‌های DbExecutor اجرا می‌شوند و
+        # نتیجه در رشته رابط کاربری می‌رسد (طرح همان‌جا با مهاجرت‌های pm_db
+        # ارتقا می‌یابد)؛ مدل‌های جدول صفحه‌ها را از یک اتصال فقط‌خواندنی می‌خوانند
+        self.db = DbExecutor(pm_db.DB_PATH, parent=self)
+        self.db_connection = pm_db.connect_reader()
+        
+        # وضعیت آسانسورها در حافظه؛ هر نوشتن روی elevators از همان مسیر روی آن هم اعمال می‌شود
+        self.elevator_states = ElevatorCache()
+        
+        # اعلان ردیف‌های تغییرکرده پس از هر نوشتن؛ جداول، کامبوها و گزارش‌ها
+        # فقط همان ردیف‌ها را به‌روز می‌کنند
+        self.changes = ChangeNotifier(self.db, {'elevators': self.elevator_states}, self)
+        self.changes.changed.connect(self.on_rows_changed)
+        self.service_stats = None
+        self.stats_request = None
         
         # ایجاد رابط کاربری
         self.init_ui()
@@ -25,41 +42,6 @@ class HotelElevatorSystem(QMainWindow):
         self.load_elevators()
         self.load_maintenance_logs()
     
-    def create_tables(self):
-        """ایجاد جداول پایگاه داده اگر وجود نداشته باشند"""
-        cursor = self.db_connection.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS elevators (
-                elevator_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT,
-                current_floor INTEGER,
-                status TEXT CHECK(status IN ('فعال', 'غیرفعال', 'در حال تعمیر', 'نیاز به سرویس')),
-                last_service DATE,
-                next_service DATE,
-                service_interval INTEGER,
-                capacity INTEGER,
-                manufacturer TEXT,
-                installation_date DATE
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS maintenance_logs (
-                log_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                elevator_id INTEGER,
-                technician TEXT,
-                service_date DATE,
-                service_type TEXT,
-                description TEXT,
-                parts_replaced TEXT,
-                next_service_date DATE,
-                FOREIGN KEY (elevator_id) REFERENCES elevators (elevator_id)
-            )
-        ''')
-        
-        self.db_connection.commit()
-    
     def init_ui(self):
         """ایجاد رابط کاربری گرافیکی"""
         main_widget = QWidget()
@@ -136,14 +118,12 @@ class HotelElevatorSystem(QMainWindow):
         
         layout.addLayout(form_layout)
         
-        # جدول آسانسورها
-        self.elevators_table = QTableWidget()
-        self.elevators_table.setColumnCount(8)
-        self.elevators_table.setHorizontalHeaderLabels([
-            "کد", "نام", "طبقه فعلی", "وضعیت", "آخرین سرویس", 
-            "سرویس بعدی", "ظرفیت", "سازنده"
-        ])
-        self.elevators_table.setSelectionBehavior(QTableWidget.SelectRows)
+        # جدول آسانسورها (مدل مجازی؛ فقط ردیف‌های دیده‌شده خوانده می‌شوند)
+        self.elevators_model = ElevatorsModel(self.db_connection, self)
+        self.elevators_model.watch(self.changes)
+        self.elevators_table = QTableView()
+        self.elevators_table.setModel(self.elevators_model)
+        self.elevators_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.elevators_table.doubleClicked.connect(self.show_elevator_details)
         layout.addWidget(self.elevators_table)
     
@@ -214,12 +194,10 @@ class HotelElevatorSystem(QMainWindow):
         layout.addLayout(form_layout)
         
         # جدول تاریخچه سرویس‌ها
-        self.maintenance_table = QTableWidget()
-        self.maintenance_table.setColumnCount(7)
-        self.maintenance_table.setHorizontalHeaderLabels([
-            "تاریخ", "آسانسور", "تکنسین", "نوع سرویس", 
-            "توضیحات", "قطعات", "سرویس بعدی"
-        ])
+        self.maintenance_model = MaintenanceModel(self.db_connection, self)
+        self.maintenance_model.watch(self.changes)
+        self.maintenance_table = QTableView()
+        self.maintenance_table.setModel(self.maintenance_model)
         layout.addWidget(self.maintenance_table)
     
     def init_reports_tab(self):
@@ -262,9 +240,10 @@ class HotelElevatorSystem(QMainWindow):
         due_label.setStyleSheet("font-weight: bold; font-size: 14px;")
         layout.addWidget(due_label)
         
-        self.due_table = QTableWidget()
-        self.due_table.setColumnCount(4)
-        self.due_table.setHorizontalHeaderLabels(["کد", "نام", "وضعیت", "تاریخ سرویس بعدی"])
+        self.due_model = DueElevatorsModel(self.db_connection, self)
+        self.due_model.watch(self.changes)
+        self.due_table = QTableView()
+        self.due_table.setModel(self.due_model)
         layout.addWidget(self.due_table)
         
         # گزارش آماری
@@ -326,42 +305,24 @@ class HotelElevatorSystem(QMainWindow):
     
     def load_elevators(self):
         """بارگذاری لیست آسانسورها"""
-        cursor = self.db_connection.cursor()
-        cursor.execute("SELECT * FROM elevators")
-        elevators = cursor.fetchall()
+        self.elevators_model.refresh()
         
-        self.elevators_table.setRowCount(len(elevators))
-        for row, elevator in enumerate(elevators):
-            for col, value in enumerate(elevator[:8]):  # فقط 8 ستون اول
-                item = QTableWidgetItem(str(value))
-                item.setFlags(item.flags() ^ Qt.ItemIsEditable)
-                self.elevators_table.setItem(row, col, item)
+        # وضعیت آسانسورها فقط همین یک بار از پایگاه داده خوانده می‌شود
+        self.elevator_states.load(self.db_connection)
         
         # پر کردن کامبو باکس‌ها
         self.maintenance_elevator_combo.clear()
         self.control_elevator_combo.clear()
-        for elevator in elevators:
-            self.maintenance_elevator_combo.addItem(f"{elevator[0]} - {elevator[1]}", elevator[0])
-            self.control_elevator_combo.addItem(f"{elevator[0]} - {elevator[1]}", elevator[0])
+        for state in self.elevator_states:
+            self.add_combo_elevator(state.elevator_id, state.name)
+    
+    def add_combo_elevator(self, elevator_id, name):
+        self.maintenance_elevator_combo.addItem(f"{elevator_id} - {name}", elevator_id)
+        self.control_elevator_combo.addItem(f"{elevator_id} - {name}", elevator_id)
     
     def load_maintenance_logs(self):
         """بارگذاری تاریخچه سرویس‌ها"""
-        cursor = self.db_connection.cursor()
-        cursor.execute('''
-            SELECT m.service_date, e.name, m.technician, m.service_type, 
-                   m.description, m.parts_replaced, m.next_service_date
-            FROM maintenance_logs m
-            JOIN elevators e ON m.elevator_id = e.elevator_id
-            ORDER BY m.service_date DESC
-        ''')
-        logs = cursor.fetchall()
-        
-        self.maintenance_table.setRowCount(len(logs))
-        for row, log in enumerate(logs):
-            for col, value in enumerate(log):
-                item = QTableWidgetItem(str(value))
-                item.setFlags(item.flags() ^ Qt.ItemIsEditable)
-                self.maintenance_table.setItem(row, col, item)
+        self.maintenance_model.refresh()
         
         # بارگذاری گزارشات
         self.load_reports()
@@ -369,27 +330,13 @@ class HotelElevatorSystem(QMainWindow):
     def load_reports(self):
         """بارگذاری گزارشات"""
         # آسانسورهای نیازمند سرویس
-        cursor = self.db_connection.cursor()
-        cursor.execute('''
-            SELECT elevator_id, name, status, next_service 
-            FROM elevators 
-            WHERE next_service <= ? AND status != 'در حال تعمیر'
-            ORDER BY next_service ASC
-        ''', (datetime.now().date().strftime('%Y-%m-%d'),))
-        
-        due_elevators = cursor.fetchall()
-        self.due_table.setRowCount(len(due_elevators))
-        for row, elevator in enumerate(due_elevators):
-            for col, value in enumerate(elevator):
-                item = QTableWidgetItem(str(value))
-                if col == 3 and value <= datetime.now().date().strftime('%Y-%m-%d'):
-                    item.setBackground(Qt.red)
-                    item.setForeground(Qt.white)
-                item.setFlags(item.flags() ^ Qt.ItemIsEditable)
-                self.due_table.setItem(row, col, item)
+        self.due_model.refresh((today(),))
         
         # آمار سرویس‌ها
-        cursor.execute('''
+        self.load_service_stats()
+    
+    def load_service_stats(self):
+        request = self.db.query('''
             SELECT 
                 COUNT(*) as total_services,
                 COUNT(DISTINCT elevator_id) as elevators_serviced,
@@ -402,8 +349,22 @@ class HotelElevatorSystem(QMainWindow):
             self.from_date_input.date().toString('yyyy-MM-dd'),
             self.to_date_input.date().toString('yyyy-MM-dd')
         ))
-        
-        stats = cursor.fetchone()
+        request.then(lambda rows: self.set_service_stats(request, rows[0]),
+                     lambda exc: self.set_service_stats(request, None))
+        self.stats_request = request
+    
+    def set_service_stats(self, request, stats):
+        if request is not self.stats_request:
+            return
+        self.stats_request = None
+        if stats is None:
+            return
+        # SUM روی بازه خالی NULL است؛ آمار افزایشی از صفر شروع می‌شود
+        self.service_stats = [value or 0 for value in stats]
+        self.show_service_stats()
+    
+    def show_service_stats(self):
+        stats = self.service_stats
         stats_text = f"""
         آمار سرویس‌ها از {self.from_date_input.date().toString('yyyy/MM/dd')} تا {self.to_date_input.date().toString('yyyy/MM/dd')}:
         
@@ -415,6 +376,68 @@ class HotelElevatorSystem(QMainWindow):
         """
         self.stats_text.setPlainText(stats_text)
     
+    def on_rows_changed(self, table, keys):
+        """به‌روزرسانی ردیفی کامبوها و آمار پس از یک نوشتن"""
+        if table == 'elevators':
+            # آسانسورهای تازه درج‌شده یک بار خوانده و به کش و کامبوها اضافه می‌شوند
+            new_ids = [elevator_id for elevator_id in keys if self.elevator_states.get(elevator_id) is None]
+            if not new_ids:
+                return
+            marks = ", ".join("?" * len(new_ids))
+            self.db.query(f'{SELECT_STATES} WHERE elevator_id IN ({marks})',
+                          new_ids).then(self.add_elevator_states)
+        elif table == 'maintenance_logs':
+            if self.stats_request is not None:
+                # همان مسئله برای آماری که هنوز در راه است
+                self.load_service_stats()
+            elif self.service_stats is not None:
+                for log_id in keys:
+                    self.count_service(log_id)
+    
+    def add_elevator_states(self, rows):
+        for row in rows:
+            if self.elevator_states.get(row[0]) is None:
+                state = self.elevator_states.add(row)
+                self.add_combo_elevator(state.elevator_id, state.name)
+    
+    def count_service(self, log_id):
+        """افزودن یک سرویس تازه به آمار بازه فعلی بدون محاسبه دوباره کل آمار"""
+        stats = self.service_stats
+        date_from = self.from_date_input.date().toString('yyyy-MM-dd')
+        date_to = self.to_date_input.date().toString('yyyy-MM-dd')
+        
+        def read(connection):
+            cursor = connection.cursor()
+            cursor.execute('SELECT elevator_id, service_date, service_type FROM maintenance_logs WHERE log_id = ?',
+                           (log_id,))
+            record = cursor.fetchone()
+            if record is None:
+                return None
+            elevator_id, service_date, service_type = record
+            if service_date is None or not date_from <= service_date <= date_to:
+                return None
+            # آسانسوری که این اولین سرویسش در بازه است
+            cursor.execute('''
+                SELECT COUNT(*) FROM maintenance_logs
+                WHERE elevator_id = ? AND service_date BETWEEN ? AND ?
+            ''', (elevator_id, date_from, date_to))
+            return service_type, cursor.fetchone()[0] == 1
+        
+        def add(service):
+            # آماری که در این میان دوباره خوانده شده این سرویس را شامل است
+            if service is None or stats is not self.service_stats:
+                return
+            service_type, first = service
+            stats[0] += 1
+            if first:
+                stats[1] += 1
+            for index, kind in ((2, 'سرویس دوره‌ای'), (3, 'تعمیر مکانیکی'), (4, 'تعمیر الکتریکی')):
+                if service_type == kind:
+                    stats[index] += 1
+            self.show_service_stats()
+        
+        self.db.read(read).then(add)
+    
     def add_elevator(self):
         """اضافه کردن آسانسور جدید"""
         name = self.elevator_name_input.text().strip()
@@ -427,8 +450,8 @@ class HotelElevatorSystem(QMainWindow):
             QMessageBox.warning(self, "خطا", "لطفاً تمام فیلدهای ضروری را پر کنید")
             return
         
-        try:
-            cursor = self.db_connection.cursor()
+        def write(connection, inserted):
+            cursor = connection.cursor()
             cursor.execute('''
                 INSERT INTO elevators (
                     name, current_floor, status, last_service, next_service,
@@ -446,20 +469,18 @@ class HotelElevatorSystem(QMainWindow):
                 manufacturer,
                 installation_date
             ))
-            self.db_connection.commit()
-            
+            inserted['elevators'].append(cursor.lastrowid)
+        
+        def added(result):
             QMessageBox.information(self, "موفق", "آسانسور جدید با موفقیت اضافه شد")
             
             # پاک کردن فیلدها
             self.elevator_name_input.clear()
             self.capacity_input.clear()
             self.manufacturer_input.clear()
-            
-            # بارگذاری مجدد لیست
-            self.load_elevators()
         
-        except Exception as e:
-            QMessageBox.critical(self, "خطا", f"خطا در اضافه کردن آسانسور: {str(e)}")
+        self.changes.write(write).then(
+            added, lambda e: QMessageBox.critical(self, "خطا", f"خطا در اضافه کردن آسانسور: {str(e)}"))
     
     def log_maintenance(self):
         """ثبت سرویس انجام شده"""
@@ -474,13 +495,16 @@ class HotelElevatorSystem(QMainWindow):
             QMessageBox.warning(self, "خطا", "لطفاً فیلدهای تکنسین و توضیحات را پر کنید")
             return
         
-        try:
-            # دریافت بازه سرویس برای این آسانسور
-            cursor = self.db_connection.cursor()
-            cursor.execute('SELECT service_interval FROM elevators WHERE elevator_id = ?', (elevator_id,))
-            interval = cursor.fetchone()[0]
-            
-            next_service = (datetime.strptime(service_date, '%Y-%m-%d') + timedelta(days=interval)).strftime('%Y-%m-%d')
+        # دریافت بازه سرویس برای این آسانسور
+        state = self.elevator_states.get(elevator_id)
+        if state is None:
+            QMessageBox.critical(self, "خطا", "خطا در ثبت سرویس: آسانسور یافت نشد")
+            return
+        
+        next_service = (datetime.strptime(service_date, '%Y-%m-%d') + timedelta(days=state.service_interval)).strftime('%Y-%m-%d')
+        
+        def write(connection, inserted):
+            cursor = connection.cursor()
             
             # ثبت سرویس
             cursor.execute('''
@@ -498,6 +522,7 @@ class HotelElevatorSystem(QMainWindow):
                 parts_replaced,
                 next_service
             ))
+            inserted['maintenance_logs'].append(cursor.lastrowid)
             
             # به‌روزرسانی وضعیت آسانسور
             cursor.execute('''
@@ -505,22 +530,19 @@ class HotelElevatorSystem(QMainWindow):
                 SET status = 'فعال', last_service = ?, next_service = ?
                 WHERE elevator_id = ?
             ''', (service_date, next_service, elevator_id))
-            
-            self.db_connection.commit()
-            
+        
+        def logged(result):
             QMessageBox.information(self, "موفق", "سرویس با موفقیت ثبت شد")
             
             # پاک کردن فیلدها
             self.technician_input.clear()
             self.description_input.clear()
             self.parts_replaced_input.clear()
-            
-            # بارگذاری مجدد داده‌ها
-            self.load_elevators()
-            self.load_maintenance_logs()
         
-        except Exception as e:
-            QMessageBox.critical(self, "خطا", f"خطا در ثبت سرویس: {str(e)}")
+        # سوابق سرویس بی‌درنگ و با همگام‌سازی کامل روی دیسک ثبت می‌شوند
+        self.changes.write(write, table='elevators', keys=[elevator_id], durable=True, state={
+            'status': 'فعال', 'last_service': service_date, 'next_service': next_service
+        }).then(logged, lambda e: QMessageBox.critical(self, "خطا", f"خطا در ثبت سرویس: {str(e)}"))
     
     def report_problem_dialog(self):
         """گزارش مشکل در آسانسور"""
@@ -538,8 +560,8 @@ class HotelElevatorSystem(QMainWindow):
         )
         
         if ok and text:
-            try:
-                cursor = self.db_connection.cursor()
+            def write(connection, inserted):
+                cursor = connection.cursor()
                 
                 # به‌روزرسانی وضعیت آسانسور
                 cursor.execute('''
@@ -559,17 +581,12 @@ class HotelElevatorSystem(QMainWindow):
                     datetime.now().date().strftime('%Y-%m-%d'),
                     f"مشکل گزارش شده: {text}"
                 ))
-                
-                self.db_connection.commit()
-                
-                QMessageBox.information(self, "موفق", "مشکل با موفقیت گزارش شد")
-                
-                # بارگذاری مجدد داده‌ها
-                self.load_elevators()
-                self.load_maintenance_logs()
+                inserted['maintenance_logs'].append(cursor.lastrowid)
             
-            except Exception as e:
-                QMessageBox.critical(self, "خطا", f"خطا در گزارش مشکل: {str(e)}")
+            self.changes.write(write, table='elevators', keys=[elevator_id], durable=True,
+                               state={'status': 'نیاز به سرویس'}).then(
+                lambda result: QMessageBox.information(self, "موفق", "مشکل با موفقیت گزارش شد"),
+                lambda e: QMessageBox.critical(self, "خطا", f"خطا در گزارش مشکل: {str(e)}"))
     
     def move_elevator(self):
         """کنترل حرکت آسانسور"""
@@ -582,44 +599,48 @@ class HotelElevatorSystem(QMainWindow):
         
         try:
             target_floor = int(target_floor)
-            
-            # دریافت وضعیت فعلی آسانسور
-            cursor = self.db_connection.cursor()
-            cursor.execute('SELECT status, current_floor FROM elevators WHERE elevator_id = ?', (elevator_id,))
-            status, current_floor = cursor.fetchone()
-            
-            if status != 'فعال':
-                QMessageBox.warning(self, "خطا", f"آسانسور در وضعیت {status} نمی‌تواند حرکت کند")
-                return
-            
-            # شبیه‌سازی حرکت
-            time_taken = abs(target_floor - current_floor) * 2  # 2 ثانیه برای هر طبقه
-            
-            # به‌روزرسانی طبقه فعلی
-            cursor.execute('''
+        except Exception as e:
+            QMessageBox.critical(self, "خطا", f"خطا در حرکت آسانسور: {str(e)}")
+            return
+        
+        # دریافت وضعیت فعلی آسانسور
+        state = self.elevator_states.get(elevator_id)
+        status, current_floor = state.status, state.current_floor
+        
+        if status != 'فعال':
+            QMessageBox.warning(self, "خطا", f"آسانسور در وضعیت {status} نمی‌تواند حرکت کند")
+            return
+        
+        # زمان حرکت با مدل حرکتی شبیه‌ساز: بسته شدن در، شتاب، سرعت بیشینه، ترمز و باز شدن در
+        time_taken = DEFAULT_KINEMATICS.trip_time(current_floor, target_floor)
+        
+        def write(connection, batch):
+            # به‌روزرسانی طبقه فعلی؛ حرکت‌های پیاپی یک آسانسور در یک دسته یکی می‌شوند
+            batch.update(('current_floor', elevator_id), '''
                 UPDATE elevators 
                 SET current_floor = ?
                 WHERE elevator_id = ?
             ''', (target_floor, elevator_id))
-            self.db_connection.commit()
-            
+        
+        def moved(result):
             # نمایش پیام
-            self.movement_log.append(f"[{datetime.now().strftime('%H:%M:%S')}] آسانسور {elevator_id} از طبقه {current_floor} به {target_floor} حرکت کرد. زمان: {time_taken} ثانیه")
-            
-            # به‌روزرسانی نمایش وضعیت
-            self.update_elevator_status_display(elevator_id)
+            self.movement_log.append(f"[{datetime.now().strftime('%H:%M:%S')}] آسانسور {elevator_id} از طبقه {current_floor} به {target_floor} حرکت کرد. زمان: {time_taken:.1f} ثانیه")
         
-        except Exception as e:
-            QMessageBox.critical(self, "خطا", f"خطا در حرکت آسانسور: {str(e)}")
+        # کش بی‌درنگ به‌روز می‌شود، پس حرکت بعدی از همین طبقه شروع می‌کند
+        self.changes.write(write, table='elevators', keys=[elevator_id], deferred=True,
+                           state={'current_floor': target_floor}).then(
+            moved, lambda e: QMessageBox.critical(self, "خطا", f"خطا در حرکت آسانسور: {str(e)}"))
+        
+        # به‌روزرسانی نمایش وضعیت
+        self.update_elevator_status_display(elevator_id)
     
     def update_elevator_status_display(self, elevator_id):
         """به‌روزرسانی نمایش وضعیت آسانسور"""
-        cursor = self.db_connection.cursor()
-        cursor.execute('SELECT name, status, current_floor FROM elevators WHERE elevator_id = ?', (elevator_id,))
-        name, status, floor = cursor.fetchone()
+        state = self.elevator_states.get(elevator_id)
+        status = state.status
         
         self.status_display.setText(f"وضعیت: {status}")
-        self.floor_display.setText(f"طبقه فعلی: {floor}")
+        self.floor_display.setText(f"طبقه فعلی: {state.current_floor}")
         
         # تغییر رنگ بر اساس وضعیت
         if status == 'فعال':
@@ -637,34 +658,34 @@ class HotelElevatorSystem(QMainWindow):
     
     def show_elevator_details(self, index):
         """نمایش جزئیات آسانسور"""
-        row = index.row()
-        elevator_id = self.elevators_table.item(row, 0).text()
-        
-        cursor = self.db_connection.cursor()
-        cursor.execute('SELECT * FROM elevators WHERE elevator_id = ?', (elevator_id,))
-        elevator = cursor.fetchone()
+        record = self.elevators_model.row(index.row())
+        if record is None:
+            return
+        elevator_id = record[0]
         
-        cursor.execute('''
+        # فقط آخرین سرویس‌ها از پایگاه داده خوانده می‌شوند؛ مشخصات آسانسور در کش است
+        self.db.query('''
             SELECT service_date, service_type, technician, description 
             FROM maintenance_logs 
             WHERE elevator_id = ? 
             ORDER BY service_date DESC
             LIMIT 5
-        ''', (elevator_id,))
-        logs = cursor.fetchall()
-        
+        ''', (elevator_id,)).then(lambda logs: self.show_details(elevator_id, logs))
+    
+    def show_details(self, elevator_id, logs):
+        elevator = self.elevator_states.get(elevator_id)
         details = f"""
         جزئیات آسانسور:
         
-        کد: {elevator[0]}
-        نام: {elevator[1]}
-        وضعیت: {elevator[3]}
-        طبقه فعلی: {elevator[2]}
-        ظرفیت: {elevator[7]} نفر
-        سازنده: {elevator[8]}
-        تاریخ نصب: {elevator[9]}
-        آخرین سرویس: {elevator[4]}
-        سرویس بعدی: {elevator[5]}
+        کد: {elevator.elevator_id}
+        نام: {elevator.name}
+        وضعیت: {elevator.status}
+        طبقه فعلی: {elevator.current_floor}
+        ظرفیت: {elevator.capacity} نفر
+        سازنده: {elevator.manufacturer}
+        تاریخ نصب: {elevator.installation_date}
+        آخرین سرویس: {elevator.last_service}
+        سرویس بعدی: {elevator.next_service}
         
         آخرین سرویس‌ها:
         """
@@ -676,6 +697,8 @@ class HotelElevatorSystem(QMainWindow):
     
     def closeEvent(self, event):
         """رویداد بستن پنجره"""
+        # نوشتن‌های در صف پیش از بسته شدن اجرا می‌شوند
+        self.db.shutdown()
         self.db_connection.close()
         event.accept()
 
@@ -0,0 +1,118 @@
+"""پایگاه داده سیستم آسانسورها: اتصال، تنظیمات SQLite و مهاجرت‌های نسخه‌دار طرح
+
+نسخه طرح در PRAGMA user_version نگه داشته می‌شود. هنگام باز کردن پایگاه
+داده مهاجرت‌های اجرانشده به ترتیب و هر کدام در یک تراکنش اجرا می‌شوند،
+پس پایگاه‌های داده قدیمی در همان جا ارتقا می‌یابند.
+"""
+import sqlite3
+
+DB_PATH = 'hotel_elevators.db'
+
+# هر مهاجرت طرح را یک نسخه جلو می‌برد. مهاجرت‌های منتشرشده هرگز ویرایش
+# نمی‌شوند؛ هر تغییر طرح یک مهاجرت تازه در انتهای این فهرست است.
+MIGRATIONS = (
+    # 1: جداول اولیه؛ پایگاه‌های داده قبل از نسخه‌بندی (user_version = 0)
+    # همین جداول را دارند و IF NOT EXISTS آن‌ها را دست‌نخورده می‌گذارد
+    '''
+    CREATE TABLE IF NOT EXISTS elevators (
+        elevator_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        current_floor INTEGER,
+        status TEXT CHECK(status IN ('فعال', 'غیرفعال', 'در حال تعمیر', 'نیاز به سرویس')),
+        last_service DATE,
+        next_service DATE,
+        service_interval INTEGER,
+        capacity INTEGER,
+        manufacturer TEXT,
+        installation_date DATE
+    );
+    CREATE TABLE IF NOT EXISTS maintenance_logs (
+        log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        elevator_id INTEGER,
+        technician TEXT,
+        service_date DATE,
+        service_type TEXT,
+        description TEXT,
+        parts_replaced TEXT,
+        next_service_date DATE,
+        FOREIGN KEY (elevator_id) REFERENCES elevators (elevator_id)
+    );
+    ''',
+    # 2: نمایه‌ها
+    #   آخرین سرویس‌های یک آسانسور و شمارش سرویس‌های آن در یک بازه
+    #   جدول تاریخچه، جای ردیف در آن و آمار بازه تاریخ (elevator_id آن را پوشا می‌کند)
+    #   آسانسورهای نیازمند سرویس؛ شرط != روی status نمی‌تواند ابتدای نمایه باشد
+    '''
+    CREATE INDEX IF NOT EXISTS idx_maintenance_elevator_date
+        ON maintenance_logs (elevator_id, service_date);
+    CREATE INDEX IF NOT EXISTS idx_maintenance_date_type
+        ON maintenance_logs (service_date, service_type, elevator_id);
+    CREATE INDEX IF NOT EXISTS idx_elevators_next_service
+        ON elevators (next_service, status);
+    ''',
+    # 3: ترتیب جدول تاریخچه (service_date, log_id)؛ rowid ضمنی نمایه همان log_id است
+    #   و صفحه‌بندی کلیدی بدون مرتب‌سازی موقت از هر صفحه به صفحه بعد می‌رود
+    '''
+    CREATE INDEX IF NOT EXISTS idx_maintenance_date
+        ON maintenance_logs (service_date);
+    ''',
+)
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+# تنظیمات هر اتصال
+PRAGMAS = (
+    # خواننده‌ها نویسنده را متوقف نمی‌کنند و هر commit فقط به WAL اضافه می‌کند
+    "PRAGMA journal_mode = WAL",
+    # در حالت WAL امن است: فقط در checkpoint همگام‌سازی کامل انجام می‌شود
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 67108864",
+)
+
+
+class SchemaError(Exception):
+    """پایگاه داده با نسخه‌ای جدیدتر از این برنامه ساخته شده است"""
+
+
+def configure(connection):
+    for pragma in PRAGMAS:
+        connection.execute(pragma)
+
+
+def schema_version(connection):
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(connection):
+    """اجرای مهاجرت‌های اجرانشده؛ نسخه قبلی طرح را برمی‌گرداند"""
+    version = schema_version(connection)
+    if version > SCHEMA_VERSION:
+        raise SchemaError(f"database schema version {version} is newer than {SCHEMA_VERSION}")
+    for number in range(version + 1, SCHEMA_VERSION + 1):
+        # هر مهاجرت همراه با افزایش user_version در یک تراکنش اتمی است
+        try:
+            connection.executescript(
+                f"BEGIN; {MIGRATIONS[number - 1]} PRAGMA user_version = {number}; COMMIT;")
+        except sqlite3.Error:
+            connection.rollback()
+            raise
+    return version
+
+
+def connect(path=DB_PATH, **kwargs):
+    """اتصال تنظیم‌شده به پایگاه داده با طرح به‌روز"""
+    connection = sqlite3.connect(path, **kwargs)
+    configure(connection)
+    migrate(connection)
+    return connection
+
+
+def connect_reader(path=DB_PATH, **kwargs):
+    """اتصال فقط‌خواندنی؛ طرح باید قبلاً با connect به‌روز شده باشد"""
+    connection = sqlite3.connect(path, **kwargs)
+    configure(connection)
+    connection.execute("PRAGMA query_only = ON")
+    return connection
@@ -0,0 +1,268 @@
+"""اجرای پرس‌وجوهای پایگاه داده خارج از رشته رابط کاربری
+
+یک رشته نویسنده تنها اتصال نوشتنی را در اختیار دارد و کارهای نوشتن را به
+ترتیب ارسال، هر کدام در یک تراکنش، اجرا می‌کند. چند رشته خواننده هر کدام
+یک اتصال فقط‌خواندنی دارند؛ در حالت WAL خواننده‌ها نه منتظر نویسنده
+می‌مانند و نه او را متوقف می‌کنند.
+
+هر کار یک DbFuture برمی‌گرداند و نتیجه یا خطای آن با سیگنال‌های
+finished/failed در رشته رابط کاربری تحویل داده می‌شود:
+
+    executor.read(fetch_stats, date_from, date_to).then(self.show_stats)
+
+تابع کار اتصال را به عنوان اولین آرگومان می‌گیرد.
+
+به‌روزرسانی‌های پرتکرار (مثل طبقه فعلی آسانسورها) با defer به جای یک
+تراکنش برای هر رویداد در یک WriteBehind جمع می‌شوند: به‌روزرسانی‌های
+پیاپی یک کلید یکی می‌شوند و کل دسته با رسیدن به batch_size ردیف یا پس از
+batch_delay ثانیه در یک تراکنش نوشته می‌شود. هر write معمولی ابتدا دسته
+در انتظار را می‌نویسد تا ترتیب نوشتن‌ها حفظ شود؛ write با durable=True
+مانع پایداری است و با synchronous=FULL روی دیسک commit می‌شود.
+"""
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+
+import pm_db
+
+
+class DbFuture(QObject):
+    """نتیجه آینده یک کار پایگاه داده؛ سیگنال‌ها در رشته رابط کاربری فرستاده می‌شوند"""
+
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.done = False
+        self.result = None
+        self.error = None
+
+    def then(self, on_result=None, on_error=None):
+        if on_result is not None:
+            self.finished.connect(on_result)
+        if on_error is not None:
+            self.failed.connect(on_error)
+        return self
+
+
+class WriteBehind:
+    """به‌روزرسانی‌های در انتظار دسته بعدی؛ فقط در رشته نویسنده استفاده می‌شود"""
+
+    def __init__(self):
+        self.updates = OrderedDict()
+        # (future، نتیجه) کارهایی که با commit همین دسته تمام می‌شوند
+        self.waiting = []
+        self.deadline = None
+
+    def update(self, key, sql, params):
+        """ثبت یک UPDATE؛ جایگزین به‌روزرسانی قبلی همان key در این دسته"""
+        self.updates.pop(key, None)
+        self.updates[key] = (sql, params)
+
+    def get(self, key):
+        """پارامترهای به‌روزرسانی در انتظار key (یا None)"""
+        update = self.updates.get(key)
+        return None if update is None else update[1]
+
+    def __len__(self):
+        return len(self.updates)
+
+
+class DbExecutor(QObject):
+    """رشته نویسنده و مجموعه رشته‌های خواننده روی یک فایل پایگاه داده"""
+
+    # از رشته‌های کاری به رشته رابط کاربری: (future، موفق، نتیجه یا خطا)
+    _completed = pyqtSignal(object, bool, object)
+
+    def __init__(self, path=pm_db.DB_PATH, readers=2, batch_size=256, batch_delay=0.05, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self._writes = queue.Queue()
+        self._reads = queue.Queue()
+        # futureهای در جریان؛ تا تحویل نتیجه زنده می‌مانند
+        self._pending = set()
+        self._completed.connect(self._deliver, Qt.QueuedConnection)
+
+        # نویسنده پیش از خواننده‌ها شروع می‌شود تا مهاجرت‌های طرح انجام شده باشند
+        ready = threading.Event()
+        startup = []
+        self._writer = threading.Thread(target=self._write_loop, args=(ready, startup),
+                                        name="db-writer", daemon=True)
+        self._writer.start()
+        ready.wait()
+        if startup:
+            self._writer.join()
+            raise startup[0]
+        self._readers = [
+            threading.Thread(target=self._read_loop, name=f"db-reader-{number}", daemon=True)
+            for number in range(readers)
+        ]
+        for reader in self._readers:
+            reader.start()
+
+    # --- رابط ---
+
+    def read(self, func, *args):
+        """func(connection, *args) روی یک اتصال فقط‌خواندنی در یک snapshot ثابت"""
+        return self._submit(self._reads, func, args)
+
+    def write(self, func, *args, durable=False):
+        """func(connection, *args) در رشته نویسنده و در یک تراکنش؛ با خطا rollback می‌شود
+
+        durable=True: نتیجه فقط پس از همگام‌سازی کامل روی دیسک تحویل می‌شود.
+        """
+        return self._submit(self._writes, func, args, (self._write, durable))
+
+    def defer(self, func, *args):
+        """func(connection, batch, *args) در رشته نویسنده بدون تراکنش
+
+        func فقط با batch.update به‌روزرسانی ثبت می‌کند و می‌تواند با
+        batch.get مقدار در انتظار را بخواند. نتیجه پس از commit دسته تحویل
+        داده می‌شود.
+        """
+        return self._submit(self._writes, func, args, (self._defer,))
+
+    def query(self, sql, params=()):
+        """خواندن همه ردیف‌های یک پرس‌وجو"""
+        return self.read(_fetch_all, sql, params)
+
+    def shutdown(self):
+        """پایان رشته‌ها پس از اجرای کارهای در صف"""
+        self._writes.put(None)
+        for _ in self._readers:
+            self._reads.put(None)
+        self._writer.join()
+        for reader in self._readers:
+            reader.join()
+
+    def _submit(self, jobs, func, args, mode=None):
+        future = DbFuture()
+        self._pending.add(future)
+        jobs.put((future, func, args) if mode is None else (future, func, args, mode))
+        return future
+
+    def _deliver(self, future, ok, payload):
+        self._pending.discard(future)
+        future.done = True
+        if ok:
+            future.result = payload
+            future.finished.emit(payload)
+        else:
+            future.error = payload
+            future.failed.emit(payload)
+
+    # --- رشته‌های کاری ---
+
+    def _transaction(self, connection, func, *args, durable=False):
+        # isolation_level=None: تراکنش صریح، حتی برای SELECTهای پیش از نوشتن
+        if durable:
+            connection.execute("PRAGMA synchronous = FULL")
+        try:
+            connection.execute("BEGIN IMMEDIATE" if connection is self._write_connection else "BEGIN")
+            try:
+                result = func(connection, *args)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        finally:
+            if durable:
+                connection.execute("PRAGMA synchronous = NORMAL")
+        return result
+
+    def _run(self, connection, future, func, args, durable=False):
+        try:
+            result = self._transaction(connection, func, *args, durable=durable)
+        except Exception as exc:
+            self._completed.emit(future, False, exc)
+        else:
+            self._completed.emit(future, True, result)
+
+    def _write(self, connection, batch, future, func, args, durable):
+        # دسته در انتظار پیش از این نوشتن ثبت شده است
+        self._flush(connection, batch)
+        self._run(connection, future, func, args, durable)
+
+    def _defer(self, connection, batch, future, func, args):
+        try:
+            result = func(connection, batch, *args)
+        except Exception as exc:
+            self._completed.emit(future, False, exc)
+            return
+        batch.waiting.append((future, result))
+        if batch.deadline is None:
+            batch.deadline = time.monotonic() + self.batch_delay
+        if len(batch) >= self.batch_size:
+            self._flush(connection, batch)
+
+    def _flush(self, connection, batch):
+        """نوشتن دسته در انتظار در یک تراکنش"""
+        if not batch.waiting:
+            return
+        updates, waiting = list(batch.updates.values()), batch.waiting
+        batch.updates.clear()
+        batch.waiting = []
+        batch.deadline = None
+
+        def apply(connection):
+            for sql, params in updates:
+                connection.execute(sql, params)
+        try:
+            self._transaction(connection, apply)
+        except Exception as exc:
+            for future, result in waiting:
+                self._completed.emit(future, False, exc)
+        else:
+            for future, result in waiting:
+                self._completed.emit(future, True, result)
+
+    def _write_loop(self, ready, startup):
+        try:
+            connection = self._write_connection = pm_db.connect(self.path, isolation_level=None)
+        except Exception as exc:
+            startup.append(exc)
+            return
+        finally:
+            ready.set()
+        batch = WriteBehind()
+        try:
+            while True:
+                try:
+                    if batch.deadline is None:
+                        job = self._writes.get()
+                    else:
+                        job = self._writes.get(timeout=max(0.0, batch.deadline - time.monotonic()))
+                except queue.Empty:
+                    self._flush(connection, batch)
+                    continue
+                if job is None:
+                    self._flush(connection, batch)
+                    return
+                future, func, args, (handler, *options) = job
+                handler(connection, batch, future, func, args, *options)
+                # در جریان پیوسته کارها get هرگز منتظر نمی‌ماند
+                if batch.deadline is not None and time.monotonic() >= batch.deadline:
+                    self._flush(connection, batch)
+        finally:
+            connection.close()
+
+    def _read_loop(self):
+        connection = pm_db.connect_reader(self.path, isolation_level=None)
+        try:
+            while True:
+                job = self._reads.get()
+                if job is None:
+                    return
+                self._run(connection, *job)
+        finally:
+            connection.close()
+
+
+def _fetch_all(connection, sql, params):
+    return connection.execute(sql, params).fetchall()
@@ -0,0 +1,382 @@
+"""مدل‌های جدولی مجازی روی SQLite برای جداول سیستم آسانسورها
+
+ردیف‌ها صفحه به صفحه و فقط وقتی نمایش داده می‌شوند از پایگاه داده خوانده
+می‌شوند. چند صفحه اخیر در یک کش LRU نگه داشته می‌شوند، پس حافظه و زمان
+بارگذاری به اندازه جدول بستگی ندارد. نما با canFetchMore/fetchMore
+ردیف‌های بیشتری را هنگام پیمایش به پایین درخواست می‌کند.
+
+صفحه‌ها با کلید خوانده می‌شوند نه با OFFSET: مقادیر مرتب‌سازی آخرین ردیف
+هر صفحه نگه داشته می‌شود و صفحه بعد از همان‌جا با نمایه جستجو می‌شود.
+فقط پرش به صفحه‌ای دور که مرز صفحه قبلش معلوم نیست از نزدیک‌ترین مرز
+شناخته‌شده OFFSET می‌گیرد.
+
+هر نوشتن در پایگاه داده از طریق ChangeNotifier در رشته نویسنده اجرا می‌شود
+و کلید ردیف‌های تغییرکرده را اعلام می‌کند؛ مدل‌ها فقط همان ردیف‌ها را درج،
+حذف یا به‌روز می‌کنند. خود مدل‌ها صفحه‌ها را همگام از یک اتصال فقط‌خواندنی
+می‌خوانند، چون data باید بی‌درنگ پاسخ دهد؛ هر صفحه یک جستجوی نمایه است.
+"""
+from collections import Counter, OrderedDict, defaultdict
+from datetime import datetime
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QObject, QVariant, pyqtSignal
+from PyQt5.QtGui import QColor
+
+
+class ChangeNotifier(QObject):
+    """اعلان تغییر ردیف‌ها؛ (نام جدول، لیست کلیدهای اصلی)
+
+    about_to_change پیش از ارسال کار نوشتن و changed پس از commit آن
+    فرستاده می‌شود تا مدل‌ها جای قبلی ردیف را بدانند. برای ردیف تازه
+    درج‌شده فقط changed فرستاده می‌شود. اگر چند نوشتن روی یک ردیف در صف
+    باشند about_to_change فقط برای اولی و changed فقط پس از آخری فرستاده
+    می‌شود.
+
+    caches کش‌های درون‌حافظه‌ای هر جدول هستند (مثل pm_state.ElevatorCache)؛
+    فیلدهای state هنگام ارسال نوشتن روی کش اعمال و در صورت خطا برگردانده می‌شوند.
+    """
+
+    about_to_change = pyqtSignal(str, object)
+    changed = pyqtSignal(str, object)
+
+    def __init__(self, executor, caches=None, parent=None):
+        super().__init__(parent)
+        self.executor = executor
+        self.caches = caches or {}
+        self._pending = Counter()
+
+    def write(self, func, *args, table=None, keys=(), state=None, durable=False, deferred=False):
+        """اجرای func(connection, inserted, *args) در رشته نویسنده روی ردیف‌های keys از table
+
+        کلید ردیف‌های تازه در دیکشنری inserted ثبت می‌شوند:
+        inserted['maintenance_logs'].append(cursor.lastrowid)
+        با deferred=True کار با DbExecutor.defer اجرا می‌شود و func(connection, batch, *args)
+        است. سیگنال‌های changed پیش از تحویل نتیجه به بقیه مشترکان future فرستاده می‌شوند.
+        """
+        keys = list(keys)
+        inserted = defaultdict(list)
+        if table is not None:
+            first = [key for key in keys if not self._pending[table, key]]
+            for key in keys:
+                self._pending[table, key] += 1
+            if first:
+                self.about_to_change.emit(table, first)
+        cache = self.caches.get(table) if state else None
+        if cache is not None:
+            previous = [cache.update(key, state) for key in keys]
+
+        def done(ok):
+            if cache is not None and not ok:
+                for key, values in zip(keys, previous):
+                    cache.revert(key, state, values)
+            if table is not None:
+                last = []
+                for key in keys:
+                    self._pending[table, key] -= 1
+                    if not self._pending[table, key]:
+                        del self._pending[table, key]
+                        last.append(key)
+                if last:
+                    self.changed.emit(table, last)
+            # پس از rollback ردیف درج‌شده‌ای وجود ندارد
+            for inserted_table, inserted_keys in (inserted.items() if ok else ()):
+                self.changed.emit(inserted_table, inserted_keys)
+
+        if deferred:
+            future = self.executor.defer(func, *args)
+        else:
+            future = self.executor.write(func, inserted, *args, durable=durable)
+        future.finished.connect(lambda result: done(True))
+        future.failed.connect(lambda exc: done(False))
+        return future
+
+
+class SqlPageModel(QAbstractTableModel):
+    """مدل فقط‌خواندنی یک پرس‌وجوی SELECT با صفحه‌بندی و کش صفحات
+
+    زیرکلاس‌ها پرس‌وجو را به صورت اجزا تعریف می‌کنند:
+        COLUMNS     فهرست ستون‌ها؛ ستون‌های اضافه بعد از headers نمایش داده نمی‌شوند
+        SOURCE      جدول‌ها و JOIN
+        WHERE       شرط اختیاری با پارامترهای self.params
+        ORDER       ترتیب ردیف‌ها؛ باید یکتا باشد (کلید در انتهای آن)
+        TABLE, KEY  جدولی که تغییراتش دنبال می‌شود و ستون کلید اصلی آن
+        BEFORE      شرط «قبل از ردیفی با این مقادیر مرتب‌سازی» در ترتیب ORDER
+        AFTER       شرط «بعد از ردیفی با این مقادیر مرتب‌سازی»؛ شروع هر صفحه
+        SORT_INDEXES  جای مقادیر مرتب‌سازی در ردیف
+    """
+
+    COLUMNS = SOURCE = ORDER = TABLE = KEY = BEFORE = AFTER = None
+    WHERE = ""
+    SORT_INDEXES = (0,)
+
+    def __init__(self, connection, headers, params=(), page_size=256, cache_pages=16, parent=None):
+        super().__init__(parent)
+        self.connection = connection
+        self.headers = list(headers)
+        self.params = tuple(params)
+        self.page_size = page_size
+        self.cache_pages = cache_pages
+        where = f"WHERE {self.WHERE}" if self.WHERE else ""
+        conjunction = f"WHERE {self.WHERE} AND" if self.WHERE else "WHERE"
+        self.query = f"SELECT {self.COLUMNS} FROM {self.SOURCE} {where} ORDER BY {self.ORDER}"
+        self._after_query = (f"SELECT {self.COLUMNS} FROM {self.SOURCE} {conjunction} {self.AFTER} "
+                             f"ORDER BY {self.ORDER}")
+        # پرش با OFFSET فقط ستون‌های مرتب‌سازی را می‌خواند تا از خود نمایه پاسخ داده شود
+        columns = [column.strip() for column in self.COLUMNS.split(",")]
+        sort_columns = ", ".join(columns[i] for i in self.SORT_INDEXES)
+        self._seek_query = f"SELECT {sort_columns} FROM {self.SOURCE} {where} ORDER BY {self.ORDER}"
+        self._seek_after_query = (f"SELECT {sort_columns} FROM {self.SOURCE} {conjunction} {self.AFTER} "
+                                  f"ORDER BY {self.ORDER}")
+        self._count_query = f"SELECT COUNT(*) FROM {self.SOURCE} {where}"
+        self._row_query = f"SELECT {self.COLUMNS} FROM {self.SOURCE} {conjunction} {self.KEY} = ?"
+        self._position_query = f"SELECT COUNT(*) FROM {self.SOURCE} {conjunction} {self.BEFORE}"
+        self._pages = OrderedDict()
+        # شماره صفحه ← مقادیر مرتب‌سازی آخرین ردیف آن
+        self._bounds = {}
+        self._before = {}
+        self._total = 0
+        self._loaded = 0
+        self.refresh()
+
+    # --- داده ---
+
+    def refresh(self, params=None):
+        """خواندن دوباره تعداد ردیف‌ها و خالی کردن کش (مثلاً پس از تغییر فیلتر)"""
+        self.beginResetModel()
+        if params is not None:
+            self.params = tuple(params)
+        self._pages.clear()
+        self._bounds.clear()
+        self._before.clear()
+        self._total = self.connection.execute(self._count_query, self.params).fetchone()[0]
+        self._loaded = min(self._total, self.page_size)
+        self.endResetModel()
+
+    def _page(self, number):
+        page = self._pages.get(number)
+        if page is not None:
+            self._pages.move_to_end(number)
+            return page
+        bound = self._bounds.get(number - 1) if number else ()
+        if bound is None:
+            bound = self._seek(number * self.page_size - 1)
+            if bound is None:
+                return []
+        if bound:
+            cursor = self.connection.execute(f"{self._after_query} LIMIT ?",
+                                             self.params + bound + (self.page_size,))
+        else:
+            cursor = self.connection.execute(f"{self.query} LIMIT ?", self.params + (self.page_size,))
+        page = cursor.fetchall()
+        if len(page) == self.page_size:
+            self._bounds[number] = self._sort_values(page[-1])
+        self._pages[number] = page
+        if len(self._pages) > self.cache_pages:
+            self._pages.popitem(last=False)
+        return page
+
+    def _seek(self, position):
+        """مقادیر مرتب‌سازی ردیف position با OFFSET از نزدیک‌ترین مرز صفحه شناخته‌شده"""
+        known = max((number for number in self._bounds if (number + 1) * self.page_size <= position),
+                    default=None)
+        if known is None:
+            query, params, skip = self._seek_query, self.params, position
+        else:
+            query, params = self._seek_after_query, self.params + self._bounds[known]
+            skip = position - (known + 1) * self.page_size
+        record = self.connection.execute(f"{query} LIMIT 1 OFFSET ?", params + (skip,)).fetchone()
+        return None if record is None else tuple(record)
+
+    def _sort_values(self, record):
+        return tuple(record[i] for i in self.SORT_INDEXES)
+
+    def row(self, row):
+        """تاپل کامل یک ردیف (یا None اگر خارج از محدوده باشد)"""
+        if not 0 <= row < self._loaded:
+            return None
+        page = self._page(row // self.page_size)
+        offset = row % self.page_size
+        return page[offset] if offset < len(page) else None
+
+    def cell_text(self, value):
+        return "" if value is None else str(value)
+
+    # --- تغییرات ردیفی ---
+
+    def watch(self, notifier):
+        notifier.about_to_change.connect(self.about_to_change)
+        notifier.changed.connect(self.changed)
+
+    def locate(self, key):
+        """(جای ردیف در ترتیب مدل، ردیف) یا None اگر ردیف در نتیجه پرس‌وجو نباشد"""
+        record = self.connection.execute(self._row_query, self.params + (key,)).fetchone()
+        if record is None:
+            return None
+        sort_values = self._sort_values(record)
+        position = self.connection.execute(self._position_query, self.params + sort_values).fetchone()[0]
+        return position, record
+
+    def about_to_change(self, table, keys):
+        if table == self.TABLE:
+            for key in keys:
+                self._before[key] = self.locate(key)
+
+    def changed(self, table, keys):
+        if table != self.TABLE:
+            return
+        for key in keys:
+            before = self._before.pop(key, None)
+            after = self.locate(key)
+            if before is not None and after is not None and before[0] == after[0]:
+                self._update_row(*after)
+                continue
+            if before is not None:
+                self._remove_row(before[0])
+            if after is not None:
+                self._insert_row(after[0])
+
+    def _drop_pages_from(self, position):
+        """ردیف‌های بعد از position جابه‌جا شده‌اند؛ صفحه‌های کش و مرزهای آن‌ها دیگر معتبر نیستند"""
+        first = position // self.page_size
+        for number in [number for number in self._pages if number >= first]:
+            del self._pages[number]
+        for number in [number for number in self._bounds if number >= first]:
+            del self._bounds[number]
+
+    def _insert_row(self, position):
+        # ردیف فقط وقتی در نما درج می‌شود که در بخش بارگذاری‌شده باشد
+        visible = position < self._loaded or self._loaded == self._total
+        self._drop_pages_from(position)
+        if visible:
+            self.beginInsertRows(QModelIndex(), position, position)
+            self._total += 1
+            self._loaded += 1
+            self.endInsertRows()
+        else:
+            self._total += 1
+
+    def _remove_row(self, position):
+        self._drop_pages_from(position)
+        if position < self._loaded:
+            self.beginRemoveRows(QModelIndex(), position, position)
+            self._total -= 1
+            self._loaded -= 1
+            self.endRemoveRows()
+        else:
+            self._total -= 1
+
+    def _update_row(self, position, record):
+        page = self._pages.get(position // self.page_size)
+        if page is not None and position % self.page_size < len(page):
+            page[position % self.page_size] = record
+        if position % self.page_size == self.page_size - 1 and position // self.page_size in self._bounds:
+            # مقادیر مرتب‌سازی ممکن است بدون جابه‌جایی ردیف تغییر کرده باشند
+            self._bounds[position // self.page_size] = self._sort_values(record)
+        if position < self._loaded:
+            self.dataChanged.emit(self.index(position, 0), self.index(position, len(self.headers) - 1))
+
+    # --- رابط QAbstractTableModel ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < self._total
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.page_size, self._total - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return QVariant()
+        record = self.row(index.row())
+        if record is None:
+            return QVariant()
+        return self.cell_text(record[index.column()])
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return QVariant()
+        if orientation == Qt.Horizontal:
+            return self.headers[section]
+        return section + 1
+
+    def flags(self, index):
+        # جدول‌ها فقط‌خواندنی هستند
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled
+
+
+class ElevatorsModel(SqlPageModel):
+    COLUMNS = ("elevator_id, name, current_floor, status, last_service, "
+               "next_service, capacity, manufacturer")
+    SOURCE = "elevators"
+    ORDER = "elevator_id"
+    TABLE = "elevators"
+    KEY = "elevator_id"
+    BEFORE = "elevator_id < ?"
+    AFTER = "elevator_id > ?"
+    SORT_INDEXES = (0,)
+
+    def __init__(self, connection, parent=None):
+        super().__init__(connection, [
+            "کد", "نام", "طبقه فعلی", "وضعیت", "آخرین سرویس",
+            "سرویس بعدی", "ظرفیت", "سازنده"
+        ], parent=parent)
+
+
+class MaintenanceModel(SqlPageModel):
+    # log_id (ستون پنهان آخر) ترتیب سرویس‌های هم‌تاریخ را ثابت نگه می‌دارد
+    COLUMNS = ("m.service_date, e.name, m.technician, m.service_type, "
+               "m.description, m.parts_replaced, m.next_service_date, m.log_id")
+    # LEFT JOIN روی کلید یکتا: SQLite آن را در پرس‌وجوهایی که ستونی از e نمی‌خوانند حذف می‌کند
+    SOURCE = "maintenance_logs m LEFT JOIN elevators e ON m.elevator_id = e.elevator_id"
+    ORDER = "m.service_date DESC, m.log_id DESC"
+    TABLE = "maintenance_logs"
+    KEY = "m.log_id"
+    BEFORE = "(m.service_date, m.log_id) > (?, ?)"
+    AFTER = "(m.service_date, m.log_id) < (?, ?)"
+    SORT_INDEXES = (0, 7)
+
+    def __init__(self, connection, parent=None):
+        super().__init__(connection, [
+            "تاریخ", "آسانسور", "تکنسین", "نوع سرویس",
+            "توضیحات", "قطعات", "سرویس بعدی"
+        ], parent=parent)
+
+
+def today():
+    return datetime.now().date().strftime('%Y-%m-%d')
+
+
+class DueElevatorsModel(SqlPageModel):
+    """آسانسورهای نیازمند سرویس؛ تاریخ سرویس گذشته با زمینه قرمز"""
+
+    COLUMNS = "elevator_id, name, status, next_service"
+    SOURCE = "elevators"
+    WHERE = "next_service <= ? AND status != 'در حال تعمیر'"
+    ORDER = "next_service ASC, elevator_id"
+    TABLE = "elevators"
+    KEY = "elevator_id"
+    BEFORE = "(next_service, elevator_id) < (?, ?)"
+    AFTER = "(next_service, elevator_id) > (?, ?)"
+    SORT_INDEXES = (3, 0)
+
+    def __init__(self, connection, parent=None):
+        super().__init__(connection, ["کد", "نام", "وضعیت", "تاریخ سرویس بعدی"],
+                         params=(today(),), parent=parent)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if index.isValid() and index.column() == 3 and role in (Qt.BackgroundRole, Qt.ForegroundRole):
+            record = self.row(index.row())
+            if record is not None and record[3] is not None and record[3] <= self.params[0]:
+                return QColor(Qt.red if role == Qt.BackgroundRole else Qt.white)
+            return QVariant()
+        return super().data(index, role)
@@ -0,0 +1,71 @@
+"""وضعیت آسانسورها در حافظه برنامه
+
+همه آسانسورها یک بار هنگام شروع خوانده می‌شوند و از آن پس تب کنترل،
+نمایش وضعیت و جزئیات آسانسور برای این داده‌ها سراغ پایگاه داده نمی‌روند.
+هر تغییر از همان مسیر نوشتن پایگاه داده (ChangeNotifier.write با state)
+روی کش هم اعمال می‌شود؛ این برنامه تنها نویسنده جدول elevators است.
+"""
+
+# ستون‌های جدول elevators به ترتیب طرح
+FIELDS = ('elevator_id', 'name', 'current_floor', 'status', 'last_service', 'next_service',
+          'service_interval', 'capacity', 'manufacturer', 'installation_date')
+
+SELECT_STATES = f"SELECT {', '.join(FIELDS)} FROM elevators"
+
+
+class ElevatorState:
+    """وضعیت یک آسانسور؛ یک ردیف جدول elevators"""
+
+    __slots__ = FIELDS
+
+    def __init__(self, *values):
+        for field, value in zip(FIELDS, values):
+            setattr(self, field, value)
+
+    def values(self):
+        return tuple(getattr(self, field) for field in FIELDS)
+
+
+class ElevatorCache:
+    """ElevatorState آسانسورها بر اساس elevator_id"""
+
+    def __init__(self):
+        self.states = {}
+
+    def load(self, connection):
+        self.states = {row[0]: ElevatorState(*row) for row in connection.execute(
+            f"{SELECT_STATES} ORDER BY elevator_id")}
+
+    def __len__(self):
+        return len(self.states)
+
+    def __iter__(self):
+        # به ترتیب elevator_id؛ شناسه‌های تازه همیشه بزرگ‌ترند
+        return iter(self.states.values())
+
+    def get(self, elevator_id):
+        return self.states.get(elevator_id)
+
+    def add(self, row):
+        state = ElevatorState(*row)
+        self.states[state.elevator_id] = state
+        return state
+
+    def update(self, elevator_id, fields):
+        """اعمال fields روی یک آسانسور؛ مقادیر قبلی را برای revert برمی‌گرداند"""
+        state = self.states.get(elevator_id)
+        if state is None:
+            return None
+        previous = {field: getattr(state, field) for field in fields}
+        for field, value in fields.items():
+            setattr(state, field, value)
+        return previous
+
+    def revert(self, elevator_id, fields, previous):
+        """بازگرداندن یک update ناموفق؛ فیلدهایی که از آن پس دوباره تغییر کرده‌اند دست نمی‌خورند"""
+        state = self.states.get(elevator_id)
+        if state is None or previous is None:
+            return
+        for field, value in previous.items():
+            if getattr(state, field) == fields[field]:
+                setattr(state, field, value)
@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+# ماژول‌های برنامه در ریشه مخزن هستند و بسته نصب‌شدنی نیستند
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    """QApplication مشترک روی پلتفرم offscreen؛ بدون PyQt5 آزمون رد می‌شود"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    widgets = pytest.importorskip("PyQt5.QtWidgets")
+    return widgets.QApplication.instance() or widgets.QApplication([])
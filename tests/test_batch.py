@@ -0,0 +1,31 @@
+import io
+
+import pytest
+
+from calc_batch import evaluate_line, iter_results, main
+
+OVERFLOW = "خطا: نتیجه بیش از حد بزرگ است"
+
+
+def test_evaluate_line():
+    assert evaluate_line("2^10\n") == "1024"
+    assert evaluate_line("sqrt(16") == "4"
+    assert evaluate_line("   ") == ""
+    assert evaluate_line("1/0") == "خطا: تقسیم بر صفر"
+
+
+@pytest.mark.parametrize("line", ["9^9^9", "1000000!", "2^5000000"])
+def test_lines_over_the_result_budget_are_not_evaluated(line):
+    assert evaluate_line(line) == OVERFLOW
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_heavy_line_does_not_stop_the_stream(jobs):
+    lines = ["1+2", "9^9^9", "3"]
+    assert list(iter_results(lines, jobs, chunk_size=1)) == ["3", OVERFLOW, "3"]
+
+
+def test_main_echo(monkeypatch, capsys):
+    monkeypatch.setattr("sys.stdin", io.StringIO("1+1\n\n9^9^9\n"))
+    assert main(["--echo"]) == 0
+    assert capsys.readouterr().out == f"1+1 = 2\n\n9^9^9 = {OVERFLOW}\n"
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+import calc_server
+from calc_server import (EvaluationService, RPCServer, INLINE_PRECISION, INTERNAL_ERROR, INVALID_PARAMS,
+                         INVALID_REQUEST, MAX_PRECISION, METHOD_NOT_FOUND, PARSE_ERROR, TIMEOUT_ERROR)
+
+
+@pytest.fixture
+def rpc():
+    service = EvaluationService(workers=1, timeout=5)
+    yield RPCServer(service)
+    service.shutdown()
+
+
+def call(rpc, message):
+    if not isinstance(message, (str, bytes)):
+        message = json.dumps(message)
+    return asyncio.run(rpc.handle_message(message))
+
+
+def request(method, params=None, request_id=1):
+    message = {'jsonrpc': '2.0', 'id': request_id, 'method': method}
+    if params is not None:
+        message['params'] = params
+    return message
+
+
+def error_code(response):
+    return response['error']['code']
+
+
+def test_evaluate(rpc):
+    assert call(rpc, request('evaluate', {'expression': '2^10'})) == {
+        'jsonrpc': '2.0', 'id': 1, 'result': '1024'}
+
+
+@pytest.mark.parametrize('method', [['evaluate'], {'name': 'evaluate'}, 1, None])
+def test_non_string_method_is_invalid_request(rpc, method):
+    response = call(rpc, {'jsonrpc': '2.0', 'id': 7, 'method': method})
+    assert error_code(response) == INVALID_REQUEST
+
+
+def test_unknown_method(rpc):
+    assert error_code(call(rpc, request('nope'))) == METHOD_NOT_FOUND
+
+
+def test_parse_error(rpc):
+    assert error_code(call(rpc, '{"jsonrpc": "2.0",')) == PARSE_ERROR
+
+
+@pytest.mark.parametrize('params', [
+    {'expression': 1},
+    {'expression': '1', 'exact': True, 'precision': 0},
+    {'expression': '1', 'exact': True, 'precision': MAX_PRECISION + 1},
+    {'expression': '1', 'timeout': -1},
+    'text',
+])
+def test_invalid_params(rpc, params):
+    assert error_code(call(rpc, request('evaluate', params))) == INVALID_PARAMS
+
+
+def test_unexpected_exception_is_internal_error(rpc):
+    async def broken(params):
+        raise KeyError('boom')
+    rpc.methods['broken'] = broken
+    response = call(rpc, request('broken', request_id=3))
+    assert response['id'] == 3
+    assert error_code(response) == INTERNAL_ERROR
+
+
+def test_batch_keeps_valid_requests(rpc):
+    responses = call(rpc, [request('evaluate', ['1+1'], 1),
+                           {'jsonrpc': '2.0', 'id': 2, 'method': ['x']},
+                           request('evaluate', ['2*3'])])
+    assert [response.get('result') for response in responses] == ['2', None, '6']
+    assert error_code(responses[1]) == INVALID_REQUEST
+
+
+def test_notification_gets_no_response(rpc):
+    assert call(rpc, {'jsonrpc': '2.0', 'method': 'evaluate', 'params': ['1']}) is None
+
+
+def test_inline_evaluation_leaves_event_loop_free(rpc, monkeypatch):
+    # یک ارزیابی سبک اما کند نباید حلقه رویداد را متوقف کند و مهلت را رعایت می‌کند
+    def slow(expression, max_bits, precision):
+        time.sleep(0.5)
+        return ('ok', 'late')
+    monkeypatch.setattr(calc_server, '_evaluate_request', slow)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        task = asyncio.create_task(ticker())
+        response = await rpc.handle_message(json.dumps(
+            request('evaluate', {'expression': '1+1', 'timeout': 0.2})))
+        task.cancel()
+        return response, ticks
+
+    response, ticks = asyncio.run(scenario())
+    assert error_code(response) == TIMEOUT_ERROR
+    assert ticks >= 5
+
+
+def test_high_precision_exact_work_leaves_inline_threads(rpc):
+    service = rpc.service
+    assert service._evaluate_inline('sin(1)', INLINE_PRECISION + 1) is None
+    status, text = service._evaluate_inline('sin(1)', INLINE_PRECISION)
+    assert status == 'ok' and text.startswith('0.8414709848')
+
+
+def test_prepare_is_bounded_by_the_request_timeout(rpc, monkeypatch):
+    def slow(expression, precision):
+        time.sleep(0.5)
+        return expression, (expression, precision)
+    monkeypatch.setattr(rpc.service, '_prepare', slow)
+    started = time.perf_counter()
+    response = call(rpc, request('evaluate', {'expression': '1+1', 'timeout': 0.1}))
+    assert error_code(response) == TIMEOUT_ERROR
+    assert time.perf_counter() - started < 0.4
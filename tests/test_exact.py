@@ -0,0 +1,35 @@
+from fractions import Fraction
+
+import pytest
+
+from calc_engine import is_cheap
+from calc_exact import evaluate_exact
+from calc_expr import canonical, evaluate
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("1.00000000000000000001-1", Fraction(1, 10 ** 20)),
+    ("0.12345678901234567890123", Fraction("0.12345678901234567890123")),
+    ("0.1+0.2", Fraction(3, 10)),
+    ("1e400/1e399", 10),
+])
+def test_decimal_literals_are_exact(expression, expected):
+    assert evaluate_exact(expression, precision=50) == expected
+
+
+def test_literals_with_same_float_do_not_share_cache_or_cse():
+    long, short = "0.12345678901234567890123", "0.12345678901234568"
+    assert canonical(long) != canonical(short)
+    assert evaluate_exact(long) != evaluate_exact(short)
+    assert evaluate_exact(f"{long}-{short}") == Fraction(long) - Fraction(short)
+    # در حالت معمولی هر دو همان float هستند
+    assert evaluate(f"{long}-{short}") == 0.0
+
+
+def test_equivalent_literal_spellings_share_canonical_text():
+    assert canonical("2.50*1e3") == canonical("2.5*1000.0")
+
+
+def test_huge_literal_is_exact_and_cheap():
+    assert evaluate_exact("1e400") == 10 ** 400
+    assert is_cheap("1e400")
@@ -0,0 +1,59 @@
+import pytest
+
+from calc_expr import evaluate, parse
+
+
+@pytest.mark.parametrize("expression, expected", [
+    # منفی یکانی ضعیف‌تر از توان
+    ("-2^2", -4),
+    ("(-2)^2", 4),
+    # توان از راست به چپ و توان منفی
+    ("2^3^2", 512),
+    ("2^-1", 0.5),
+    ("2**3", 8),
+    # ضرب پیش از جمع، جمع و تقسیم از چپ به راست
+    ("1+2*3", 7),
+    ("(1+2)*3", 9),
+    ("10-4-3", 3),
+    ("64/4/2", 8.0),
+    # فاکتوریل پسوندی قوی‌تر از توان و منفی
+    ("3!^2", 36),
+    ("-3!", -6),
+    ("2*3!", 12),
+    ("3!!", 720),
+    ("--2", 2),
+    ("sqrt(16)+1", 5.0),
+    ("1e3+1", 1001.0),
+])
+def test_precedence(expression, expected):
+    result = evaluate(expression)
+    assert result == expected
+    assert type(result) is type(expected)
+
+
+def test_tree_shape():
+    assert parse("-2^2") == ('neg', ('pow', ('num', 2), ('num', 2)))
+    assert parse("2^3^2") == ('pow', ('num', 2), ('pow', ('num', 3), ('num', 2)))
+    assert parse("3!^2") == ('pow', ('fact', ('num', 3)), ('num', 2))
+
+
+@pytest.mark.parametrize("expression", ["", "1+", "(1", "1)", "2(3)", "1..2", "50%"])
+def test_syntax_errors(expression):
+    with pytest.raises(SyntaxError):
+        evaluate(expression)
+
+
+@pytest.mark.parametrize("expression", ["sin", "foo(1)"])
+def test_unknown_names(expression):
+    with pytest.raises(NameError):
+        evaluate(expression)
+
+
+@pytest.mark.parametrize("expression, error", [
+    ("1/0", ZeroDivisionError),
+    ("sqrt(-1)", ValueError),
+    ("(-1)!", ValueError),
+])
+def test_domain_errors(expression, error):
+    with pytest.raises(error):
+        evaluate(expression)
@@ -0,0 +1,89 @@
+import math
+from decimal import Decimal
+
+import pytest
+
+from calc_engine import format_result, is_cheap
+from calc_exact import GAMMA_MAX_PRECISION, evaluate_exact
+from calc_expr import evaluate
+from calc_factorial import FLOAT_LIMIT, factorial, factorial_ratio
+
+
+def test_integers_are_exact():
+    assert factorial(0) == 1
+    assert factorial(20) == math.factorial(20)
+    assert factorial(300) == math.factorial(300)
+    assert factorial(6000) == math.factorial(6000)
+
+
+def test_nearby_results_reuse_the_cache():
+    assert factorial(1000) == math.factorial(1000)
+    assert factorial(1040) == math.factorial(1040)
+
+
+def test_non_integer_uses_gamma():
+    assert factorial(3.5) == pytest.approx(math.gamma(4.5))
+    assert factorial(170.5) == pytest.approx(math.gamma(171.5))
+    assert factorial(5.0) == 120.0
+
+
+def test_float_overflow_raises():
+    with pytest.raises(OverflowError):
+        factorial(float(FLOAT_LIMIT + 1))
+    with pytest.raises(OverflowError):
+        factorial(171.7)
+
+
+def test_negative_raises():
+    with pytest.raises(ValueError):
+        factorial(-1)
+    with pytest.raises(ValueError):
+        factorial(-2.0)
+
+
+@pytest.mark.parametrize("source", ["6000!*0.5", "0.5*6000!", "6000!+1.5", "sqrt(6000!)"])
+def test_big_factorial_mixed_with_floats_overflows(source):
+    with pytest.raises(OverflowError):
+        evaluate(source)
+
+
+def test_big_factorial_in_logarithms():
+    assert evaluate("log10(6000!)") == pytest.approx(20065.42878247359)
+    assert evaluate("log(6000!)") == pytest.approx(46202.35719905735)
+
+
+def test_big_factorial_difference_is_exact():
+    assert format_result(evaluate("6000!-6000!")) == "0"
+    assert evaluate("6000!/5998!") == 6000 * 5999
+
+
+def test_ratio_of_large_non_integers():
+    assert factorial_ratio(200.5, 199.5) == pytest.approx(200.5)
+    assert factorial_ratio(7, 5) == 42
+
+
+def test_big_factorials_leave_the_gui_thread():
+    assert is_cheap("6000!")
+    assert not is_cheap("20000!")
+
+
+GAMMA_3_5 = "3.3233509704478425511840640312646472177454052302295"
+
+
+def test_exact_mode_non_integer_factorial_uses_requested_precision():
+    assert evaluate_exact("2.5!", precision=50) == Decimal(GAMMA_3_5)
+    assert str(evaluate_exact("2.5!", precision=20)) == "3.3233509704478425512"
+    # Γ(1/2) = √π و Γ(-3/2) = 4√π/3
+    assert str(evaluate_exact("(-0.5)!", precision=30)) == "1.77245385090551602729816748334"
+    assert str(evaluate_exact("(-2.5)!", precision=30)) == "2.36327180120735470306422331112"
+    assert evaluate_exact("(1/3)!", precision=25) == Decimal("0.8929795115692492112185643")
+
+
+def test_exact_mode_integral_factorial_stays_exact():
+    assert evaluate_exact("5.0!", precision=50) == 120
+    assert evaluate_exact("(10/2)!") == 120
+
+
+def test_exact_mode_non_integer_factorial_precision_limit():
+    with pytest.raises(ValueError, match="exact mode"):
+        evaluate_exact("2.5!", precision=GAMMA_MAX_PRECISION + 1)
@@ -0,0 +1,57 @@
+from calc_expr import (canonical, canonical_source, compile_node, eliminate_common, evaluate,
+                       fold_constants, parse, parse_canonical)
+from calc_exact import evaluate_exact
+
+
+def test_int_and_float_subtrees_are_not_merged():
+    source = "a^60.0*0 + (a^60 + 1 - 3^60)"
+    env = {'a': 3}
+    assert evaluate(source, env) == compile_node(parse(source))(env) == 1.0
+
+
+def test_negative_zero_is_not_merged_with_zero():
+    # هر دو زیردرخت پس از تا شدن x*0.0 و x*-0.0 می‌شوند
+    bindings, _ = eliminate_common(fold_constants(parse("(x*0.0)*2 + (x*(0.0*-1))*2")))
+    assert bindings == ()
+    assert str(evaluate("x*0.0 - x*(0.0*-1)", {'x': 1.0})) == "0.0"
+
+
+def test_repeated_subtree_is_shared():
+    bindings, body = eliminate_common(parse("sin(x)^2 + sin(x)*2"))
+    assert len(bindings) == 1
+    assert bindings[0][1] == ('call', 'sin', ('var', 'x'))
+    assert evaluate("sin(x)^2 + sin(x)*2", {'x': 0.5}) == compile_node(parse("sin(x)^2 + sin(x)*2"))({'x': 0.5})
+
+
+def test_no_repeats_returns_tree_unchanged():
+    node = parse("x*2 + y/3")
+    assert eliminate_common(node) == ((), node)
+
+
+def test_fold_keeps_factorial_ratio():
+    node = fold_constants(parse("n!/8!"))
+    assert node[0] == 'mul'
+    assert evaluate("n!/8!", {'n': 10}) == 90
+
+
+def test_canonical_source_parses_like_its_text():
+    source = canonical_source("2 * x**2 + π")
+    assert source == canonical("2*x^2+π") == "2*x^2+pi"
+    env = {'x': 1.5}
+    assert compile_node(parse_canonical(source))(env) == compile_node(parse(str(source)))(env)
+    # توکن‌ها فقط یک بار مصرف می‌شوند و بار دوم متن تجزیه می‌شود
+    assert parse_canonical(source) == parse(str(source))
+
+
+def test_exact_mode_keeps_int_and_float_literals_apart():
+    assert evaluate_exact("a^2.0*0 + a^2", {'a': 3}) == 9
+
+
+def test_nested_repeats_keep_evaluation_order():
+    source = "sin(5)/(y*0)/sqrt(-y) + sin(5)/(y*0)/sqrt(-y)"
+    bindings, _ = eliminate_common(fold_constants(parse(source)))
+    assert len(bindings) == 1
+    try:
+        evaluate(source, {'y': 1})
+    except ZeroDivisionError:
+        pass
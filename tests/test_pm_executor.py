@@ -0,0 +1,95 @@
+import time
+
+import pytest
+
+pytest.importorskip("PyQt5")
+
+import pm_db
+from pm_executor import DbExecutor
+
+FLOOR_SQL = "UPDATE elevators SET current_floor = ? WHERE elevator_id = ?"
+
+
+def wait_for(qapp, futures, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not all(future.done for future in futures):
+        assert time.monotonic() < deadline, "timed out"
+        qapp.processEvents()
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def executor(qapp, tmp_path):
+    path = str(tmp_path / "hotel_elevators.db")
+    connection = pm_db.connect(path)
+    connection.executemany("INSERT INTO elevators (name, current_floor, status) VALUES (?, 0, 'فعال')",
+                           [("A",), ("B",), ("C",), ("D",)])
+    connection.commit()
+    connection.close()
+    # تأخیر دسته بلند است تا فقط نوشتن بعدی یا batch_size دسته را بنویسد
+    executor = DbExecutor(path, batch_size=4, batch_delay=60)
+    yield executor
+    executor.shutdown()
+
+
+def set_floor(connection, batch, elevator_id, floor):
+    batch.update(('current_floor', elevator_id), FLOOR_SQL, (floor, elevator_id))
+    return floor
+
+
+def floors(connection):
+    return dict(connection.execute("SELECT elevator_id, current_floor FROM elevators"))
+
+
+def test_write_flushes_deferred_updates_first(qapp, executor):
+    order = []
+    deferred = [executor.defer(set_floor, 1, floor) for floor in (3, 5, 7)]
+    for future in deferred:
+        future.then(order.append)
+    write = executor.write(floors).then(lambda result: order.append('write'))
+    wait_for(qapp, deferred + [write])
+    # به‌روزرسانی‌های یک کلید یکی شده‌اند و پیش از نوشتن commit شده‌اند
+    assert write.result == {1: 7, 2: 0, 3: 0, 4: 0}
+    assert order == [3, 5, 7, 'write']
+
+
+def test_deferred_batch_commits_at_batch_size(qapp, executor):
+    # چهار کلید متفاوت؛ به‌روزرسانی‌های یک کلید در batch_size یک ردیف حساب می‌شوند
+    deferred = [executor.defer(set_floor, elevator_id, 2) for elevator_id in (1, 1, 2, 3, 4)]
+    wait_for(qapp, deferred)
+    read = executor.read(floors)
+    wait_for(qapp, [read])
+    assert read.result == {1: 2, 2: 2, 3: 2, 4: 2}
+
+
+def test_durable_write_restores_normal_sync(qapp, executor):
+    def synchronous(connection):
+        return connection.execute("PRAGMA synchronous").fetchone()[0]
+    durable = executor.write(synchronous, durable=True)
+    normal = executor.write(synchronous)
+    wait_for(qapp, [durable, normal])
+    # FULL = 2، NORMAL = 1
+    assert (durable.result, normal.result) == (2, 1)
+
+
+def test_failed_write_rolls_back_but_keeps_deferred(qapp, executor):
+    def fail(connection):
+        connection.execute(FLOOR_SQL, (9, 2))
+        raise RuntimeError("boom")
+    errors = []
+    deferred = executor.defer(set_floor, 1, 4)
+    failed = executor.write(fail).then(on_error=errors.append)
+    read = executor.write(floors)
+    wait_for(qapp, [deferred, failed, read])
+    assert [str(error) for error in errors] == ["boom"]
+    assert read.result == {1: 4, 2: 0, 3: 0, 4: 0}
+
+
+def test_pending_deferred_updates_are_written_on_shutdown(qapp, executor):
+    executor.defer(set_floor, 2, 6)
+    executor.shutdown()
+    connection = pm_db.connect_reader(executor.path)
+    try:
+        assert floors(connection) == {1: 0, 2: 6, 3: 0, 4: 0}
+    finally:
+        connection.close()
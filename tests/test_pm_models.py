@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+pytest.importorskip("PyQt5")
+
+import pm_db
+from pm_models import DueElevatorsModel, ElevatorsModel, MaintenanceModel
+
+DATES = [f"2024-{month:02d}-{day:02d}" for month in range(1, 4) for day in (1, 15)]
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / "hotel_elevators.db")
+    connection = pm_db.connect(path)
+    rng = random.Random(7)
+    connection.executemany(
+        "INSERT INTO elevators (name, current_floor, status, next_service) VALUES (?, 1, 'فعال', ?)",
+        [(f"E{i}", rng.choice(DATES)) for i in range(40)])
+    connection.executemany(
+        "INSERT INTO maintenance_logs (elevator_id, technician, service_date, service_type) VALUES (?, 'T', ?, 'بازرسی')",
+        [(rng.randint(1, 40), rng.choice(DATES)) for _ in range(300)])
+    connection.commit()
+    yield path, connection
+    connection.close()
+
+
+def rows_by_offset(model, connection):
+    return connection.execute(model.query, model.params).fetchall()
+
+
+def open_model(model_class, path, page_size=16):
+    reader = pm_db.connect_reader(path)
+    model = model_class(reader)
+    model.page_size = page_size
+    model.refresh()
+    model._loaded = model._total
+    return model
+
+
+@pytest.mark.parametrize("model_class", [ElevatorsModel, MaintenanceModel, DueElevatorsModel])
+def test_keyset_pages_match_full_query(qapp, database, model_class):
+    path, connection = database
+    model = open_model(model_class, path)
+    expected = rows_by_offset(model, connection)
+    # پرش‌های تصادفی و سپس پیمایش پشت سر هم
+    order = list(range(len(expected)))
+    random.Random(3).shuffle(order)
+    for row in order[:20] + list(range(len(expected))):
+        assert model.row(row) == expected[row]
+    assert model.row(len(expected)) is None
+
+
+def test_pages_stay_coherent_after_insert(qapp, database):
+    path, connection = database
+    model = open_model(MaintenanceModel, path)
+    for row in range(0, model._total, 7):
+        model.row(row)
+    cursor = connection.execute(
+        "INSERT INTO maintenance_logs (elevator_id, technician, service_date, service_type) "
+        "VALUES (1, 'T', ?, 'بازرسی')", (DATES[2],))
+    connection.commit()
+    model.changed(model.TABLE, [cursor.lastrowid])
+    expected = rows_by_offset(model, connection)
+    assert model.rowCount() == len(expected)
+    # از انتها به ابتدا تا مرزهای قدیمی صفحه‌ها با خواندن پشت سر هم اصلاح نشوند
+    for row in reversed(range(len(expected))):
+        assert model.row(row) == expected[row]
+
+
+def test_history_order_uses_the_date_index(database):
+    _, connection = database
+    plan = connection.execute(
+        "EXPLAIN QUERY PLAN SELECT m.log_id FROM maintenance_logs m "
+        "ORDER BY m.service_date DESC, m.log_id DESC").fetchall()
+    text = " ".join(row[-1] for row in plan)
+    assert "idx_maintenance_date" in text
+    assert "TEMP B-TREE" not in text
@@ -0,0 +1,76 @@
+import sqlite3
+import time
+
+import pytest
+
+import pm_sim
+from pm_sim import POLICIES, Car, Simulation, generate_calls, simulate
+
+
+def fleet(count=4, capacity=pm_sim.DEFAULT_CAPACITY):
+    return [Car(number + 1, capacity=capacity) for number in range(count)]
+
+
+def check_invariants(sim):
+    for passenger in sim.passengers:
+        assert passenger.arrival <= passenger.boarded <= passenger.exited
+        assert passenger.car is not None
+    for car in sim.cars:
+        assert not car.riders and not car.pickups and car.assigned == 0
+
+
+@pytest.mark.parametrize("policy", sorted(POLICIES))
+def test_everyone_is_served(policy):
+    calls = generate_calls(30, 600, seed=4)
+    sim = Simulation(fleet(), policy)
+    result = sim.run(calls)
+    assert result.served == result.passengers == len(calls)
+    check_invariants(sim)
+
+
+@pytest.mark.parametrize("policy", sorted(POLICIES))
+def test_saturated_fleet_serves_everyone(policy):
+    # چهار کابین کوچک و ۶۰۰ مسافر در دقیقه: صف‌ها بلند می‌شوند و بارها جابه‌جا می‌شوند
+    calls = generate_calls(600, 300, seed=5)
+    sim = Simulation(fleet(capacity=4), policy)
+    result = sim.run(calls)
+    assert result.served == len(calls)
+    check_invariants(sim)
+
+
+def test_saturated_runs_scale_linearly():
+    def seconds(duration):
+        calls = generate_calls(600, duration, seed=1)
+        started = time.perf_counter()
+        simulate(fleet(), 'look', calls)
+        return time.perf_counter() - started
+    short, long = seconds(300), seconds(1800)
+    # شش برابر مسافر؛ با هزینه وابسته به طول صف بیش از سی برابر می‌شد
+    assert long < short * 15
+
+
+def test_kinematics_profile():
+    kinematics = pm_sim.Kinematics()
+    assert kinematics.travel_time(0) == 0.0
+    assert kinematics.travel_time(1) < kinematics.travel_time(2) < kinematics.travel_time(10)
+    assert kinematics.trip_time(3, 3) == 0.0
+    assert kinematics.trip_time(1, 5) == kinematics.trip_time(5, 1)
+
+
+def test_missing_database_is_reported_without_creating_it(tmp_path, capsys):
+    path = tmp_path / "missing.db"
+    assert pm_sim.main(["--db", str(path)]) == 1
+    assert not path.exists()
+    assert "missing.db" in capsys.readouterr().err
+
+
+def test_database_without_elevators_table(tmp_path, capsys):
+    path = tmp_path / "other.db"
+    sqlite3.connect(path).execute("CREATE TABLE other (x)")
+    assert pm_sim.main(["--db", str(path)]) == 1
+    assert "elevators" in capsys.readouterr().err
+
+
+def test_rate_must_be_positive():
+    with pytest.raises(SystemExit):
+        pm_sim.main(["--no-db", "--rate", "0"])
@@ -0,0 +1,44 @@
+import sqlite3
+import time
+
+import pytest
+
+pytest.importorskip("PyQt5")
+
+
+def wait_for(qapp, condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        qapp.processEvents()
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def window(qapp, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from pm import HotelElevatorSystem
+    window = HotelElevatorSystem()
+    yield window
+    window.db.shutdown()
+    window.db_connection.close()
+    window.deleteLater()
+
+
+def test_stats_of_empty_range_count_new_services(qapp, window):
+    wait_for(qapp, lambda: window.service_stats is not None)
+    # SUMهای بازه خالی NULL هستند
+    assert window.service_stats == [0, 0, 0, 0, 0]
+
+    service_date = window.to_date_input.date().toString('yyyy-MM-dd')
+    connection = sqlite3.connect(window.db.path)
+    cursor = connection.execute(
+        "INSERT INTO maintenance_logs (elevator_id, technician, service_date, service_type) "
+        "VALUES (1, 'T', ?, 'تعمیر مکانیکی')", (service_date,))
+    connection.commit()
+    connection.close()
+    window.on_rows_changed('maintenance_logs', [cursor.lastrowid])
+
+    wait_for(qapp, lambda: window.service_stats[0] == 1)
+    assert window.service_stats == [1, 1, 0, 1, 0]
+    assert "None" not in window.stats_text.toPlainText()
@@ -0,0 +1,30 @@
+import math
+import time
+
+from calc_preview import IncrementalEvaluator
+
+
+def type_text(text):
+    preview = IncrementalEvaluator()
+    value = None
+    for end in range(1, len(text) + 1):
+        value = preview.update(text[:end])
+    return value
+
+
+def test_incremental_matches_full_expression():
+    assert type_text("2+3*4^2") == 50
+    assert type_text("(1+2)!") == 6
+    assert type_text("2^-1") == 0.5
+
+
+def test_large_factorial_is_not_previewed():
+    started = time.perf_counter()
+    assert type_text("2000000!") is None
+    assert type_text("50000!") is None
+    assert time.perf_counter() - started < 1
+
+
+def test_factorial_within_budget_is_previewed():
+    assert type_text("1000!") == math.factorial(1000)
+    assert type_text("3.5!") == math.gamma(4.5)
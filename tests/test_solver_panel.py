@@ -0,0 +1,32 @@
+import time
+
+import pytest
+
+pytest.importorskip("PyQt5")
+pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def panel(qapp):
+    from calc import SolverPanel
+    panel = SolverPanel()
+    panel.set_expression("x^2 - 2")
+    yield panel
+    panel.deleteLater()
+
+
+@pytest.mark.parametrize("field", ["a_input", "b_input", "tolerance_input"])
+def test_heavy_inputs_are_rejected_without_evaluating(panel, field):
+    getattr(panel, field).setText("9^9^9")
+    started = time.perf_counter()
+    panel.find_root()
+    assert time.perf_counter() - started < 1
+    assert panel.result_label.text() == "خطا: نتیجه بیش از حد بزرگ است"
+
+
+def test_expression_inputs_still_work(panel):
+    panel.a_input.setText("2/2")
+    panel.b_input.setText("2^1")
+    panel.tolerance_input.setText("10^-12")
+    panel.find_root()
+    assert panel.result_label.text().startswith("x ≈ 1.41421356")
@@ -0,0 +1,41 @@
+import math
+
+import numpy as np
+import pytest
+
+from calc_vector import evaluate_array, factorial, gamma
+
+
+def test_factorial_matches_scalar_gamma_over_float_range():
+    x = np.arange(-20.75, 170.6, 0.25)
+    x = x[x != np.floor(x)]
+    expected = np.array([math.gamma(value + 1) for value in x])
+    np.testing.assert_allclose(factorial(x), expected, rtol=1e-12)
+
+
+@pytest.mark.parametrize('value, expected', [
+    (150.5, 7.01491430e263),
+    (160.5, 5.97767080e285),
+    (169.5, 5.56209241e305),
+])
+def test_large_non_integer_factorial_is_finite(value, expected):
+    result = factorial(np.array([value]))[0]
+    assert np.isfinite(result)
+    assert result == pytest.approx(math.gamma(value + 1), rel=1e-12)
+    assert result == pytest.approx(expected, rel=1e-8)
+
+
+def test_integers_use_table_and_overflow_past_170():
+    np.testing.assert_array_equal(factorial(np.array([0.0, 5.0, 170.0])),
+                                  [1.0, 120.0, float(math.factorial(170))])
+    assert np.isinf(factorial(np.array([171.5]))[0])
+
+
+def test_gamma_poles_are_nan():
+    assert np.isnan(gamma(np.array([0.0, -1.0, -7.0]))).all()
+
+
+def test_evaluate_array_factorial():
+    result = evaluate_array('x!', np.array([3.0, 150.5]))
+    assert result[0] == 6.0
+    assert result[1] == pytest.approx(math.gamma(151.5), rel=1e-12)
@@ -0,0 +1,59 @@
+import time
+
+from calc_worksheet import Worksheet
+
+
+def results(sheet):
+    return [line.display() for line in sheet.lines]
+
+
+def test_names_bind_to_nearest_earlier_definition():
+    sheet = Worksheet()
+    sheet.set_text("a = 3\nb = a^2\na = 10\nc = a + b")
+    assert results(sheet) == ["3", "9", "10", "19"]
+
+
+def test_edit_recomputes_only_dependents():
+    sheet = Worksheet()
+    sheet.set_text("a = 3\nb = a^2\nc = 5\nd = c + 1")
+    before = sheet.evaluations
+    sheet.set_text("a = 4\nb = a^2\nc = 5\nd = c + 1")
+    assert results(sheet) == ["4", "16", "5", "6"]
+    assert sheet.evaluations - before == 2
+
+
+def test_heavy_constant_line_is_rejected_without_evaluating():
+    sheet = Worksheet()
+    started = time.perf_counter()
+    sheet.set_text("a = 9^9^9\nb = a + 1")
+    assert time.perf_counter() - started < 1.0
+    assert isinstance(sheet.lines[0].error, OverflowError)
+    assert isinstance(sheet.lines[1].error, NameError)
+
+
+def test_heavy_line_through_variables_is_rejected():
+    sheet = Worksheet()
+    started = time.perf_counter()
+    sheet.set_text("b = 9\nc = b^b^b\nd = b^b")
+    assert time.perf_counter() - started < 1.0
+    assert isinstance(sheet.lines[1].error, OverflowError)
+    assert results(sheet)[2] == "387420489"
+
+
+def test_new_definition_below_users_does_not_recompute_them():
+    sheet = Worksheet()
+    sheet.set_text("a = 1\nb = a\nc = a + 1\nd = c * 2")
+    before = sheet.evaluations
+    sheet.set_text("a = 1\nb = a\nc = a + 1\nd = c * 2\na = b")
+    assert sheet.evaluations - before == 1
+    assert results(sheet) == ["1", "1", "2", "4", "1"]
+
+
+def test_definition_between_users_rebinds_only_later_lines():
+    sheet = Worksheet()
+    sheet.set_text("a = 1\nb = a\nc = a + 1\nd = c * 2")
+    before = sheet.evaluations
+    sheet.insert_line(2, "a = 5")
+    # فقط خط تازه، c و وابسته آن d
+    assert sheet.evaluations - before == 3
+    assert results(sheet) == ["1", "1", "5", "6", "12"]